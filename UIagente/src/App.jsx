@@ -30,6 +30,7 @@ import {
   UserPlusIcon,
   CheckBadgeIcon
 } from '@heroicons/react/24/outline'
+import { fetchAGUI } from './msgpack'
 import {
   CalendarDaysIcon as CalendarDaysIconSolid,
   ClipboardDocumentListIcon as ClipboardDocumentListIconSolid,
@@ -56,6 +57,7 @@ function App() {
   const [studentInfo, setStudentInfo] = useState({ name: '', email: '', studentId: '' })
   const [showRegistrationForm, setShowRegistrationForm] = useState(false)
   const [dashboardStats, setDashboardStats] = useState(null)
+  const [streamedTasks, setStreamedTasks] = useState([])
 
   const API_BASE = 'http://localhost:8000/api'
 
@@ -95,8 +97,7 @@ function App() {
 
   const fetchPlans = async () => {
     try {
-      const response = await fetch(`${API_BASE}/plans`)
-      const data = await response.json()
+      const data = await fetchAGUI(`${API_BASE}/plans`)
       if (data.payload && data.payload.plans) {
         setPlans(data.payload.plans)
       }
@@ -168,9 +169,19 @@ function App() {
         })
       })
 
-      const result = await response.json()
-      
-      if (result.status === 'success') {
+      let result = await response.json()
+
+      // Inscripcion encolada: consultar el ticket hasta que se confirme o rechace
+      for (let attempt = 0; result.status === 'pending' && attempt < 60; attempt++) {
+        await new Promise((resolve) => setTimeout(resolve, 500))
+        const ticketUrl = result.payload.poll_url || `/api/students/registrations/tickets/${result.payload.ticket.ticket_id}`
+        const ticketResponse = await fetch(`${API_BASE.replace(/\/api$/, '')}${ticketUrl}`)
+        result = await ticketResponse.json()
+      }
+
+      if (result.status === 'pending') {
+        alert('Tu inscripción está en proceso. Revisa tus registros en unos momentos.')
+      } else if (result.status === 'success') {
         alert('¡Registro exitoso! Te has inscrito al evento.')
         fetchAvailableEvents()
         fetchStudentRegistrations(studentInfo.email)
@@ -186,8 +197,7 @@ function App() {
 
   const fetchEventRegistrations = async (eventId) => {
     try {
-      const response = await fetch(`${API_BASE}/events/${eventId}/registrations`)
-      const result = await response.json()
+      const result = await fetchAGUI(`${API_BASE}/events/${eventId}/registrations`)
       
       if (result.status === 'success') {
         return result.payload.registrations || []
@@ -214,10 +224,44 @@ function App() {
     }
   }
 
+  const readPlanStream = async (response) => {
+    // El backend envia una linea JSON por mensaje AG-UI: una notificacion por tarea y la respuesta final
+    const reader = response.body.getReader()
+    const decoder = new TextDecoder()
+    let buffer = ''
+    let finalMessage = null
+
+    while (true) {
+      const { done, value } = await reader.read()
+      if (done) break
+      buffer += decoder.decode(value, { stream: true })
+
+      let newlineIndex
+      while ((newlineIndex = buffer.indexOf('\n')) >= 0) {
+        const line = buffer.slice(0, newlineIndex).trim()
+        buffer = buffer.slice(newlineIndex + 1)
+        if (!line) continue
+
+        const message = JSON.parse(line)
+        if (message.message_type === 'notification' && message.action === 'plan_task') {
+          setStreamedTasks(prev => [...prev, message.payload.task])
+        } else {
+          finalMessage = message
+        }
+      }
+    }
+
+    if (buffer.trim()) {
+      finalMessage = JSON.parse(buffer)
+    }
+    return finalMessage
+  }
+
   const handleCreateEvent = async (eventData) => {
     setLoading(true)
+    setStreamedTasks([])
     try {
-      const response = await fetch(`${API_BASE}/plan`, {
+      const response = await fetch(`${API_BASE}/plan/stream`, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify(eventData)
@@ -227,9 +271,13 @@ function App() {
         throw new Error(`HTTP error! status: ${response.status}`)
       }
       
-      const data = await response.json()
+      const data = await readPlanStream(response)
       console.log('Plan creation response:', data)
       
+      if (!data) {
+        throw new Error('Respuesta incompleta del servidor')
+      }
+      
       if (data.status === 'success') {
         await fetchEvents()
         await fetchPlans()
@@ -245,6 +293,7 @@ function App() {
       alert(`Error al crear evento: ${error.message}`)
     } finally {
       setLoading(false)
+      setStreamedTasks([])
     }
   }
 
@@ -443,6 +492,7 @@ function App() {
             onCreateEvent={handleCreateEvent}
             onReplanEvent={handleReplanEvent}
             loading={loading}
+            streamedTasks={streamedTasks}
           />
         )}
 
@@ -666,7 +716,7 @@ function DashboardView({ events, plans, notifications, dashboardStats, loading,
   )
 }
 
-function EventsView({ events, showForm, setShowForm, onCreateEvent, onReplanEvent, loading }) {
+function EventsView({ events, showForm, setShowForm, onCreateEvent, onReplanEvent, loading, streamedTasks = [] }) {
   const [eventRegistrations, setEventRegistrations] = useState({})
 
   useEffect(() => {
@@ -674,8 +724,7 @@ function EventsView({ events, showForm, setShowForm, onCreateEvent, onReplanEven
       const registrationsData = {}
       for (const event of events) {
         try {
-          const response = await fetch(`http://localhost:8000/api/events/${event.event_id}/registrations`)
-          const result = await response.json()
+          const result = await fetchAGUI(`http://localhost:8000/api/events/${event.event_id}/registrations`)
           if (result.status === 'success') {
             registrationsData[event.event_id] = result.payload.registrations || []
           }
@@ -904,7 +953,9 @@ function EventsView({ events, showForm, setShowForm, onCreateEvent, onReplanEven
                 {loading ? (
                   <div className="flex items-center justify-center">
                     <div className="animate-spin rounded-full h-6 w-6 border-b-3 border-white mr-3"></div>
-                    Creando Evento...
+                    {streamedTasks.length > 0
+                      ? `Generando Plan... (${streamedTasks.length} tareas)`
+                      : 'Creando Evento...'}
                   </div>
                 ) : (
                   <div className="flex items-center justify-center">
@@ -1040,8 +1091,7 @@ function PlansView({ plans, onExecute, loading, executingPlanId, selectedPlan, s
       for (const plan of plans) {
         if (plan.event_details?.event_id) {
           try {
-            const response = await fetch(`http://localhost:8000/api/events/${plan.event_details.event_id}/registrations`)
-            const result = await response.json()
+            const result = await fetchAGUI(`http://localhost:8000/api/events/${plan.event_details.event_id}/registrations`)
             if (result.status === 'success') {
               registrationsData[plan.event_details.event_id] = result.payload.registrations || []
             }
@@ -0,0 +1,106 @@
+// Decodificador MessagePack para las respuestas AG-UI del backend
+// (Accept: application/msgpack). Cubre los tipos que produce msgpack en
+// Python: nil, bool, enteros, float, str, bin, array y map.
+
+const textDecoder = new TextDecoder()
+
+export const MSGPACK_MEDIA_TYPE = 'application/msgpack'
+
+export function decodeMsgpack(buffer) {
+  const bytes = buffer instanceof Uint8Array ? buffer : new Uint8Array(buffer)
+  const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength)
+  let offset = 0
+
+  const readStr = (length) => {
+    const value = textDecoder.decode(bytes.subarray(offset, offset + length))
+    offset += length
+    return value
+  }
+
+  const readBin = (length) => {
+    const value = bytes.slice(offset, offset + length)
+    offset += length
+    return value
+  }
+
+  const readArray = (length) => {
+    const value = new Array(length)
+    for (let i = 0; i < length; i++) value[i] = read()
+    return value
+  }
+
+  const readMap = (length) => {
+    const value = {}
+    for (let i = 0; i < length; i++) {
+      const key = read()
+      value[key] = read()
+    }
+    return value
+  }
+
+  const readExt = (length) => {
+    const type = view.getInt8(offset)
+    offset += 1
+    return { type, data: readBin(length) }
+  }
+
+  const read = () => {
+    const byte = bytes[offset++]
+    if (byte <= 0x7f) return byte
+    if (byte <= 0x8f) return readMap(byte & 0x0f)
+    if (byte <= 0x9f) return readArray(byte & 0x0f)
+    if (byte <= 0xbf) return readStr(byte & 0x1f)
+    if (byte >= 0xe0) return byte - 0x100
+
+    let value
+    switch (byte) {
+      case 0xc0: return null
+      case 0xc2: return false
+      case 0xc3: return true
+      case 0xc4: value = view.getUint8(offset); offset += 1; return readBin(value)
+      case 0xc5: value = view.getUint16(offset); offset += 2; return readBin(value)
+      case 0xc6: value = view.getUint32(offset); offset += 4; return readBin(value)
+      case 0xc7: value = view.getUint8(offset); offset += 1; return readExt(value)
+      case 0xc8: value = view.getUint16(offset); offset += 2; return readExt(value)
+      case 0xc9: value = view.getUint32(offset); offset += 4; return readExt(value)
+      case 0xca: value = view.getFloat32(offset); offset += 4; return value
+      case 0xcb: value = view.getFloat64(offset); offset += 8; return value
+      case 0xcc: value = view.getUint8(offset); offset += 1; return value
+      case 0xcd: value = view.getUint16(offset); offset += 2; return value
+      case 0xce: value = view.getUint32(offset); offset += 4; return value
+      case 0xcf: value = Number(view.getBigUint64(offset)); offset += 8; return value
+      case 0xd0: value = view.getInt8(offset); offset += 1; return value
+      case 0xd1: value = view.getInt16(offset); offset += 2; return value
+      case 0xd2: value = view.getInt32(offset); offset += 4; return value
+      case 0xd3: value = Number(view.getBigInt64(offset)); offset += 8; return value
+      case 0xd4: return readExt(1)
+      case 0xd5: return readExt(2)
+      case 0xd6: return readExt(4)
+      case 0xd7: return readExt(8)
+      case 0xd8: return readExt(16)
+      case 0xd9: value = view.getUint8(offset); offset += 1; return readStr(value)
+      case 0xda: value = view.getUint16(offset); offset += 2; return readStr(value)
+      case 0xdb: value = view.getUint32(offset); offset += 4; return readStr(value)
+      case 0xdc: value = view.getUint16(offset); offset += 2; return readArray(value)
+      case 0xdd: value = view.getUint32(offset); offset += 4; return readArray(value)
+      case 0xde: value = view.getUint16(offset); offset += 2; return readMap(value)
+      case 0xdf: value = view.getUint32(offset); offset += 4; return readMap(value)
+      default: throw new Error(`MessagePack: tipo 0x${byte.toString(16)} no soportado`)
+    }
+  }
+
+  return read()
+}
+
+// GET de listados grandes: pide MessagePack y cae a JSON si el servidor no lo soporta
+export async function fetchAGUI(url, options = {}) {
+  const response = await fetch(url, {
+    ...options,
+    headers: { Accept: `${MSGPACK_MEDIA_TYPE}, application/json`, ...options.headers },
+  })
+  const contentType = response.headers.get('content-type') || ''
+  if (contentType.startsWith(MSGPACK_MEDIA_TYPE)) {
+    return decodeMsgpack(await response.arrayBuffer())
+  }
+  return response.json()
+}
@@ -1,61 +1,219 @@
-from pymongo import MongoClient
-from typing import Dict, Any, List, Optional
-from datetime import datetime
+from pymongo.errors import OperationFailure
+from typing import Dict, Any, List, Optional, Callable
+from datetime import datetime, timedelta, timezone
+from collections import defaultdict
+import threading
+import time
 import uuid
 import sys
 import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from config.settings import (
+    STORAGE_BACKEND,
+    MONGO_PRIMARY_AFTER_WRITE_SECONDS,
+    READ_SINGLE_FLIGHT_ENABLED,
+    NEGATIVE_CACHE_TTL_SECONDS,
+    NEGATIVE_CACHE_MAX_ENTRIES,
+    RETENTION_POLICIES,
+    RETENTION_ARCHIVE_GRACE_DAYS,
+    RETENTION_ARCHIVE_BATCH_SIZE,
+    RETENTION_ARCHIVE_BLOCK_COMPRESSOR
+)
 from protocols.acp import ACPProtocol, ACPResponse
+from storage.base import StorageBackend
+from storage.factory import create_storage
+from utils.deadline import Deadline
+from utils.single_flight import SingleFlight, NegativeCache
 
 
 class DatabaseAgent:
-    def __init__(self, mongodb_uri: str):
+    # Campos del evento que se copian a la proyeccion available_events
+    AVAILABLE_EVENT_FIELDS = [
+        "event_id", "event_name", "event_type", "event_date", "description",
+        "budget", "expected_attendees", "organizer_email", "status"
+    ]
+    
+    # Indices declarados por coleccion: (claves, opciones de create_index)
+    COLLECTION_INDEXES = {
+        "users": [
+            ("email", {"unique": True}),
+            ("role", {})
+        ],
+        "events": [
+            ("event_id", {"unique": True}),
+            ("created_at", {})
+        ],
+        "plans": [
+            ("plan_id", {"unique": True}),
+            ("event_id", {})
+        ],
+        "student_registrations": [
+            ("registration_id", {"unique": True}),
+            ("event_id", {}),
+            ("student_email", {}),
+            ([("event_id", 1), ("student_email", 1)], {"unique": True})
+        ],
+        "executions": [
+            ([("action", 1), ("status", 1)], {})
+        ],
+        "idempotency_keys": [
+            ("key", {"unique": True}),
+            # TTL: Mongo borra cada registro al llegar a su expires_at
+            ("expires_at", {"expire_after_seconds": 0})
+        ],
+        "execution_checkpoints": [
+            ("execution_id", {"unique": True}),
+            ([("status", 1), ("lease_expires_at", 1)], {}),
+            ([("plan_id", 1), ("status", 1)], {})
+        ],
+        "stats": [
+            ("stat_id", {"unique": True})
+        ],
+        "available_events": [
+            ("event_id", {"unique": True}),
+            ([("event_date", 1), ("event_id", 1)], {})
+        ],
+        "collection_versions": [
+            ("collection", {"unique": True})
+        ],
+        "registration_queue": [
+            ("ticket_id", {"unique": True}),
+            ("status", {}),
+            ("claimed_by", {}),
+            # Solo los tickets procesados tienen expires_at; los pendientes no vencen
+            ("expires_at", {"expire_after_seconds": 0})
+        ]
+    }
+    
+    # Colecciones de coordinacion entre procesos: un "no existe" no se cachea
+    NEGATIVE_CACHE_EXCLUDED = {"idempotency_keys", "execution_checkpoints", "registration_queue", "collection_versions"}
+    
+    COLLECTIONS = [
+        "users", "events", "plans", "tasks", "executions", "notifications",
+        "logs", "student_registrations", "stats", "available_events", "execution_checkpoints",
+        "idempotency_keys", "registration_queue", "collection_versions"
+    ]
+    
+    # Fecha nativa de insercion en las colecciones con politica de retencion
+    # (created_at es texto ISO y Mongo solo aplica TTL sobre fechas)
+    RETENTION_FIELD = "stored_at"
+    # Fechas de texto de las que se deriva stored_at en los documentos anteriores a el
+    RETENTION_SOURCE_FIELDS = ("created_at", "timestamp", "executed_at")
+    ARCHIVE_SUFFIX = "_archive"
+    
+    def __init__(self, mongodb_uri: str, initialize: bool = True, storage: Optional[StorageBackend] = None):
         self.agent_name = "Database"
-        self.client = MongoClient(mongodb_uri)
-        self.db = self.client.eventos_escolares
+        # Motor de almacenamiento: Mongo por defecto, "memory" para pruebas de carga sin servicios externos
+        self.storage = storage or create_storage(STORAGE_BACKEND, mongodb_uri)
         self.acp_protocol = ACPProtocol()
         
-        self.collections = {
-            "users": self.db.users,
-            "events": self.db.events,
-            "plans": self.db.plans,
-            "tasks": self.db.tasks,
-            "executions": self.db.executions,
-            "notifications": self.db.notifications,
-            "logs": self.db.logs,
-            "student_registrations": self.db.student_registrations
-        }
+        # Callbacks que reciben el nombre de la coleccion tras cada escritura
+        self.write_listeners = []
+        # Version local por coleccion: solo separa las lecturas coalescidas de este
+        # proceso; las ETags usan la version persistida en collection_versions
+        self.collection_versions = defaultdict(int)
+        self._versions_lock = threading.Lock()
+        
+        # Enrutamiento de lecturas: ultima escritura por coleccion y contadores por read preference
+        self._last_write_at = {}
+        self.read_routing = defaultdict(int)
         
-        self._initialize_collections()
+        # Lecturas puntuales identicas y concurrentes comparten una sola consulta;
+        # las que no encuentran nada se recuerdan unos segundos
+        self.read_flights = SingleFlight(copy_result=lambda response: response.model_copy(deep=True))
+        self.negative_cache = NegativeCache(NEGATIVE_CACHE_TTL_SECONDS, NEGATIVE_CACHE_MAX_ENTRIES)
+        
+        # Estado de la reconciliacion de colecciones e indices (readiness)
+        self.ready = threading.Event()
+        self.initialization_status = {"status": "pending", "attempts": 0}
+        self._stop_event = threading.Event()
+        
+        self.retention_policies = RETENTION_POLICIES
+        self.archive_metrics = defaultdict(lambda: {"archived": 0, "runs": 0, "last_run_at": None, "last_error": None})
+        
+        # MongoClient conecta en segundo plano; solo la reconciliacion hace I/O
+        if initialize:
+            self.initialize_collections()
     
-    def _initialize_collections(self):
-        existing_collections = self.db.list_collection_names()
+    def _collection(self, collection_name: str, read_preference: Optional[str] = None):
+        return self.storage.collection(collection_name, read_preference)
+    
+    def initialize_collections(self) -> Dict[str, Any]:
+        """Crear las colecciones faltantes y reconciliar los indices declarados"""
+        start_time = time.perf_counter()
+        existing_collections = self.storage.list_collection_names()
         
-        for collection_name in self.collections.keys():
+        created_collections = []
+        for collection_name in self.COLLECTIONS:
             if collection_name not in existing_collections:
-                self.db.create_collection(collection_name)
+                policy = self.retention_policies.get(collection_name, {})
+                if policy.get("mode") == "capped":
+                    self.storage.create_collection(collection_name, policy["capped_bytes"], policy.get("capped_max"))
+                else:
+                    self.storage.create_collection(collection_name)
+                created_collections.append(collection_name)
+        
+        retention_warnings = []
+        for collection_name, policy in self.retention_policies.items():
+            if policy["mode"] == "capped" and not self.storage.collection_options(collection_name).get("capped"):
+                # Convertir una coleccion existente bloquea la base: se deja a mano (convertToCapped)
+                retention_warnings.append(f"{collection_name} ya existia y no es capped")
+            if policy["mode"] == "archive" and collection_name + self.ARCHIVE_SUFFIX not in existing_collections:
+                self.storage.create_collection(collection_name + self.ARCHIVE_SUFFIX,
+                                               block_compressor=RETENTION_ARCHIVE_BLOCK_COMPRESSOR)
+                created_collections.append(collection_name + self.ARCHIVE_SUFFIX)
         
-        if "users" not in existing_collections:
-            self.collections["users"].create_index("email", unique=True)
-            self.collections["users"].create_index("role")
+        # create_index no hace nada si el indice ya existe con la misma definicion
+        index_errors = []
+        declared_indexes = dict(self.COLLECTION_INDEXES)
+        for collection_name, indexes in self._retention_indexes().items():
+            declared_indexes[collection_name] = declared_indexes.get(collection_name, []) + indexes
+        for collection_name, indexes in declared_indexes.items():
+            for keys, options in indexes:
+                try:
+                    self._collection(collection_name).create_index(keys, **options)
+                except OperationFailure as e:
+                    index_errors.append(f"{collection_name} {keys}: {e}")
         
-        if "events" not in existing_collections:
-            self.collections["events"].create_index("event_id", unique=True)
-            self.collections["events"].create_index("created_at")
+        for error in index_errors:
+            print(f"Error creando indice {error}")
+        for warning in retention_warnings:
+            print(f"Advertencia de retencion: {warning}")
         
-        if "plans" not in existing_collections:
-            self.collections["plans"].create_index("plan_id", unique=True)
-            self.collections["plans"].create_index("event_id")
+        seeded_views = self.seed_materialized_views()
+        backfilled_actions = self.backfill_execution_actions()
+        backfilled_retention = self.backfill_retention_field()
         
-        if "student_registrations" not in existing_collections:
-            self.collections["student_registrations"].create_index("registration_id", unique=True)
-            self.collections["student_registrations"].create_index("event_id")
-            self.collections["student_registrations"].create_index("student_email")
-            self.collections["student_registrations"].create_index([("event_id", 1), ("student_email", 1)], unique=True)
+        self.initialization_status.update({
+            "status": "ready",
+            "created_collections": created_collections,
+            "index_errors": index_errors,
+            "retention_warnings": retention_warnings,
+            "seeded_views": seeded_views,
+            "backfilled_actions": backfilled_actions,
+            "backfilled_retention": backfilled_retention,
+            "seconds": round(time.perf_counter() - start_time, 3)
+        })
+        self.ready.set()
+        return self.initialization_status
+    
+    def initialize_with_retry(self, retry_seconds: float = 5.0):
+        """Reconciliar colecciones e indices reintentando mientras Mongo no responda (hasta close())"""
+        while not self._stop_event.is_set():
+            self.initialization_status["attempts"] += 1
+            try:
+                self.initialize_collections()
+                return
+            except Exception as e:
+                if self._stop_event.is_set():
+                    return
+                self.initialization_status.update({"status": "retrying", "last_error": str(e)})
+                print(f"Error inicializando colecciones, reintentando en {retry_seconds}s: {e}")
+                self._stop_event.wait(retry_seconds)
     
-    def process_acp_message(self, message: Dict[str, Any]) -> ACPResponse:
+    def process_acp_message(self, message: Dict[str, Any], deadline: Optional[Deadline] = None) -> ACPResponse:
         if not self.acp_protocol.validate_message(message):
             return self.acp_protocol.create_response(
                 message_id=str(uuid.uuid4()),
@@ -68,7 +226,7 @@ class DatabaseAgent:
         operation = message.get("operation")
         collection_name = message.get("collection")
         
-        if collection_name not in self.collections:
+        if collection_name not in self.COLLECTIONS:
             return self.acp_protocol.create_response(
                 message_id=str(uuid.uuid4()),
                 request_id=message.get("message_id", ""),
@@ -77,13 +235,143 @@ class DatabaseAgent:
                 error_message=f"Collection '{collection_name}' not found"
             )
         
-        collection = self.collections[collection_name]
+        if operation == "read" and READ_SINGLE_FLIGHT_ENABLED:
+            return self._coalesced_read(message, collection_name, deadline)
+        
+        collection = self._route_collection(message, collection_name)
+        
+        if deadline is None:
+            response = self._dispatch_operation(operation, message, collection)
+        else:
+            # En Mongo acota cada operacion al tiempo restante (maxTimeMS)
+            with self.storage.timeout(deadline.db_timeout()):
+                response = self._dispatch_operation(operation, message, collection)
+        
+        if (operation in ("write", "bulk_write", "update", "delete") and response.status == "success"
+                and response.rows_affected > 0 and collection_name != "collection_versions"):
+            self._notify_write(collection_name)
+        
+        return response
+    
+    def _coalesced_read(self, message: Dict[str, Any], collection_name: str,
+                        deadline: Optional[Deadline] = None) -> ACPResponse:
+        """Lectura puntual con single-flight y cache negativo.
+        
+        La clave incluye la version de la coleccion: tras una escritura propia
+        ninguna lectura se une a una consulta anterior ni usa un "no existe"
+        previo. Las escrituras de otros procesos solo se ven al vencer el TTL.
+        """
+        key = (
+            collection_name,
+            self.collection_versions[collection_name],
+            message.get("read_preference"),
+            _freeze(message.get("query_filter", {})),
+            _freeze(message.get("projection"))
+        )
+        
+        if self.negative_cache.contains(key):
+            return self.acp_protocol.create_response(
+                message_id=str(uuid.uuid4()),
+                request_id=message.get("message_id", ""),
+                receiver=message.get("sender", ""),
+                status="success",
+                data=None
+            )
         
+        def read() -> ACPResponse:
+            collection = self._route_collection(message, collection_name)
+            if deadline is None:
+                response = self._dispatch_operation("read", message, collection)
+            else:
+                with self.storage.timeout(deadline.db_timeout()):
+                    response = self._dispatch_operation("read", message, collection)
+            if response.status == "success" and not response.data and collection_name not in self.NEGATIVE_CACHE_EXCLUDED:
+                self.negative_cache.add(key)
+            return response
+        
+        response, shared = self.read_flights.do(key, read)
+        if shared:
+            response.request_id = message.get("message_id", "")
+            response.receiver = message.get("sender", "")
+        return response
+    
+    def _route_collection(self, message: Dict[str, Any], collection_name: str):
+        """Elegir la coleccion segun la read preference pedida en el mensaje.
+        
+        Solo las operaciones read/query pueden salir del primario, y no si la
+        coleccion se escribio hace menos de MONGO_PRIMARY_AFTER_WRITE_SECONDS
+        (para no servir datos anteriores a una escritura propia reciente).
+        """
+        read_preference = message.get("read_preference")
+        if message.get("operation") not in ("read", "query") or not read_preference or read_preference == "primary":
+            self.read_routing["primary"] += 1
+            return self._collection(collection_name)
+        
+        last_write_at = self._last_write_at.get(collection_name)
+        if last_write_at is not None and time.monotonic() - last_write_at < MONGO_PRIMARY_AFTER_WRITE_SECONDS:
+            self.read_routing["primary_after_write"] += 1
+            return self._collection(collection_name)
+        
+        self.read_routing[read_preference] += 1
+        return self._collection(collection_name, read_preference)
+    
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Estadisticas del motor (pool de conexiones en Mongo) y del enrutamiento de lecturas"""
+        return {
+            **self.storage.get_stats(),
+            "read_routing": dict(self.read_routing),
+            "read_coalescing": {
+                "single_flight": self.read_flights.get_metrics(),
+                "negative_cache": self.negative_cache.get_metrics()
+            }
+        }
+    
+    def add_write_listener(self, listener: Callable[[str], None]):
+        """Registrar un callback que se invoca con la coleccion modificada"""
+        self.write_listeners.append(listener)
+    
+    def get_collection_version(self, collection_name: str) -> str:
+        """Version persistida de la coleccion, comun a todos los procesos.
+        
+        El epoch cambia si el contador se pierde (base nueva o reinicio del
+        almacenamiento en memoria), asi una version repetida no valida una ETag vieja.
+        """
+        document = self._collection("collection_versions").find_one({"collection": collection_name})
+        if not document:
+            return "0"
+        return f"{document.get('epoch', '')}.{document.get('version', 0)}"
+    
+    def _bump_persisted_version(self, collection_name: str):
+        try:
+            self._collection("collection_versions").update_many(
+                {"collection": collection_name},
+                {"$inc": {"version": 1}, "$setOnInsert": {"epoch": uuid.uuid4().hex[:8]}},
+                upsert=True
+            )
+        except Exception as e:
+            print(f"Error actualizando la version de {collection_name}: {e}")
+    
+    def _notify_write(self, collection_name: str):
+        with self._versions_lock:
+            self.collection_versions[collection_name] += 1
+        self._last_write_at[collection_name] = time.monotonic()
+        for listener in self.write_listeners:
+            try:
+                listener(collection_name)
+            except Exception as e:
+                print(f"Error en listener de escritura: {e}")
+        # Despues de invalidar los caches locales: una lectura con la version nueva
+        # nunca encuentra un cuerpo anterior a la escritura
+        self._bump_persisted_version(collection_name)
+    
+    def _dispatch_operation(self, operation: str, message: Dict[str, Any], collection) -> ACPResponse:
         try:
             if operation == "read":
                 return self._handle_read(message, collection)
             elif operation == "write":
                 return self._handle_write(message, collection)
+            elif operation == "bulk_write":
+                return self._handle_bulk_write(message, collection)
             elif operation == "update":
                 return self._handle_update(message, collection)
             elif operation == "delete":
@@ -138,22 +426,54 @@ class DatabaseAgent:
             )
         
         data["created_at"] = datetime.now().isoformat()
-        result = collection.insert_one(data)
+        if collection.name in self.retention_policies:
+            data[self.RETENTION_FIELD] = datetime.utcnow()
+        inserted_id = collection.insert_one(data)
         
         return self.acp_protocol.create_response(
             message_id=str(uuid.uuid4()),
             request_id=message.get("message_id", ""),
             receiver=message.get("sender", ""),
             status="success",
-            data={"inserted_id": str(result.inserted_id)},
+            data={"inserted_id": str(inserted_id)},
             rows_affected=1
         )
     
+    def _handle_bulk_write(self, message: Dict[str, Any], collection) -> ACPResponse:
+        documents = message.get("documents") or []
+        
+        if not documents:
+            return self.acp_protocol.create_response(
+                message_id=str(uuid.uuid4()),
+                request_id=message.get("message_id", ""),
+                receiver=message.get("sender", ""),
+                status="error",
+                error_message="No documents provided for bulk_write operation"
+            )
+        
+        created_at = datetime.now().isoformat()
+        stored_at = datetime.utcnow() if collection.name in self.retention_policies else None
+        for document in documents:
+            document["created_at"] = created_at
+            if stored_at:
+                document[self.RETENTION_FIELD] = stored_at
+        inserted_count = collection.insert_many(documents)
+        
+        return self.acp_protocol.create_response(
+            message_id=str(uuid.uuid4()),
+            request_id=message.get("message_id", ""),
+            receiver=message.get("sender", ""),
+            status="success",
+            data={"inserted_count": inserted_count},
+            rows_affected=inserted_count
+        )
+    
     def _handle_update(self, message: Dict[str, Any], collection) -> ACPResponse:
         query_filter = message.get("query_filter", {})
-        update_data = message.get("update_data", {})
+        update_data = message.get("update_data") or {}
+        increment_data = message.get("increment_data") or {}
         
-        if not update_data:
+        if not update_data and not increment_data:
             return self.acp_protocol.create_response(
                 message_id=str(uuid.uuid4()),
                 request_id=message.get("message_id", ""),
@@ -163,15 +483,25 @@ class DatabaseAgent:
             )
         
         update_data["updated_at"] = datetime.now().isoformat()
-        result = collection.update_many(query_filter, {"$set": update_data})
+        update_doc = {"$set": update_data}
+        if increment_data:
+            # $inc es atomico a nivel de documento: contadores sin leer-modificar-escribir
+            update_doc["$inc"] = increment_data
+        
+        result = collection.update_many(query_filter, update_doc, upsert=message.get("upsert", False))
+        upserted = 1 if result.upserted_id is not None else 0
         
         return self.acp_protocol.create_response(
             message_id=str(uuid.uuid4()),
             request_id=message.get("message_id", ""),
             receiver=message.get("sender", ""),
             status="success",
-            data={"matched_count": result.matched_count, "modified_count": result.modified_count},
-            rows_affected=result.modified_count
+            data={
+                "matched_count": result.matched_count,
+                "modified_count": result.modified_count,
+                "upserted": bool(upserted)
+            },
+            rows_affected=result.modified_count + upserted
         )
     
     def _handle_delete(self, message: Dict[str, Any], collection) -> ACPResponse:
@@ -186,15 +516,15 @@ class DatabaseAgent:
                 error_message="No query filter provided for delete operation"
             )
         
-        result = collection.delete_many(query_filter)
+        deleted_count = collection.delete_many(query_filter)
         
         return self.acp_protocol.create_response(
             message_id=str(uuid.uuid4()),
             request_id=message.get("message_id", ""),
             receiver=message.get("sender", ""),
             status="success",
-            data={"deleted_count": result.deleted_count},
-            rows_affected=result.deleted_count
+            data={"deleted_count": deleted_count},
+            rows_affected=deleted_count
         )
     
     def _handle_query(self, message: Dict[str, Any], collection) -> ACPResponse:
@@ -202,15 +532,7 @@ class DatabaseAgent:
         sort = message.get("sort")
         limit = message.get("limit")
         
-        cursor = collection.find(query_filter)
-        
-        if sort:
-            cursor = cursor.sort(list(sort.items()))
-        
-        if limit:
-            cursor = cursor.limit(limit)
-        
-        results = list(cursor)
+        results = collection.find(query_filter, message.get("projection"), sort=sort, limit=limit)
         
         for result in results:
             if "_id" in result:
@@ -225,6 +547,122 @@ class DatabaseAgent:
             rows_affected=len(results)
         )
     
+    def seed_materialized_views(self) -> List[str]:
+        """Construir desde los datos reales las vistas materializadas que aun no existen.
+        
+        En una base anterior a las vistas, el primer $inc no debe crear un
+        documento con solo los contadores incrementados.
+        """
+        seeded = []
+        if not self._collection("stats").find_one({"stat_id": "dashboard"}):
+            self.rebuild_dashboard_stats()
+            seeded.append("stats")
+        if not self._collection("available_events").find_one({}):
+            self.rebuild_available_events()
+            seeded.append("available_events")
+        return seeded
+    
+    def rebuild_dashboard_stats(self) -> Dict[str, Any]:
+        """Reconstruir desde cero los contadores del documento de estadisticas"""
+        # Solo cuentan como eventos los documentos creados por create_plan
+        # (la coleccion events tambien recibe registros de asistencia)
+        stats = {
+            "total_events": self._collection("events").count_documents(
+                {"available_for_registration": {"$exists": True}}
+            ),
+            "available_events": self._collection("events").count_documents(
+                {"status": "completed", "available_for_registration": True}
+            ),
+            "total_registrations": self._collection("student_registrations").count_documents({}),
+            "rebuilt_at": datetime.now().isoformat()
+        }
+        
+        self._collection("stats").update_many(
+            {"stat_id": "dashboard"},
+            {"$set": stats},
+            upsert=True
+        )
+        self._notify_write("stats")
+        
+        return {"stat_id": "dashboard", **stats}
+    
+    @classmethod
+    def build_available_event_view(cls, event: Dict[str, Any], current_registrations: int) -> Dict[str, Any]:
+        """Documento de la proyeccion available_events para un evento"""
+        max_capacity = event.get("expected_attendees", 0)
+        view = {field: event.get(field) for field in cls.AVAILABLE_EVENT_FIELDS}
+        view["current_registrations"] = current_registrations
+        view["available_spots"] = max(0, max_capacity - current_registrations)
+        view["is_full"] = current_registrations >= max_capacity
+        return view
+    
+    def rebuild_available_events(self) -> Dict[str, Any]:
+        """Reconstruir la proyeccion de eventos disponibles.
+        
+        Upsert por evento en lugar de vaciar y reinsertar: la vista nunca queda
+        vacia durante la reconstruccion y cada evento solo se pisa un instante.
+        """
+        events = list(self._collection("events").find(
+            {"status": "completed", "available_for_registration": True},
+            {"_id": 0}
+        ))
+        
+        counts = self._collection("student_registrations").count_by("event_id")
+        
+        views = [self.build_available_event_view(event, counts.get(event.get("event_id"), 0)) for event in events]
+        
+        available_events = self._collection("available_events")
+        for view in views:
+            available_events.update_many({"event_id": view["event_id"]}, {"$set": view}, upsert=True)
+        # Eventos que dejaron de estar disponibles
+        available_events.delete_many({"event_id": {"$nin": [view["event_id"] for view in views]}})
+        self._notify_write("available_events")
+        
+        return {"available_events": len(views), "rebuilt_at": datetime.now().isoformat()}
+    
+    def get_task_duration_stats(self) -> Dict[str, Dict[str, float]]:
+        """Media de execution_time de las tareas exitosas y no simuladas, por parameters.action"""
+        return self._collection("executions").average_by(
+            "action", "execution_time",
+            {"status": "success", "action": {"$ne": None}, "fallback": {"$ne": True}}
+        )
+    
+    def backfill_execution_actions(self) -> int:
+        """Completar el campo action de las ejecuciones anteriores a el, desde las tareas del plan.
+        
+        Las ejecuciones cuyo plan o tarea ya no existe quedan con action None
+        para no volver a revisarlas.
+        """
+        executions = self._collection("executions")
+        missing = executions.find({"action": {"$exists": False}}, {"_id": 0, "plan_id": 1, "task_id": 1})
+        task_ids_by_plan = defaultdict(set)
+        for execution in missing:
+            task_ids_by_plan[execution.get("plan_id")].add(execution.get("task_id"))
+        
+        updated = 0
+        for plan_id, task_ids in task_ids_by_plan.items():
+            plan = self._collection("plans").find_one({"plan_id": plan_id}, {"_id": 0, "tasks": 1}) if plan_id else None
+            task_ids_by_action = defaultdict(list)
+            for task in (plan or {}).get("tasks", []):
+                if task.get("task_id") in task_ids:
+                    task_ids_by_action[task.get("parameters", {}).get("action")].append(task["task_id"])
+            
+            for action, action_task_ids in task_ids_by_action.items():
+                result = executions.update_many(
+                    {"plan_id": plan_id, "task_id": {"$in": action_task_ids}, "action": {"$exists": False}},
+                    {"$set": {"action": action}}
+                )
+                updated += result.modified_count
+            result = executions.update_many(
+                {"plan_id": plan_id, "action": {"$exists": False}},
+                {"$set": {"action": None}}
+            )
+            updated += result.modified_count
+        
+        if updated:
+            self._notify_write("executions")
+        return updated
+    
     def log_action(self, agent_name: str, action: str, details: Dict[str, Any]):
         log_entry = {
             "agent": agent_name,
@@ -232,7 +670,153 @@ class DatabaseAgent:
             "details": details,
             "timestamp": datetime.now().isoformat()
         }
-        self.collections["logs"].insert_one(log_entry)
+        if "logs" in self.retention_policies:
+            log_entry[self.RETENTION_FIELD] = datetime.utcnow()
+        self._collection("logs").insert_one(log_entry)
+    
+    def _retention_indexes(self) -> Dict[str, List]:
+        """Indices TTL de las politicas "ttl" y "archive" (en "archive" es el respaldo si el job no corre)"""
+        indexes = {}
+        for collection_name, policy in self.retention_policies.items():
+            if policy["mode"] == "ttl":
+                days = policy["days"]
+            elif policy["mode"] == "archive":
+                days = policy["days"] + RETENTION_ARCHIVE_GRACE_DAYS
+            else:
+                continue
+            indexes[collection_name] = [(self.RETENTION_FIELD, {"expire_after_seconds": int(days * 86400)})]
+        return indexes
+    
+    def _retention_date(self, document: Dict[str, Any]) -> datetime:
+        """stored_at (UTC) de un documento anterior a el, desde su fecha ISO local; si no tiene, ahora"""
+        for field in self.RETENTION_SOURCE_FIELDS:
+            value = document.get(field)
+            if not isinstance(value, str):
+                continue
+            try:
+                parsed = datetime.fromisoformat(value)
+            except ValueError:
+                continue
+            return parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        return datetime.utcnow()
+    
+    def backfill_retention_field(self) -> Dict[str, int]:
+        """Fijar stored_at en los documentos que existian antes de las politicas de retencion.
+        
+        Sin el campo ni el indice TTL ni el job de archivo los alcanzan y quedan para siempre.
+        """
+        backfilled = {}
+        for collection_name, policy in self.retention_policies.items():
+            if policy["mode"] == "capped":
+                continue
+            collection = self._collection(collection_name)
+            projection = {"_id": 1, **{field: 1 for field in self.RETENTION_SOURCE_FIELDS}}
+            total = 0
+            while not self._stop_event.is_set():
+                documents = collection.find({self.RETENTION_FIELD: {"$exists": False}}, projection,
+                                            limit=RETENTION_ARCHIVE_BATCH_SIZE)
+                if not documents:
+                    break
+                for document in documents:
+                    collection.update_many({"_id": document["_id"]},
+                                           {"$set": {self.RETENTION_FIELD: self._retention_date(document)}})
+                total += len(documents)
+                if len(documents) < RETENTION_ARCHIVE_BATCH_SIZE:
+                    break
+            if total:
+                print(f"stored_at completado en {total} documentos de {collection_name}")
+            backfilled[collection_name] = total
+        return backfilled
+    
+    def archive_expired(self) -> Dict[str, int]:
+        """Mover a <coleccion>_archive los documentos vencidos de las politicas "archive".
+        
+        Por lotes: insertar en el archivo y luego borrar de la coleccion. Si el
+        proceso cae entre ambos pasos, la siguiente corrida no duplica los que
+        ya estaban archivados y solo los borra.
+        """
+        archived = {}
+        for collection_name, policy in self.retention_policies.items():
+            if policy["mode"] != "archive":
+                continue
+            metrics = self.archive_metrics[collection_name]
+            metrics["runs"] += 1
+            metrics["last_run_at"] = datetime.now().isoformat()
+            archived[collection_name] = 0
+            try:
+                archived[collection_name] = self._archive_collection(collection_name, policy["days"])
+                metrics["last_error"] = None
+            except Exception as e:
+                metrics["last_error"] = str(e)
+                print(f"Error archivando {collection_name}: {e}")
+            metrics["archived"] += archived[collection_name]
+        return archived
+    
+    def _archive_collection(self, collection_name: str, days: float) -> int:
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        hot = self._collection(collection_name)
+        archive = self._collection(collection_name + self.ARCHIVE_SUFFIX)
+        total = 0
+        while not self._stop_event.is_set():
+            documents = hot.find(
+                {self.RETENTION_FIELD: {"$lt": cutoff}},
+                sort=[(self.RETENTION_FIELD, 1)],
+                limit=RETENTION_ARCHIVE_BATCH_SIZE
+            )
+            if not documents:
+                break
+            ids = [document["_id"] for document in documents]
+            already_archived = {document["_id"] for document in archive.find({"_id": {"$in": ids}}, projection={"_id": 1})}
+            archived_at = datetime.utcnow()
+            pending = [{**document, "archived_at": archived_at} for document in documents
+                       if document["_id"] not in already_archived]
+            if pending:
+                archive.insert_many(pending)
+            hot.delete_many({"_id": {"$in": ids}})
+            total += len(documents)
+            if len(documents) < RETENTION_ARCHIVE_BATCH_SIZE:
+                break
+        return total
+    
+    def start_archiver(self, interval_seconds: float) -> Optional[threading.Thread]:
+        """Job periodico de archivo (hasta close()); None si ninguna politica archiva"""
+        if not any(policy["mode"] == "archive" for policy in self.retention_policies.values()):
+            return None
+        
+        def run():
+            while not self._stop_event.wait(interval_seconds):
+                self.archive_expired()
+        
+        thread = threading.Thread(target=run, name="retention-archiver", daemon=True)
+        thread.start()
+        return thread
+    
+    def get_retention_status(self) -> Dict[str, Any]:
+        collections = {}
+        for collection_name, policy in self.retention_policies.items():
+            status = {
+                **policy,
+                "documents": self._collection(collection_name).count_documents({})
+            }
+            if policy["mode"] == "archive":
+                status["archived_documents"] = self._collection(collection_name + self.ARCHIVE_SUFFIX).count_documents({})
+                status["archiver"] = dict(self.archive_metrics[collection_name])
+            collections[collection_name] = status
+        return {
+            "retention_field": self.RETENTION_FIELD,
+            "archive_grace_days": RETENTION_ARCHIVE_GRACE_DAYS,
+            "collections": collections
+        }
     
     def close(self):
-        self.client.close()
+        self._stop_event.set()
+        self.storage.close()
+
+
+def _freeze(value: Any) -> Any:
+    """Version hashable de un filtro o proyeccion, para usarlo como clave"""
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
@@ -1,4 +1,7 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Callable
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import threading
+import socket
 import uuid
 import json
 import time
@@ -11,6 +14,87 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from protocols.anp import ANPProtocol, ANPTask
 from protocols.a2a import A2AProtocol
 from protocols.acp import ACPProtocol
+from utils.circuit_breaker import gemini_breaker
+from utils.deadline import Deadline, DeadlineExceeded
+from utils.llm import LazyLLM
+from utils.scheduler import TaskDurationEstimator, CriticalPathScheduler
+from utils.transport import Transport, TransportError, RemoteAgentError
+from config.settings import (
+    TASK_MAX_PARALLEL,
+    TASK_DURATION_STATS_TTL_SECONDS,
+    TASK_DEFAULT_DURATION_SECONDS,
+    EXECUTION_LEASE_SECONDS,
+    TRANSPORT_TIMEOUT_SECONDS
+)
+
+
+class LeaseLost(Exception):
+    """Otro proceso tomo la ejecucion: el lease del checkpoint vencio"""
+    pass
+
+
+class EarlyExecution:
+    """Tareas de un plan que se ejecutan mientras el plan aun se genera.
+
+    Una tarea arranca en cuanto llega si todas sus dependencias ya
+    terminaron con exito; las demas quedan para la ejecucion normal.
+    """
+
+    def __init__(self, agent: "ExecutionAgent", plan_id: str, database_agent: Any = None,
+                 deadline: Optional[Deadline] = None):
+        self.agent = agent
+        self.plan_id = plan_id
+        self.database_agent = database_agent
+        self.deadline = deadline
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self._waiting: List[Dict[str, Any]] = []
+        self._futures = []
+        self._finished: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def add_task(self, task: Dict[str, Any]):
+        with self._lock:
+            self._waiting.append(task)
+            self._start_ready()
+
+    def _start_ready(self):
+        for task in list(self._waiting):
+            dependencies = task.get("dependencies", [])
+            if all(self.results.get(dep, {}).get("status") == "success" for dep in dependencies):
+                self._waiting.remove(task)
+                self._futures.append(self.agent._task_executor.submit(self._run, task))
+
+    def _run(self, task: Dict[str, Any]) -> Dict[str, Any]:
+        result = self.agent._run_task(self.plan_id, task, self.deadline)
+        if self.database_agent:
+            self.agent._save_task_result(self.database_agent, self.plan_id, result, self.deadline,
+                                         action=task.get("parameters", {}).get("action"))
+        with self._lock:
+            self.results[task["task_id"]] = result
+            self._finished.append(result)
+            self._start_ready()
+        return result
+
+    def drain(self) -> List[Dict[str, Any]]:
+        """Resultados terminados desde la ultima llamada"""
+        with self._lock:
+            finished, self._finished = self._finished, []
+        return finished
+
+    def finish(self) -> Dict[str, Dict[str, Any]]:
+        """Esperar las tareas en curso (hasta el deadline) y devolver los resultados exitosos"""
+        while True:
+            with self._lock:
+                pending = [future for future in self._futures if not future.done()]
+            if not pending:
+                break
+            timeout = self.deadline.remaining() if self.deadline else None
+            if timeout is not None and timeout <= 0:
+                break
+            wait(pending, timeout=timeout)
+        with self._lock:
+            return {task_id: result for task_id, result in self.results.items()
+                    if result.get("status") == "success"}
 
 
 class ExecutionAgent:
@@ -18,28 +102,34 @@ class ExecutionAgent:
         self.agent_name = "Ejecutor"
         self.api_key = api_key
         self.model_name = model_name
-        self.llm = None
-        
-        # Intentar inicializar Gemini, pero no fallar si no se puede
-        if api_key:
-            try:
-                from langchain_google_genai import ChatGoogleGenerativeAI
-                self.llm = ChatGoogleGenerativeAI(
-                    model=model_name,
-                    google_api_key=api_key,
-                    temperature=0.5
-                )
-            except Exception as e:
-                print(f"Advertencia: No se pudo inicializar Gemini: {e}")
-                print("Se usara modo de simulacion")
+        # Gemini se inicializa en el primer uso (ver la propiedad llm)
+        self._llm_loader = LazyLLM(
+            api_key, model_name, temperature=0.5,
+            fallback_message="Se usara modo de simulacion"
+        )
         
         self.anp_protocol = ANPProtocol()
         self.a2a_protocol = A2AProtocol()
         self.acp_protocol = ACPProtocol()
         self.execution_history = {}
         self.current_executions = {}
+        self.circuit_breaker = gemini_breaker
+        self.duration_estimator = TaskDurationEstimator(TASK_DURATION_STATS_TTL_SECONDS, TASK_DEFAULT_DURATION_SECONDS)
+        # Compartido entre planes: acota las tareas simultaneas de todo el proceso
+        self._task_executor = ThreadPoolExecutor(max_workers=TASK_MAX_PARALLEL, thread_name_prefix="task-exec")
+        # Duenio de los leases de checkpoint tomados por este proceso
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._reaper_stop = threading.Event()
+        # Sin transporte las tareas corren aqui; con uno, en los procesos worker
+        self.task_transport: Optional[Transport] = None
+    
+    @property
+    def llm(self):
+        return self._llm_loader.get()
     
-    def receive_tasks(self, anp_message: Dict[str, Any]) -> Dict[str, Any]:
+    def receive_tasks(self, anp_message: Dict[str, Any],
+                      completed_results: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Registrar las tareas de un plan; completed_results son resultados ya obtenidos que no se repiten"""
         if not self.anp_protocol.validate_message(anp_message):
             return {"error": "Invalid ANP message"}
         
@@ -55,7 +145,8 @@ class ExecutionAgent:
             "execution_mode": execution_mode,
             "status": "received",
             "received_at": datetime.now().isoformat(),
-            "results": []
+            "results": list((completed_results or {}).values()),
+            "completed_results": dict(completed_results or {})
         }
         
         self.current_executions[execution_id] = execution_record
@@ -66,48 +157,355 @@ class ExecutionAgent:
             "message": f"Received {len(tasks)} tasks for execution"
         }
     
-    def execute_tasks(self, execution_id: str, database_agent: Any = None) -> List[Dict[str, Any]]:
+    def execute_tasks(self, execution_id: str, database_agent: Any = None,
+                      deadline: Optional[Deadline] = None) -> List[Dict[str, Any]]:
         if execution_id not in self.current_executions:
             return [{"error": "Execution not found"}]
         
         execution = self.current_executions[execution_id]
-        tasks = execution["tasks"]
-        results = []
+        tasks = [task.model_dump() if isinstance(task, ANPTask) else task for task in execution["tasks"]]
         
         execution["status"] = "executing"
         execution["started_at"] = datetime.now().isoformat()
         
-        for task in tasks:
-            task_obj = ANPTask(**task) if isinstance(task, dict) else task
-            result = self._execute_single_task(task_obj)
-            results.append(result)
+        scheduler = self._build_scheduler(tasks, database_agent)
+        execution["estimated_critical_path_seconds"] = round(scheduler.critical_path_seconds(), 3)
+        
+        if database_agent and not execution.get("checkpointed"):
+            self._create_checkpoint(database_agent, execution, deadline)
+        
+        # Ejecucion reanudada o replanificada: las tareas ya completadas no se repiten
+        results_by_task = dict(execution.get("completed_results", {}))
+        for task_id in results_by_task:
+            scheduler.start(task_id)
+            scheduler.finish(task_id)
+        
+        def run_task(task: Dict[str, Any]) -> Dict[str, Any]:
+            result = self._run_task(execution["plan_id"], task, deadline)
             execution["results"].append(result)
-            
             if database_agent:
-                self._save_task_result(database_agent, execution["plan_id"], result)
+                self._save_task_result(database_agent, execution["plan_id"], result, deadline,
+                                       action=task.get("parameters", {}).get("action"))
+                self._checkpoint_task(database_agent, execution, task["task_id"], result, deadline)
+            return result
+        
+        running = {}
+        try:
+            if execution.get("execution_mode") == "parallel":
+                while scheduler.has_pending() or running:
+                    # Lanzar las tareas listas mas urgentes; el pool limita cuantas corren a la vez
+                    for task in scheduler.ready():
+                        scheduler.start(task["task_id"])
+                        running[self._task_executor.submit(run_task, task)] = task["task_id"]
+                    
+                    done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                    for future in done:
+                        task_id = running.pop(future)
+                        results_by_task[task_id] = future.result()
+                        scheduler.finish(task_id)
+            else:
+                while scheduler.has_pending():
+                    task = scheduler.ready()[0]
+                    scheduler.start(task["task_id"])
+                    results_by_task[task["task_id"]] = run_task(task)
+                    scheduler.finish(task["task_id"])
+        except LeaseLost:
+            raise
+        except Exception:
+            # Dejar que las tareas en curso guarden su checkpoint y liberar el lease
+            # para que un reintento reanude sin esperar a que venza
+            wait(list(running))
+            if database_agent:
+                self._release_checkpoint(database_agent, execution, deadline)
+            raise
+        
+        # Resultados en el orden del plan, independientemente del orden de ejecucion
+        results = [results_by_task[task["task_id"]] for task in tasks]
         
         execution["status"] = "completed"
         execution["completed_at"] = datetime.now().isoformat()
         self.execution_history[execution_id] = execution
         
+        if database_agent:
+            self._complete_checkpoint(database_agent, execution, deadline)
+        
         return results
     
-    def _execute_single_task(self, task: ANPTask) -> Dict[str, Any]:
+    def _update_checkpoint(self, database_agent: Any, query_filter: Dict[str, Any], update_data: Dict[str, Any],
+                           deadline: Optional[Deadline] = None, increment_data: Optional[Dict[str, Any]] = None):
+        acp_update = self.acp_protocol.create_update_request(
+            message_id=str(uuid.uuid4()),
+            sender=self.agent_name,
+            collection="execution_checkpoints",
+            query_filter=query_filter,
+            update_data=update_data,
+            increment_data=increment_data
+        )
+        return database_agent.process_acp_message(acp_update.model_dump(), deadline)
+    
+    def _create_checkpoint(self, database_agent: Any, execution: Dict[str, Any], deadline: Optional[Deadline] = None):
+        """Guardar el checkpoint durable de la ejecucion con el lease de este proceso"""
+        acp_message = self.acp_protocol.create_write_request(
+            message_id=str(uuid.uuid4()),
+            sender=self.agent_name,
+            collection="execution_checkpoints",
+            data={
+                "execution_id": execution["execution_id"],
+                "plan_id": execution["plan_id"],
+                "tasks": [task.model_dump() if isinstance(task, ANPTask) else task for task in execution["tasks"]],
+                "execution_mode": execution.get("execution_mode", "sequential"),
+                "status": "running",
+                "results": dict(execution.get("completed_results", {})),
+                "lease_owner": self.worker_id,
+                "lease_expires_at": time.time() + EXECUTION_LEASE_SECONDS,
+                "attempts": 1
+            }
+        )
+        response = database_agent.process_acp_message(acp_message.model_dump(), deadline)
+        if response.status != "success":
+            print(f"Advertencia: No se pudo guardar el checkpoint de {execution['execution_id']}: {response.error_message}")
+        execution["checkpointed"] = True
+    
+    def _checkpoint_task(self, database_agent: Any, execution: Dict[str, Any], task_id: str,
+                         result: Dict[str, Any], deadline: Optional[Deadline] = None):
+        """Registrar una tarea completada y renovar el lease; falla si otro proceso lo tomo"""
+        response = self._update_checkpoint(
+            database_agent,
+            {"execution_id": execution["execution_id"], "lease_owner": self.worker_id},
+            {f"results.{task_id}": result, "lease_expires_at": time.time() + EXECUTION_LEASE_SECONDS},
+            deadline
+        )
+        if response.status != "success":
+            # Sin checkpoint la tarea se repetiria al reanudar, pero la ejecucion sigue
+            print(f"Advertencia: No se pudo actualizar el checkpoint de {execution['execution_id']}: {response.error_message}")
+        elif response.data["matched_count"] == 0:
+            raise LeaseLost(f"Execution {execution['execution_id']} was taken over by another worker")
+    
+    def _release_checkpoint(self, database_agent: Any, execution: Dict[str, Any], deadline: Optional[Deadline] = None):
+        self._update_checkpoint(
+            database_agent,
+            {"execution_id": execution["execution_id"], "lease_owner": self.worker_id},
+            {"lease_owner": None, "lease_expires_at": 0},
+            deadline
+        )
+    
+    def _complete_checkpoint(self, database_agent: Any, execution: Dict[str, Any], deadline: Optional[Deadline] = None):
+        self._update_checkpoint(
+            database_agent,
+            {"execution_id": execution["execution_id"], "lease_owner": self.worker_id},
+            {"status": "completed", "completed_at": execution["completed_at"],
+             "lease_owner": None, "lease_expires_at": None},
+            deadline
+        )
+    
+    def find_active_execution(self, database_agent: Any, plan_id: str,
+                              deadline: Optional[Deadline] = None) -> Optional[Dict[str, Any]]:
+        """Checkpoint en curso del plan con el lease vigente (otra solicitud lo esta ejecutando)"""
+        acp_read = self.acp_protocol.create_read_request(
+            message_id=str(uuid.uuid4()),
+            sender=self.agent_name,
+            collection="execution_checkpoints",
+            query_filter={"plan_id": plan_id, "status": "running", "lease_expires_at": {"$gte": time.time()}},
+            projection={"_id": 0, "execution_id": 1, "lease_owner": 1, "lease_expires_at": 1}
+        )
+        response = database_agent.process_acp_message(acp_read.model_dump(), deadline)
+        return response.data if response.status == "success" else None
+    
+    def get_last_completed_results(self, database_agent: Any, plan_id: str,
+                                   deadline: Optional[Deadline] = None) -> Dict[str, Dict[str, Any]]:
+        """Resultados por task_id de la ultima ejecucion completada del plan"""
+        acp_query = self.acp_protocol.create_query_request(
+            message_id=str(uuid.uuid4()),
+            sender=self.agent_name,
+            collection="execution_checkpoints",
+            query_filter={"plan_id": plan_id, "status": "completed"},
+            sort={"completed_at": -1},
+            limit=1,
+            projection={"_id": 0, "results": 1}
+        )
+        response = database_agent.process_acp_message(acp_query.model_dump(), deadline)
+        if response.status != "success" or not response.data:
+            return {}
+        return response.data[0].get("results") or {}
+    
+    def claim_execution(self, database_agent: Any, plan_id: Optional[str] = None,
+                        deadline: Optional[Deadline] = None) -> Optional[str]:
+        """Tomar el lease de una ejecucion abandonada (lease vencido) y cargarla para reanudarla"""
+        query_filter = {"status": "running", "lease_expires_at": {"$lt": time.time()}}
+        if plan_id:
+            query_filter["plan_id"] = plan_id
+        
+        acp_query = self.acp_protocol.create_query_request(
+            message_id=str(uuid.uuid4()),
+            sender=self.agent_name,
+            collection="execution_checkpoints",
+            query_filter=query_filter,
+            sort={"lease_expires_at": 1},
+            limit=5,
+            projection={"_id": 0}
+        )
+        response = database_agent.process_acp_message(acp_query.model_dump(), deadline)
+        if response.status != "success":
+            return None
+        
+        for checkpoint in response.data:
+            # El filtro con el lease vencido hace la toma atomica frente a otros procesos
+            claimed = self._update_checkpoint(
+                database_agent,
+                {"execution_id": checkpoint["execution_id"], "status": "running",
+                 "lease_expires_at": {"$lt": time.time()}},
+                {"lease_owner": self.worker_id, "lease_expires_at": time.time() + EXECUTION_LEASE_SECONDS},
+                deadline,
+                increment_data={"attempts": 1}
+            )
+            if claimed.status != "success" or claimed.data["matched_count"] == 0:
+                continue
+            
+            completed_results = checkpoint.get("results") or {}
+            self.current_executions[checkpoint["execution_id"]] = {
+                "execution_id": checkpoint["execution_id"],
+                "plan_id": checkpoint["plan_id"],
+                "tasks": checkpoint["tasks"],
+                "execution_mode": checkpoint.get("execution_mode", "sequential"),
+                "status": "received",
+                "received_at": datetime.now().isoformat(),
+                "resumed_at": datetime.now().isoformat(),
+                "results": list(completed_results.values()),
+                "completed_results": completed_results,
+                "checkpointed": True
+            }
+            print(f"Reanudando ejecucion {checkpoint['execution_id']}: {len(completed_results)}/{len(checkpoint['tasks'])} tareas completadas")
+            return checkpoint["execution_id"]
+        
+        return None
+    
+    def reap_abandoned_executions(self, database_agent: Any,
+                                  on_complete: Callable[[Dict[str, Any], List[Dict[str, Any]]], None]) -> int:
+        """Reanudar las ejecuciones cuyo lease vencio (proceso caido o solicitud abortada)"""
+        resumed = 0
+        while not self._reaper_stop.is_set():
+            execution_id = self.claim_execution(database_agent)
+            if execution_id is None:
+                break
+            try:
+                results = self.execute_tasks(execution_id, database_agent, Deadline.for_endpoint("execute_plan"))
+                on_complete(self.current_executions[execution_id], results)
+            except Exception as e:
+                print(f"Error reanudando la ejecucion {execution_id}: {e}")
+            resumed += 1
+        return resumed
+    
+    def start_reaper(self, database_agent: Any, on_complete: Callable[[Dict[str, Any], List[Dict[str, Any]]], None],
+                     interval_seconds: float) -> threading.Thread:
+        def run():
+            while not self._reaper_stop.wait(interval_seconds):
+                try:
+                    self.reap_abandoned_executions(database_agent, on_complete)
+                except Exception as e:
+                    print(f"Error en el reaper de ejecuciones: {e}")
+        
+        thread = threading.Thread(target=run, name="execution-reaper", daemon=True)
+        thread.start()
+        return thread
+    
+    def close(self):
+        self._reaper_stop.set()
+        if self.task_transport is not None:
+            self.task_transport.close()
+    
+    def _build_scheduler(self, tasks: List[Dict[str, Any]], database_agent: Any = None) -> CriticalPathScheduler:
+        """Scheduler por camino critico con duraciones historicas por parameters.action"""
+        if database_agent:
+            self.duration_estimator.refresh(database_agent.get_task_duration_stats)
+        durations = {
+            task["task_id"]: self.duration_estimator.estimate(task.get("parameters", {}).get("action"))
+            for task in tasks
+        }
+        return CriticalPathScheduler(tasks, durations)
+    
+    def start_early_execution(self, plan_id: str, database_agent: Any = None,
+                              deadline: Optional[Deadline] = None) -> EarlyExecution:
+        return EarlyExecution(self, plan_id, database_agent, deadline)
+    
+    def set_task_transport(self, transport: Optional[Transport]):
+        """Enviar cada tarea como ANP task_assignment por el transporte (None: ejecutar en este proceso)"""
+        self.task_transport = transport
+    
+    def _run_task(self, plan_id: str, task: Dict[str, Any], deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        if self.task_transport is None:
+            return self._execute_single_task(ANPTask(**task), deadline)
+        
         start_time = time.time()
+        anp_task = ANPTask(**task)
+        if deadline and deadline.expired():
+            return self._create_fallback_result(anp_task, 0.0)
         
-        # Intentar usar Gemini si esta disponible, sino usar fallback
-        if self.llm:
+        assignment = self.anp_protocol.create_task_assignment(
+            message_id=str(uuid.uuid4()),
+            sender=self.agent_name,
+            receiver=self.agent_name,
+            plan_id=plan_id,
+            tasks=[anp_task]
+        )
+        try:
+            response = self.task_transport.request(
+                assignment.model_dump(),
+                deadline.remaining() if deadline else TRANSPORT_TIMEOUT_SECONDS
+            )
+            return response["results"][0]
+        except (TransportError, RemoteAgentError) as e:
+            # Sin worker disponible: resultado determinista, como sin Gemini
+            print(f"Error enviando la tarea al worker, usando fallback: {e}")
+            return self._create_fallback_result(anp_task, time.time() - start_time)
+    
+    def handle_anp_message(self, message: Dict[str, Any], deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Ejecutar un task_assignment recibido por el transporte (lado del proceso worker)"""
+        if not self.anp_protocol.validate_message(message) or message.get("message_type") != "task_assignment":
+            raise ValueError("Invalid ANP message")
+        
+        tasks = [ANPTask(**task) for task in message.get("tasks", [])]
+        return {
+            "plan_id": message.get("plan_id"),
+            "results": [self._execute_single_task(task, deadline) for task in tasks]
+        }
+    
+    def _execute_single_task(self, task: ANPTask, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        start_time = time.time()
+        
+        # Si el presupuesto de la solicitud se agoto, resultado determinista sin esperar a Gemini
+        if deadline and deadline.expired():
+            return self._create_fallback_result(task, 0.0)
+        
+        # Intentar usar Gemini si esta disponible y el circuit breaker lo permite, sino usar fallback
+        if self.llm and self.circuit_breaker.allow_request():
             try:
-                return self._execute_with_ai(task, start_time)
+                return self._execute_with_ai(task, start_time, deadline)
             except Exception as e:
                 print(f"Error con Gemini, usando fallback: {e}")
                 # Si Gemini falla, usar fallback
                 return self._create_fallback_result(task, time.time() - start_time)
         else:
-            # Si no hay Gemini, usar fallback directamente
+            # Si no hay Gemini o el proveedor esta degradado, usar fallback directamente
             return self._create_fallback_result(task, time.time() - start_time)
     
-    def _execute_with_ai(self, task: ANPTask, start_time: float) -> Dict[str, Any]:
+    def _invoke_llm(self, prompt: str, deadline: Optional[Deadline] = None):
+        """Invocar Gemini registrando el resultado en el circuit breaker"""
+        start_time = time.time()
+        try:
+            if deadline:
+                response = deadline.run(self.llm.invoke, prompt)
+            else:
+                response = self.llm.invoke(prompt)
+        except DeadlineExceeded:
+            self.circuit_breaker.release()
+            raise
+        except Exception:
+            self.circuit_breaker.record_failure(time.time() - start_time)
+            raise
+        self.circuit_breaker.record_success(time.time() - start_time)
+        return response
+    
+    def _execute_with_ai(self, task: ANPTask, start_time: float, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
         """Ejecutar tarea usando Gemini"""
         prompt = f"""Simula la ejecucion de esta tarea para un evento escolar:
 
@@ -126,7 +524,7 @@ Responde SOLO con un JSON valido (sin texto adicional ni markdown):
 
         try:
             print(f"[DEBUG] Invocando Gemini para tarea: {task.task_name}")
-            response = self.llm.invoke(prompt)
+            response = self._invoke_llm(prompt, deadline)
             print(f"[DEBUG] Respuesta recibida de Gemini")
             response_text = response.content.strip()
             
@@ -158,6 +556,9 @@ Responde SOLO con un JSON valido (sin texto adicional ni markdown):
             print(f"[DEBUG] Tarea ejecutada exitosamente con Gemini")
             return result.model_dump()
             
+        except DeadlineExceeded:
+            print(f"[WARN] Presupuesto de tiempo agotado para tarea: {task.task_name}")
+            raise
         except json.JSONDecodeError as e:
             print(f"[ERROR] Error al parsear JSON de Gemini: {e}")
             print(f"[ERROR] Respuesta recibida: {response_text[:200]}...")
@@ -282,6 +683,8 @@ Responde con un JSON:
             "observations": "Tarea completada segun parametros",
             "next_steps": "Continuar con siguientes tareas"
         })
+        # Resultado simulado: no cuenta para las duraciones historicas
+        result = {**result, "fallback": True}
         
         message_id = str(uuid.uuid4())
         anp_result = self.anp_protocol.create_task_result(
@@ -317,12 +720,16 @@ Responde con un JSON:
         )
         return result.model_dump()
     
-    def _save_task_result(self, database_agent: Any, plan_id: str, result: Dict[str, Any]):
+    def _save_task_result(self, database_agent: Any, plan_id: str, result: Dict[str, Any],
+                          deadline: Optional[Deadline] = None, action: Optional[str] = None):
         message_id = str(uuid.uuid4())
         
         execution_record = {
             "plan_id": plan_id,
             "task_id": result.get("task_id"),
+            # parameters.action de la tarea: base de las duraciones estimadas del scheduler
+            "action": action,
+            "fallback": bool((result.get("result") or {}).get("fallback")),
             "status": result.get("status"),
             "result": result.get("result"),
             "execution_time": result.get("execution_time"),
@@ -336,7 +743,7 @@ Responde con un JSON:
             data=execution_record
         )
         
-        database_agent.process_acp_message(acp_message.model_dump())
+        database_agent.process_acp_message(acp_message.model_dump(), deadline)
     
     def notify_status(self, notifier_agent: str, execution_id: str, status: str, details: Dict[str, Any]) -> Dict[str, Any]:
         message_id = str(uuid.uuid4())
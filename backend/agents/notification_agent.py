@@ -1,4 +1,5 @@
 from typing import Dict, Any, List
+import threading
 import uuid
 from datetime import datetime
 import sys
@@ -19,6 +20,8 @@ class NotificationAgent:
         self.acp_protocol = ACPProtocol()
         self.notification_queue = []
         self.notification_history = []
+        # receive_event llega desde el bus de mensajes en otro hilo que los endpoints
+        self._lock = threading.RLock()
     
     def receive_event(self, a2a_message: Dict[str, Any]) -> Dict[str, Any]:
         if not self.a2a_protocol.validate_message(a2a_message):
@@ -30,7 +33,8 @@ class NotificationAgent:
         
         notification = self._create_notification_from_event(sender, message_type, content, a2a_message)
         
-        self.notification_queue.append(notification)
+        with self._lock:
+            self.notification_queue.append(notification)
         
         return {
             "notification_id": notification["notification_id"],
@@ -131,14 +135,18 @@ class NotificationAgent:
         }
     
     def send_notification_to_ui(self, notification_id: str) -> Dict[str, Any]:
-        notification = None
-        for notif in self.notification_queue:
-            if notif["notification_id"] == notification_id:
-                notification = notif
-                break
-        
-        if not notification:
-            return {"error": "Notification not found"}
+        with self._lock:
+            notification = None
+            for notif in self.notification_queue:
+                if notif["notification_id"] == notification_id:
+                    notification = notif
+                    break
+            
+            if not notification:
+                return {"error": "Notification not found"}
+            
+            self.notification_queue.remove(notification)
+            self.notification_history.append(notification)
         
         message_id = str(uuid.uuid4())
         
@@ -158,26 +166,26 @@ class NotificationAgent:
             }
         )
         
-        self.notification_queue.remove(notification)
-        self.notification_history.append(notification)
-        
         return agui_message.model_dump()
     
     def send_all_pending_notifications(self) -> List[Dict[str, Any]]:
         sent_notifications = []
         
-        while self.notification_queue:
-            notification = self.notification_queue[0]
-            agui_message = self.send_notification_to_ui(notification["notification_id"])
-            sent_notifications.append(agui_message)
+        with self._lock:
+            while self.notification_queue:
+                notification = self.notification_queue[0]
+                agui_message = self.send_notification_to_ui(notification["notification_id"])
+                sent_notifications.append(agui_message)
         
         return sent_notifications
     
     def get_pending_notifications(self) -> List[Dict[str, Any]]:
-        return self.notification_queue.copy()
+        with self._lock:
+            return self.notification_queue.copy()
     
     def get_notification_history(self, limit: int = 50) -> List[Dict[str, Any]]:
-        return self.notification_history[-limit:]
+        with self._lock:
+            return self.notification_history[-limit:]
     
     def mark_as_read(self, notification_id: str) -> Dict[str, Any]:
         for notification in self.notification_history:
@@ -224,6 +232,7 @@ class NotificationAgent:
             "created_at": datetime.now().isoformat()
         }
         
-        self.notification_queue.append(notification)
+        with self._lock:
+            self.notification_queue.append(notification)
         
         return notification_id
@@ -1,16 +1,44 @@
-from langchain_google_genai import ChatGoogleGenerativeAI
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Iterator
+from pydantic import ValidationError
 import uuid
 import json
+import re
+import time
 from datetime import datetime
 import sys
 import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from config.settings import MONGO_LISTING_READ_PREFERENCE, TASK_EXECUTION_MODE
 from protocols.anp import ANPProtocol, ANPTask
 from protocols.a2a import A2AProtocol
 from protocols.acp import ACPProtocol
+from utils.circuit_breaker import gemini_breaker
+from utils.deadline import Deadline, DeadlineExceeded
+from utils.json_stream import IncrementalTaskParser
+from utils.llm import LazyLLM
+
+
+# Datos del evento que usa el planificador
+PLAN_INPUT_FIELDS = ["event_name", "event_type", "event_date", "expected_attendees", "budget", "description"]
+# Un cambio en estos campos puede cambiar que tareas necesita el evento: plan completo
+STRUCTURAL_FIELDS = {"event_type", "description"}
+# Campos del evento de los que depende cada accion; si cambia alguno la tarea se regenera
+ACTION_INPUTS = {
+    "reserve_space": {"expected_attendees", "event_date"},
+    "hire_catering": {"expected_attendees", "event_date", "budget"},
+    "manage_budget": {"budget"},
+    "coordinate_logistics": {"expected_attendees", "event_date"},
+    "prepare_communications": {"event_name", "event_date"}
+}
+# Parametros de las tareas automaticas y el campo del evento del que salen
+TASK_PARAMETER_FIELDS = {
+    "capacity": "expected_attendees",
+    "attendees": "expected_attendees",
+    "budget": "budget",
+    "date": "event_date"
+}
 
 
 class PlanningAgent:
@@ -18,44 +46,61 @@ class PlanningAgent:
         self.agent_name = "Planificador"
         self.api_key = api_key
         self.model_name = model_name
-        self.llm = None
-        
-        # Intentar inicializar Gemini, pero no fallar si no se puede
-        if api_key:
-            try:
-                self.llm = ChatGoogleGenerativeAI(
-                    model=model_name,
-                    google_api_key=api_key,
-                    temperature=0.7
-                )
-            except Exception as e:
-                print(f"Advertencia: No se pudo inicializar Gemini: {e}")
-                print("Se usara modo de planificacion automatica")
+        # Gemini se inicializa en el primer uso (ver la propiedad llm)
+        self._llm_loader = LazyLLM(
+            api_key, model_name, temperature=0.7,
+            fallback_message="Se usara modo de planificacion automatica"
+        )
         
         self.anp_protocol = ANPProtocol()
         self.a2a_protocol = A2AProtocol()
         self.acp_protocol = ACPProtocol()
         self.current_plans = {}
         self.database_agent = None
+        self.circuit_breaker = gemini_breaker
+    
+    @property
+    def llm(self):
+        return self._llm_loader.get()
     
-    def generate_plan(self, event_details: Dict[str, Any]) -> Dict[str, Any]:
+    def generate_plan(self, event_details: Dict[str, Any], deadline: Optional[Deadline] = None) -> Dict[str, Any]:
         plan_id = str(uuid.uuid4())
         
-        # Intentar usar Gemini si esta disponible
-        if self.llm:
+        # Sin presupuesto de tiempo restante no se intenta Gemini
+        if deadline and deadline.expired():
+            return self._create_fallback_plan(plan_id, event_details)
+        
+        # Intentar usar Gemini si esta disponible y el circuit breaker lo permite
+        if self.llm and self.circuit_breaker.allow_request():
             try:
-                return self._generate_plan_with_ai(plan_id, event_details)
+                return self._generate_plan_with_ai(plan_id, event_details, deadline)
             except Exception as e:
                 print(f"Error con Gemini, usando plan automatico: {e}")
                 # Si falla, usar fallback
                 return self._create_fallback_plan(plan_id, event_details)
         else:
-            # Si no hay Gemini, usar fallback directamente
+            # Si no hay Gemini o el proveedor esta degradado, usar fallback directamente
             return self._create_fallback_plan(plan_id, event_details)
     
-    def _generate_plan_with_ai(self, plan_id: str, event_details: Dict[str, Any]) -> Dict[str, Any]:
-        """Generar plan usando Gemini"""
-        prompt = f"""Eres un agente planificador experto en la organizacion de eventos escolares.
+    def _invoke_llm(self, prompt: str, deadline: Optional[Deadline] = None):
+        """Invocar Gemini registrando el resultado en el circuit breaker"""
+        start_time = time.time()
+        try:
+            if deadline:
+                response = deadline.run(self.llm.invoke, prompt)
+            else:
+                response = self.llm.invoke(prompt)
+        except DeadlineExceeded:
+            self.circuit_breaker.release()
+            raise
+        except Exception:
+            self.circuit_breaker.record_failure(time.time() - start_time)
+            raise
+        self.circuit_breaker.record_success(time.time() - start_time)
+        return response
+    
+    def _build_plan_prompt(self, event_details: Dict[str, Any]) -> str:
+        return f"""Eres un agente planificador experto en la organizacion de eventos escolares.
         
 Debes analizar el siguiente evento y descomponerlo en tareas concretas y ejecutables:
 
@@ -94,9 +139,39 @@ Devuelve UNICAMENTE un JSON valido con el siguiente formato (sin texto adicional
     }}
   ]
 }}"""
+    
+    def _build_task(self, plan_id: str, index: int, task_data: Dict[str, Any]) -> ANPTask:
+        return ANPTask(
+            task_id=f"{plan_id}-task-{index}",
+            task_name=task_data.get("task_name", ""),
+            description=task_data.get("description", ""),
+            priority=task_data.get("priority", 1),
+            dependencies=task_data.get("dependencies", []),
+            parameters=task_data.get("parameters", {})
+        )
+    
+    def _build_plan(self, plan_id: str, event_details: Dict[str, Any], plan_data: Dict[str, Any],
+                    tasks: List[ANPTask]) -> Dict[str, Any]:
+        plan = {
+            "plan_id": plan_id,
+            "event_id": event_details.get("event_id", str(uuid.uuid4())),
+            "event_details": event_details,
+            "plan_summary": plan_data.get("plan_summary", ""),
+            "total_tasks": plan_data.get("total_tasks", 0),
+            "estimated_duration": plan_data.get("estimated_duration", ""),
+            "tasks": [task.model_dump() for task in tasks],
+            "status": "created",
+            "created_at": datetime.now().isoformat()
+        }
+        self.current_plans[plan_id] = plan
+        return plan
+    
+    def _generate_plan_with_ai(self, plan_id: str, event_details: Dict[str, Any], deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Generar plan usando Gemini"""
+        prompt = self._build_plan_prompt(event_details)
 
         try:
-            response = self.llm.invoke(prompt)
+            response = self._invoke_llm(prompt, deadline)
             response_text = response.content.strip()
             
             if response_text.startswith("```json"):
@@ -109,34 +184,12 @@ Devuelve UNICAMENTE un JSON valido con el siguiente formato (sin texto adicional
             
             plan_data = json.loads(response_text)
             
-            plan = {
-                "plan_id": plan_id,
-                "event_id": event_details.get("event_id", str(uuid.uuid4())),
-                "event_details": event_details,
-                "plan_summary": plan_data.get("plan_summary", ""),
-                "total_tasks": plan_data.get("total_tasks", 0),
-                "estimated_duration": plan_data.get("estimated_duration", ""),
-                "tasks": [],
-                "status": "created",
-                "created_at": datetime.now().isoformat()
-            }
+            tasks = [
+                self._build_task(plan_id, idx + 1, task_data)
+                for idx, task_data in enumerate(plan_data.get("tasks", []))
+            ]
             
-            tasks = []
-            for idx, task_data in enumerate(plan_data.get("tasks", [])):
-                task = ANPTask(
-                    task_id=f"{plan_id}-task-{idx+1}",
-                    task_name=task_data.get("task_name", ""),
-                    description=task_data.get("description", ""),
-                    priority=task_data.get("priority", 1),
-                    dependencies=task_data.get("dependencies", []),
-                    parameters=task_data.get("parameters", {})
-                )
-                tasks.append(task)
-            
-            plan["tasks"] = [task.model_dump() for task in tasks]
-            self.current_plans[plan_id] = plan
-            
-            return plan
+            return self._build_plan(plan_id, event_details, plan_data, tasks)
             
         except json.JSONDecodeError as e:
             fallback_plan = self._create_fallback_plan(plan_id, event_details)
@@ -145,6 +198,263 @@ Devuelve UNICAMENTE un JSON valido con el siguiente formato (sin texto adicional
             fallback_plan = self._create_fallback_plan(plan_id, event_details)
             return fallback_plan
     
+    def generate_plan_stream(self, event_details: Dict[str, Any],
+                             deadline: Optional[Deadline] = None) -> Iterator[Dict[str, Any]]:
+        """Generar el plan consumiendo el stream de Gemini.
+        
+        Emite {"type": "task", ...} en cuanto se cierra cada objeto del arreglo
+        "tasks" y al final {"type": "plan", ...} con el plan completo. Si el
+        stream se corta despues de alguna tarea, emite {"type": "fallback", ...}
+        y completa el plan con las tareas automaticas que falten.
+        """
+        plan_id = str(uuid.uuid4())
+        
+        use_llm = not (deadline and deadline.expired()) and self.llm and self.circuit_breaker.allow_request()
+        if not use_llm:
+            yield from self._stream_fallback_plan(plan_id, event_details)
+            return
+        
+        parser = IncrementalTaskParser()
+        tasks = []
+        plan_data = None
+        interrupted = None
+        start_time = time.time()
+        
+        try:
+            stream = iter(self.llm.stream(self._build_plan_prompt(event_details)))
+            while True:
+                # Cada fragmento se espera como maximo el tiempo restante del presupuesto
+                chunk = deadline.run(next, stream, None) if deadline else next(stream, None)
+                if chunk is None:
+                    break
+                
+                for task_data in parser.feed(chunk.content):
+                    try:
+                        task = self._build_task(plan_id, len(tasks) + 1, task_data)
+                    except ValidationError:
+                        continue
+                    tasks.append(task)
+                    yield {"type": "task", "plan_id": plan_id, "index": len(tasks), "task": task.model_dump()}
+            
+            self.circuit_breaker.record_success(time.time() - start_time)
+            plan_data = parser.finish()
+            if not parser.tasks_complete:
+                interrupted = "La respuesta de Gemini termino antes de cerrar la lista de tareas"
+        except DeadlineExceeded:
+            self.circuit_breaker.release()
+            interrupted = "Presupuesto de tiempo agotado durante el stream de Gemini"
+        except GeneratorExit:
+            self.circuit_breaker.release()
+            raise
+        except Exception as e:
+            self.circuit_breaker.record_failure(time.time() - start_time)
+            interrupted = f"Error con el stream de Gemini: {e}"
+        
+        if not tasks:
+            # No se alcanzo a emitir ninguna tarea: usar el plan automatico completo
+            yield from self._stream_fallback_plan(plan_id, event_details)
+            return
+        
+        if interrupted:
+            # Las tareas ya emitidas se conservan; el resto sale del plan automatico
+            print(interrupted)
+            completion = self._fallback_completion(plan_id, event_details, tasks)
+            yield {"type": "fallback", "plan_id": plan_id, "reason": interrupted,
+                   "streamed_tasks": len(tasks), "fallback_tasks": len(completion)}
+            for task in completion:
+                tasks.append(task)
+                yield {"type": "task", "plan_id": plan_id, "index": len(tasks), "task": task.model_dump()}
+            plan_data = {
+                "plan_summary": f"Plan para {event_details.get('event_name', 'evento')} "
+                                f"({len(tasks) - len(completion)} tareas de Gemini, {len(completion)} automaticas)",
+                "estimated_duration": "2-3 semanas"
+            }
+        
+        plan_data["total_tasks"] = len(tasks)
+        plan = self._build_plan(plan_id, event_details, plan_data, tasks)
+        if interrupted:
+            plan["completed_with_fallback"] = True
+        yield {"type": "plan", "plan_id": plan_id, "plan": plan}
+    
+    def _fallback_completion(self, plan_id: str, event_details: Dict[str, Any],
+                             streamed: List[ANPTask]) -> List[ANPTask]:
+        """Tareas del plan automatico cuya accion no cubre ninguna de las ya emitidas.
+        
+        Se numeran a continuacion de las emitidas; una dependencia hacia una tarea
+        automatica que ya estaba cubierta apunta a la tarea emitida con esa accion.
+        """
+        fallback_tasks = self._create_fallback_plan(plan_id, event_details)["tasks"]
+        covered = {}
+        for task in streamed:
+            covered.setdefault(task.parameters.get("action"), task.task_id)
+        
+        renamed, completion = {}, []
+        for task in fallback_tasks:
+            action = task["parameters"].get("action")
+            if action in covered:
+                renamed[task["task_id"]] = covered[action]
+                continue
+            renamed[task["task_id"]] = f"{plan_id}-task-{len(streamed) + len(completion) + 1}"
+            completion.append(task)
+        
+        return [
+            ANPTask(**{**task, "task_id": renamed[task["task_id"]],
+                       "dependencies": [renamed[dep] for dep in task.get("dependencies", []) if dep in renamed]})
+            for task in completion
+        ]
+    
+    def _stream_fallback_plan(self, plan_id: str, event_details: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        plan = self._create_fallback_plan(plan_id, event_details)
+        for idx, task in enumerate(plan["tasks"]):
+            yield {"type": "task", "plan_id": plan_id, "index": idx + 1, "task": task}
+        yield {"type": "plan", "plan_id": plan_id, "plan": plan}
+    
+    def diff_event_details(self, previous: Dict[str, Any], current: Dict[str, Any]) -> List[str]:
+        """Campos de entrada del plan cuyo valor cambio"""
+        return [field for field in PLAN_INPUT_FIELDS if previous.get(field) != current.get(field)]
+
+    def _task_inputs(self, task: Dict[str, Any]) -> set:
+        # Una accion desconocida (texto libre del LLM) depende de todos los campos
+        return ACTION_INPUTS.get(task.get("parameters", {}).get("action"), set(PLAN_INPUT_FIELDS))
+
+    def replan(self, previous_plan: Dict[str, Any], event_details: Dict[str, Any],
+               deadline: Optional[Deadline] = None, force_full: bool = False) -> Dict[str, Any]:
+        """Actualizar el plan anterior regenerando solo las tareas cuyos datos cambiaron.
+
+        Las tareas no afectadas conservan su task_id (y con el, sus resultados
+        de ejecucion); las regeneradas reciben un task_id nuevo con la version.
+        Sin plan anterior, con force_full o si cambia un campo estructural
+        (tipo o descripcion) se genera un plan completo nuevo.
+        """
+        previous_plan = previous_plan or {}
+        previous_tasks = previous_plan.get("tasks") or []
+        changed = self.diff_event_details(previous_plan.get("event_details", {}), event_details)
+
+        if force_full or not previous_tasks or STRUCTURAL_FIELDS.intersection(changed):
+            plan = self.generate_plan(event_details, deadline)
+            plan["replan"] = {
+                "mode": "full",
+                "changed_fields": changed,
+                "regenerated_tasks": [task["task_id"] for task in plan["tasks"]],
+                "kept_tasks": []
+            }
+            return plan
+
+        plan = {key: value for key, value in previous_plan.items() if key != "_id"}
+        if not changed:
+            plan["replan"] = {"mode": "unchanged", "changed_fields": [], "regenerated_tasks": [],
+                              "kept_tasks": [task["task_id"] for task in previous_tasks]}
+            self.current_plans[plan["plan_id"]] = plan
+            return plan
+
+        version = plan.get("version", 1) + 1
+        affected = [task for task in previous_tasks if self._task_inputs(task).intersection(changed)]
+        regenerated = self._regenerate_tasks(affected, event_details, deadline)
+
+        # Los IDs nuevos invalidan los resultados previos de las tareas regeneradas
+        renamed = {
+            task["task_id"]: f"{re.sub(r'-v[0-9]+$', '', task['task_id'])}-v{version}"
+            for task in affected
+        }
+        replacements = {task["task_id"]: new_task for task, new_task in zip(affected, regenerated)}
+
+        tasks = []
+        for task in previous_tasks:
+            new_task = dict(replacements.get(task["task_id"], task))
+            new_task["task_id"] = renamed.get(task["task_id"], task["task_id"])
+            new_task["dependencies"] = [renamed.get(dep, dep) for dep in task.get("dependencies", [])]
+            tasks.append(ANPTask(**new_task).model_dump())
+
+        plan.update({
+            "event_details": event_details,
+            "tasks": tasks,
+            "total_tasks": len(tasks),
+            "version": version,
+            "status": "replanned",
+            "replanned_at": datetime.now().isoformat(),
+            "replan": {
+                "mode": "incremental",
+                "changed_fields": changed,
+                "regenerated_tasks": list(renamed.values()),
+                "kept_tasks": [task["task_id"] for task in tasks if task["task_id"] not in renamed.values()]
+            }
+        })
+        self.current_plans[plan["plan_id"]] = plan
+        return plan
+
+    def _regenerate_tasks(self, tasks: List[Dict[str, Any]], event_details: Dict[str, Any],
+                          deadline: Optional[Deadline] = None) -> List[Dict[str, Any]]:
+        """Nuevas versiones de las tareas afectadas: una sola llamada a Gemini o ajuste automatico"""
+        if not tasks:
+            return []
+
+        use_llm = not (deadline and deadline.expired()) and self.llm and self.circuit_breaker.allow_request()
+        if use_llm:
+            try:
+                return self._regenerate_tasks_with_ai(tasks, event_details, deadline)
+            except Exception as e:
+                print(f"Error con Gemini al replanificar, ajustando tareas automaticamente: {e}")
+
+        return [self._refresh_task_parameters(task, event_details) for task in tasks]
+
+    def _regenerate_tasks_with_ai(self, tasks: List[Dict[str, Any]], event_details: Dict[str, Any],
+                                  deadline: Optional[Deadline] = None) -> List[Dict[str, Any]]:
+        current_tasks = [
+            {key: task.get(key) for key in ("task_name", "description", "priority", "parameters")}
+            for task in tasks
+        ]
+        prompt = f"""Eres un agente replanificador de eventos escolares.
+
+Los datos del evento cambiaron y debes actualizar SOLO las tareas indicadas.
+
+Detalles actualizados del evento:
+- Nombre: {event_details.get('event_name', 'Sin nombre')}
+- Tipo: {event_details.get('event_type', 'Sin tipo')}
+- Fecha: {event_details.get('event_date', 'Sin fecha')}
+- Numero de asistentes esperados: {event_details.get('expected_attendees', 'No especificado')}
+- Presupuesto: {event_details.get('budget', 'No especificado')}
+- Descripcion: {event_details.get('description', 'Sin descripcion')}
+
+Tareas a actualizar: {json.dumps(current_tasks, ensure_ascii=False)}
+
+Conserva el mismo numero de tareas, en el mismo orden y con el mismo parameters.action.
+Devuelve UNICAMENTE un JSON valido con el formato {{"tasks": [{{"task_name": "...", "description": "...", "priority": 1, "parameters": {{}}}}]}}"""
+
+        response = self._invoke_llm(prompt, deadline)
+        response_text = response.content.strip()
+        if response_text.startswith("```json"):
+            response_text = response_text[7:]
+        if response_text.startswith("```"):
+            response_text = response_text[3:]
+        if response_text.endswith("```"):
+            response_text = response_text[:-3]
+
+        updated = json.loads(response_text.strip()).get("tasks", [])
+        if len(updated) != len(tasks):
+            raise ValueError(f"Gemini devolvio {len(updated)} tareas en lugar de {len(tasks)}")
+
+        regenerated = []
+        for task, task_data in zip(tasks, updated):
+            parameters = dict(task_data.get("parameters") or task.get("parameters", {}))
+            # La accion identifica la tarea: el LLM no puede cambiarla
+            parameters["action"] = task.get("parameters", {}).get("action", parameters.get("action"))
+            regenerated.append({
+                **task,
+                "task_name": task_data.get("task_name") or task["task_name"],
+                "description": task_data.get("description") or task["description"],
+                "priority": task_data.get("priority", task.get("priority", 1)),
+                "parameters": parameters
+            })
+        return regenerated
+
+    def _refresh_task_parameters(self, task: Dict[str, Any], event_details: Dict[str, Any]) -> Dict[str, Any]:
+        """Copiar los nuevos valores del evento a los parametros conocidos de la tarea"""
+        parameters = dict(task.get("parameters", {}))
+        for parameter, field in TASK_PARAMETER_FIELDS.items():
+            if parameter in parameters:
+                parameters[parameter] = event_details.get(field, parameters[parameter])
+        return {**task, "parameters": parameters}
+
     def _create_fallback_plan(self, plan_id: str, event_details: Dict[str, Any]) -> Dict[str, Any]:
         default_tasks = [
             ANPTask(
@@ -210,7 +520,7 @@ Devuelve UNICAMENTE un JSON valido con el siguiente formato (sin texto adicional
             receiver=executor_agent,
             plan_id=plan_id,
             tasks=tasks,
-            execution_mode="sequential"
+            execution_mode=TASK_EXECUTION_MODE
         )
         
         plan["status"] = "sent_to_executor"
@@ -236,7 +546,7 @@ Devuelve UNICAMENTE un JSON valido con el siguiente formato (sin texto adicional
         
         return a2a_message.model_dump()
     
-    def save_plan_to_database(self, database_agent: Any, plan_id: str) -> Dict[str, Any]:
+    def save_plan_to_database(self, database_agent: Any, plan_id: str, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
         if plan_id not in self.current_plans:
             return {"error": "Plan not found"}
         
@@ -250,9 +560,55 @@ Devuelve UNICAMENTE un JSON valido con el siguiente formato (sin texto adicional
             data=plan
         )
         
-        response = database_agent.process_acp_message(acp_message.model_dump())
+        response = database_agent.process_acp_message(acp_message.model_dump(), deadline)
         return response.model_dump()
-    
+
+    def update_plan_in_database(self, database_agent: Any, plan_id: str, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Reemplazar en su documento los campos de un plan replanificado"""
+        if plan_id not in self.current_plans:
+            return {"error": "Plan not found"}
+
+        plan = self.current_plans[plan_id]
+        acp_message = self.acp_protocol.create_update_request(
+            message_id=str(uuid.uuid4()),
+            sender=self.agent_name,
+            collection="plans",
+            query_filter={"plan_id": plan_id},
+            update_data={key: value for key, value in plan.items() if key not in ("_id", "plan_id")}
+        )
+
+        response = database_agent.process_acp_message(acp_message.model_dump(), deadline)
+        return response.model_dump()
+
+    def get_latest_plan_for_event(self, database_agent: Any, event_id: str,
+                                  deadline: Optional[Deadline] = None) -> Optional[Dict[str, Any]]:
+        acp_message = self.acp_protocol.create_query_request(
+            message_id=str(uuid.uuid4()),
+            sender=self.agent_name,
+            collection="plans",
+            query_filter={"event_id": event_id},
+            sort={"created_at": -1},
+            limit=1
+        )
+
+        response = database_agent.process_acp_message(acp_message.model_dump(), deadline)
+        if response.status == "success" and response.data:
+            return response.data[0]
+        return None
+
+    def clear_reused_results(self, database_agent: Any, plan_id: str, deadline: Optional[Deadline] = None):
+        """Los resultados heredados de la version anterior solo se usan en la primera ejecucion"""
+        if plan_id in self.current_plans:
+            self.current_plans[plan_id]["reused_results"] = {}
+        acp_message = self.acp_protocol.create_update_request(
+            message_id=str(uuid.uuid4()),
+            sender=self.agent_name,
+            collection="plans",
+            query_filter={"plan_id": plan_id},
+            update_data={"reused_results": {}}
+        )
+        database_agent.process_acp_message(acp_message.model_dump(), deadline)
+
     def query_event_history(self, database_agent: Any, event_type: str) -> List[Dict[str, Any]]:
         message_id = str(uuid.uuid4())
         acp_message = self.acp_protocol.create_query_request(
@@ -268,7 +624,7 @@ Devuelve UNICAMENTE un JSON valido con el siguiente formato (sin texto adicional
             return response.data or []
         return []
     
-    def get_plan(self, plan_id: str) -> Dict[str, Any]:
+    def get_plan(self, plan_id: str, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
         # Primero buscar en memoria
         if plan_id in self.current_plans:
             return self.current_plans[plan_id]
@@ -284,7 +640,7 @@ Devuelve UNICAMENTE un JSON valido con el siguiente formato (sin texto adicional
                     query_filter={"plan_id": plan_id}
                 )
                 
-                response = self.database_agent.process_acp_message(acp_message.model_dump())
+                response = self.database_agent.process_acp_message(acp_message.model_dump(), deadline)
                 if response.status == "success" and response.data:
                     # Guardar en memoria para próximas consultas
                     self.current_plans[plan_id] = response.data
@@ -294,7 +650,7 @@ Devuelve UNICAMENTE un JSON valido con el siguiente formato (sin texto adicional
         
         return {}
     
-    def list_plans(self) -> List[Dict[str, Any]]:
+    def list_plans(self, deadline: Optional[Deadline] = None) -> List[Dict[str, Any]]:
         # Cargar todos los planes desde base de datos
         if self.database_agent:
             try:
@@ -305,15 +661,18 @@ Devuelve UNICAMENTE un JSON valido con el siguiente formato (sin texto adicional
                     collection="plans",
                     query_filter={},
                     sort={"created_at": -1},
-                    limit=100
+                    limit=100,
+                    read_preference=MONGO_LISTING_READ_PREFERENCE
                 )
                 
-                response = self.database_agent.process_acp_message(acp_message.model_dump())
+                response = self.database_agent.process_acp_message(acp_message.model_dump(), deadline)
                 if response.status == "success" and response.data:
-                    # Actualizar cache en memoria
-                    for plan in response.data:
-                        if "plan_id" in plan:
-                            self.current_plans[plan["plan_id"]] = plan
+                    # Actualizar cache en memoria; una lectura de secundario puede ser
+                    # anterior a la ultima escritura y no debe pisar el plan vigente
+                    if MONGO_LISTING_READ_PREFERENCE == "primary":
+                        for plan in response.data:
+                            if "plan_id" in plan:
+                                self.current_plans[plan["plan_id"]] = plan
                     return response.data
             except Exception as e:
                 print(f"Error cargando planes desde DB: {e}")
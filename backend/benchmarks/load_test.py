@@ -0,0 +1,342 @@
+"""Prueba de carga end-to-end con percentiles de latencia por endpoint.
+
+Escenarios concurrentes:
+- organizadores: crean eventos (POST /api/plan) y ejecutan sus planes
+- inscripcion masiva: estudiantes registrandose en eventos ya abiertos
+- dashboards: consultan /api/events/available, /api/notifications y /api/dashboard/stats
+
+Cada usuario simulado se identifica con X-Client-Id y, ante un 429/503 del
+control de admision, espera lo indicado en Retry-After (columna "shed").
+Con --client-rate-limits se activan los token buckets por cliente; con --url
+el servidor debe levantarse con ADMISSION_CLIENT_HEADER=x-client-id y las
+tasas ADMISSION_*_RATE para que distinga a los usuarios simulados.
+
+Por defecto la app corre en proceso (httpx + ASGITransport) con el motor de
+almacenamiento en memoria y el modelo local (LLM_PROVIDER=local), sin
+servicios externos. Con --url se apunta a un uvicorn local ya levantado.
+
+Uso (desde backend/):
+    python -m benchmarks.load_test --duration 20
+    python -m benchmarks.load_test --save-baseline
+    python -m benchmarks.load_test --url http://localhost:8000 --fail-on-regression
+"""
+from typing import Dict, Any, List, Optional
+from collections import defaultdict
+from contextlib import redirect_stdout
+import argparse
+import asyncio
+import io
+import json
+import math
+import random
+import time
+import uuid
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+EVENT_TYPES = ["academico", "deportivo", "cultural", "social"]
+
+
+def percentile(sorted_samples: List[float], pct: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    index = max(0, math.ceil(pct / 100.0 * len(sorted_samples)) - 1)
+    return sorted_samples[index]
+
+
+class LoadRecorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.http_errors: Dict[str, int] = defaultdict(int)
+        self.app_errors: Dict[str, int] = defaultdict(int)
+        self.shed: Dict[str, int] = defaultdict(int)
+
+    async def request(self, client: httpx.AsyncClient, method: str, url: str, label: str,
+                      **kwargs) -> Optional[httpx.Response]:
+        start_time = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except Exception:
+            self.http_errors[label] += 1
+            return None
+        self.latencies[label].append((time.perf_counter() - start_time) * 1000)
+
+        if response.status_code in (429, 503) and "retry-after" in response.headers:
+            # Rechazo del control de admision: un cliente correcto espera antes de reintentar
+            self.shed[label] += 1
+            await asyncio.sleep(float(response.headers["retry-after"]))
+        elif response.status_code >= 400:
+            self.http_errors[label] += 1
+        elif response.headers.get("content-type", "").startswith("application/json"):
+            # Los errores de negocio (evento lleno, duplicado) vienen como AG-UI con status "error"
+            if response.json().get("status") == "error":
+                self.app_errors[label] += 1
+        return response
+
+    def summary(self, duration: float) -> Dict[str, Dict[str, Any]]:
+        results = {}
+        for label in sorted(self.latencies):
+            samples = sorted(self.latencies[label])
+            results[label] = {
+                "requests": len(samples),
+                "rps": round(len(samples) / duration, 2),
+                "p50_ms": round(percentile(samples, 50), 2),
+                "p95_ms": round(percentile(samples, 95), 2),
+                "p99_ms": round(percentile(samples, 99), 2),
+                "max_ms": round(samples[-1], 2) if samples else 0.0,
+                "http_errors": self.http_errors[label],
+                "app_errors": self.app_errors[label],
+                "shed": self.shed[label]
+            }
+        return results
+
+
+def build_event_request(organizer: int, expected_attendees: int) -> Dict[str, Any]:
+    return {
+        "event_name": f"Evento de carga {uuid.uuid4().hex[:6]}",
+        "event_type": random.choice(EVENT_TYPES),
+        "event_date": f"2026-{random.randint(1, 12):02d}-{random.randint(1, 28):02d}",
+        "expected_attendees": expected_attendees,
+        "budget": float(random.randint(1000, 50000)),
+        "description": "Evento generado por la prueba de carga",
+        "organizer_email": f"organizador{organizer}@universidad.edu"
+    }
+
+
+async def create_and_execute(client: httpx.AsyncClient, recorder: LoadRecorder, organizer: int,
+                             expected_attendees: int) -> Optional[str]:
+    headers = {"X-Client-Id": f"organizador-{organizer}"}
+    response = await recorder.request(
+        client, "POST", "/api/plan", "POST /api/plan",
+        json=build_event_request(organizer, expected_attendees), headers=headers
+    )
+    if response is None or response.status_code != 200:
+        return None
+
+    payload = response.json().get("payload", {})
+    plan_id = (payload.get("plan") or {}).get("plan_id")
+    if not plan_id:
+        return None
+
+    await recorder.request(client, "POST", f"/api/execute/{plan_id}", "POST /api/execute/{plan_id}", headers=headers)
+    return payload.get("event_id")
+
+
+async def organizer_scenario(client: httpx.AsyncClient, recorder: LoadRecorder, organizer: int,
+                             stop_at: float, event_ids: List[str], capacity: int):
+    while time.perf_counter() < stop_at:
+        event_id = await create_and_execute(client, recorder, organizer, capacity)
+        if event_id:
+            event_ids.append(event_id)
+        await recorder.request(client, "GET", "/api/plans", "GET /api/plans",
+                               headers={"X-Client-Id": f"organizador-{organizer}"})
+
+
+async def student_scenario(client: httpx.AsyncClient, recorder: LoadRecorder, student: int,
+                           stop_at: float, event_ids: List[str]):
+    headers = {"X-Client-Id": f"estudiante-{student}"}
+    while time.perf_counter() < stop_at:
+        email = f"estudiante{student}-{uuid.uuid4().hex[:8]}@universidad.edu"
+        await recorder.request(
+            client, "POST", "/api/students/register", "POST /api/students/register",
+            json={
+                "student_name": f"Estudiante {student}",
+                "student_email": email,
+                "student_id": str(student),
+                "event_id": random.choice(event_ids)
+            },
+            headers=headers
+        )
+        await recorder.request(
+            client, "GET", f"/api/students/{email}/registrations", "GET /api/students/{email}/registrations",
+            headers=headers
+        )
+
+
+async def dashboard_scenario(client: httpx.AsyncClient, recorder: LoadRecorder, dashboard: int,
+                             stop_at: float, poll_interval: float):
+    headers = {"X-Client-Id": f"dashboard-{dashboard}"}
+    while time.perf_counter() < stop_at:
+        await recorder.request(client, "GET", "/api/events/available", "GET /api/events/available", headers=headers)
+        await recorder.request(client, "GET", "/api/notifications", "GET /api/notifications", headers=headers)
+        await recorder.request(client, "GET", "/api/dashboard/stats", "GET /api/dashboard/stats", headers=headers)
+        await asyncio.sleep(poll_interval)
+
+
+async def wait_until_ready(client: httpx.AsyncClient, timeout: float = 30.0):
+    stop_at = time.perf_counter() + timeout
+    while time.perf_counter() < stop_at:
+        try:
+            response = await client.get("/api/health/ready")
+            if response.status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError("La aplicacion no estuvo lista a tiempo")
+
+
+async def run_load(client: httpx.AsyncClient, args) -> Dict[str, Any]:
+    await wait_until_ready(client)
+
+    # Eventos abiertos para la inscripcion masiva (no cuentan en las metricas)
+    seed_recorder = LoadRecorder()
+    event_ids = []
+    for index in range(args.seed_events):
+        event_id = await create_and_execute(client, seed_recorder, index, args.capacity)
+        if event_id:
+            event_ids.append(event_id)
+    if not event_ids:
+        raise RuntimeError("No se pudieron crear eventos semilla")
+
+    recorder = LoadRecorder()
+    started_at = time.perf_counter()
+    stop_at = started_at + args.duration
+
+    scenarios = [
+        organizer_scenario(client, recorder, index, stop_at, event_ids, args.capacity)
+        for index in range(args.organizers)
+    ]
+    scenarios += [student_scenario(client, recorder, index, stop_at, event_ids) for index in range(args.students)]
+    scenarios += [
+        dashboard_scenario(client, recorder, index, stop_at, args.poll_interval)
+        for index in range(args.dashboards)
+    ]
+    await asyncio.gather(*scenarios)
+
+    duration = time.perf_counter() - started_at
+    return {
+        "config": {
+            "mode": "http" if args.url else "in-process",
+            "duration": args.duration,
+            "organizers": args.organizers,
+            "students": args.students,
+            "dashboards": args.dashboards,
+            "seed_events": args.seed_events,
+            "llm_latency_ms": args.llm_latency_ms,
+            "llm_latency_distribution": args.llm_latency_distribution,
+            "llm_error_rate": args.llm_error_rate,
+            "llm_malformed_rate": args.llm_malformed_rate,
+            "llm_fenced_rate": args.llm_fenced_rate,
+            "client_rate_limits": args.client_rate_limits
+        },
+        "endpoints": recorder.summary(duration)
+    }
+
+
+async def run_in_process(args) -> Dict[str, Any]:
+    import main
+
+    async with main.lifespan(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=120) as client:
+            return await run_load(client, args)
+
+
+async def run_over_http(args) -> Dict[str, Any]:
+    limits = httpx.Limits(max_connections=args.organizers + args.students + args.dashboards)
+    async with httpx.AsyncClient(base_url=args.url, timeout=120, limits=limits) as client:
+        return await run_load(client, args)
+
+
+def print_report(results: Dict[str, Any], baseline: Optional[Dict[str, Any]], tolerance: float) -> List[str]:
+    regressions = []
+    base_endpoints = (baseline or {}).get("endpoints", {})
+
+    print(f"\n{'endpoint':<44} {'req':>6} {'rps':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'err':>5} {'app':>5} {'shed':>5}  vs baseline")
+    for label, stats in results["endpoints"].items():
+        comparison = ""
+        base = base_endpoints.get(label)
+        if base:
+            p95_delta = (stats["p95_ms"] - base["p95_ms"]) / base["p95_ms"] if base["p95_ms"] else 0.0
+            rps_delta = (stats["rps"] - base["rps"]) / base["rps"] if base["rps"] else 0.0
+            comparison = f"p95 {p95_delta:+.0%}  rps {rps_delta:+.0%}"
+            if p95_delta > tolerance or rps_delta < -tolerance:
+                comparison += "  REGRESION"
+                regressions.append(label)
+        print(
+            f"{label:<44} {stats['requests']:>6} {stats['rps']:>8.1f} {stats['p50_ms']:>7.1f}ms "
+            f"{stats['p95_ms']:>7.1f}ms {stats['p99_ms']:>7.1f}ms {stats['http_errors']:>5} {stats['app_errors']:>5} {stats.get('shed', 0):>5}  {comparison}"
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga end-to-end del sistema multiagente")
+    parser.add_argument("--url", default=None, help="URL de un servidor ya levantado (por defecto, en proceso)")
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--organizers", type=int, default=2)
+    parser.add_argument("--students", type=int, default=40)
+    parser.add_argument("--dashboards", type=int, default=10)
+    parser.add_argument("--seed-events", type=int, default=5)
+    parser.add_argument("--capacity", type=int, default=200, help="expected_attendees de los eventos creados")
+    parser.add_argument("--poll-interval", type=float, default=0.5)
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0)
+    parser.add_argument("--llm-latency-distribution", default="fixed", choices=["fixed", "uniform", "normal", "lognormal"])
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-malformed-rate", type=float, default=0.0)
+    parser.add_argument("--llm-fenced-rate", type=float, default=0.0)
+    parser.add_argument("--client-rate-limits", action="store_true",
+                        help="Aplicar los token buckets por cliente (los usuarios simulados no esperan entre solicitudes)")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Variacion tolerada de p95 y rps frente al baseline")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--verbose", action="store_true", help="Mostrar los logs de la aplicacion")
+    args = parser.parse_args()
+
+    random.seed(7)
+
+    if not args.url:
+        # En proceso: sin MongoDB ni Gemini (se fijan antes de importar main/settings)
+        os.environ.setdefault("STORAGE_BACKEND", "memory")
+        os.environ.setdefault("LLM_WARMUP_ON_STARTUP", "false")
+        os.environ["LLM_PROVIDER"] = "local"
+        os.environ["LOCAL_LLM_SEED"] = "7"
+        os.environ["LOCAL_LLM_LATENCY_MS"] = str(args.llm_latency_ms)
+        os.environ["LOCAL_LLM_LATENCY_DISTRIBUTION"] = args.llm_latency_distribution
+        os.environ["LOCAL_LLM_ERROR_RATE"] = str(args.llm_error_rate)
+        os.environ["LOCAL_LLM_MALFORMED_RATE"] = str(args.llm_malformed_rate)
+        os.environ["LOCAL_LLM_FENCED_RATE"] = str(args.llm_fenced_rate)
+        os.environ.setdefault("ADMISSION_CLIENT_HEADER", "x-client-id")
+        if args.client_rate_limits:
+            for lane, rate in (("REGISTRATION", "5"), ("DEFAULT", "20"), ("LLM", "0.5")):
+                os.environ.setdefault(f"ADMISSION_{lane}_RATE", rate)
+
+    runner = run_over_http(args) if args.url else run_in_process(args)
+    if args.verbose:
+        results = asyncio.run(runner)
+    else:
+        with redirect_stdout(io.StringIO()):
+            results = asyncio.run(runner)
+
+    baseline = None
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+
+    regressions = print_report(results, baseline, args.tolerance)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as baseline_file:
+            json.dump(results, baseline_file, indent=2, ensure_ascii=False)
+            baseline_file.write("\n")
+        print(f"\nBaseline guardado en {args.baseline}")
+    elif baseline is None:
+        print("\nSin baseline para comparar (usar --save-baseline)")
+    elif baseline.get("config") != results["config"]:
+        print("\nAdvertencia: el baseline se midio con otra configuracion")
+
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""Benchmark de serializacion de respuestas AG-UI.
+
+Compara la ruta anterior (model_dump -> jsonable_encoder -> json.dumps) con
+AGUIJSONResponse sobre payloads del tamano de /api/plans y /api/executions.
+
+Uso (desde backend/):
+    python -m benchmarks.serialization_bench --plans 100 --repeat 50
+"""
+from typing import Dict, Any, List, Callable
+from datetime import datetime
+import argparse
+import json
+import statistics
+import time
+import uuid
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from protocols.ag_ui import AGUIProtocol
+from utils.responses import dumps_bytes, orjson
+
+
+ACTIONS = ["reserve_space", "hire_catering", "manage_budget", "coordinate_logistics", "prepare_communications"]
+
+
+def build_plan(index: int) -> Dict[str, Any]:
+    plan_id = str(uuid.uuid4())
+    event_id = str(uuid.uuid4())
+    tasks = []
+    for task_index, action in enumerate(ACTIONS):
+        tasks.append({
+            "task_id": f"{plan_id}-task-{task_index + 1}",
+            "task_name": f"Tarea {task_index + 1} del evento {index}",
+            "description": "Descripcion detallada de la tarea a realizar para el evento escolar " * 3,
+            "priority": 5 - task_index,
+            "dependencies": [f"{plan_id}-task-{task_index}"] if task_index else [],
+            "parameters": {"action": action, "details": "detalles adicionales de la accion", "capacity": 150}
+        })
+
+    return {
+        "_id": uuid.uuid4().hex[:24],
+        "plan_id": plan_id,
+        "event_id": event_id,
+        "event_details": {
+            "event_id": event_id,
+            "event_name": f"Feria de ciencias {index}",
+            "event_type": "academico",
+            "event_date": "2026-11-15",
+            "expected_attendees": 150,
+            "budget": 25000.0,
+            "description": "Evento anual donde los estudiantes presentan sus proyectos de investigacion " * 2,
+            "organizer_email": "organizador@universidad.edu",
+            "status": "completed",
+            "available_for_registration": True,
+            "created_at": datetime.now().isoformat()
+        },
+        "plan_summary": "Plan generado para la organizacion completa del evento escolar",
+        "total_tasks": len(tasks),
+        "estimated_duration": "2-3 semanas",
+        "tasks": tasks,
+        "status": "sent_to_executor",
+        "created_at": datetime.now().isoformat()
+    }
+
+
+def build_execution(plan: Dict[str, Any]) -> Dict[str, Any]:
+    results = []
+    for task in plan["tasks"]:
+        results.append({
+            "protocol": "ANP",
+            "timestamp": datetime.now().isoformat(),
+            "message_id": str(uuid.uuid4()),
+            "sender": "Ejecutor",
+            "receiver": "Planificador",
+            "message_type": "task_result",
+            "task_id": task["task_id"],
+            "status": "success",
+            "result": {
+                "status": "success",
+                "action_taken": f"Accion realizada para {task['task_name']}",
+                "details": {"confirmed": True, "provider": "Proveedor Escolar", "attendees": 150},
+                "observations": "Tarea completada segun parametros",
+                "next_steps": "Continuar con siguientes tareas"
+            },
+            "execution_time": 1.234,
+            "error_message": ""
+        })
+
+    return {
+        "execution_id": str(uuid.uuid4()),
+        "plan_id": plan["plan_id"],
+        "tasks": plan["tasks"],
+        "execution_mode": "sequential",
+        "status": "completed",
+        "received_at": datetime.now().isoformat(),
+        "results": results
+    }
+
+
+def legacy_render(model) -> bytes:
+    """Ruta previa: dict intermedio, jsonable_encoder y json stdlib"""
+    content = jsonable_encoder(model.model_dump())
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None,
+                      separators=(",", ":")).encode("utf-8")
+
+
+def orjson_render(model) -> bytes:
+    return orjson.dumps(model.model_dump())
+
+
+def time_it(func: Callable[[Any], bytes], model, repeat: int) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(model)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de serializacion AG-UI")
+    parser.add_argument("--plans", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    protocol = AGUIProtocol()
+    plans = [build_plan(i) for i in range(args.plans)]
+    executions = [build_execution(plan) for plan in plans]
+
+    payloads = {
+        "/api/plans": protocol.create_response(
+            message_id=str(uuid.uuid4()), sender="Planificador", receiver="UI",
+            action="Base de datos", status="success", payload={"plans": plans}
+        ),
+        "/api/executions": protocol.create_response(
+            message_id=str(uuid.uuid4()), sender="Ejecutor", receiver="UI",
+            action="Base de datos", status="success",
+            payload={"current": [], "history": executions}
+        )
+    }
+
+    renderers = {"legacy (dict + jsonable_encoder + json)": legacy_render, "AGUIJSONResponse": dumps_bytes}
+    if orjson is not None:
+        renderers["orjson(model_dump())"] = orjson_render
+
+    for endpoint, model in payloads.items():
+        size_kb = len(dumps_bytes(model)) / 1024
+        print(f"\n{endpoint} ({size_kb:.0f} KB)")
+        baseline = None
+        for name, func in renderers.items():
+            samples = time_it(func, model, args.repeat)
+            median = statistics.median(samples)
+            baseline = baseline or median
+            print(f"  {name:<42} p50={median:8.2f} ms  p95={sorted(samples)[int(len(samples) * 0.95) - 1]:8.2f} ms  x{baseline / median:5.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,3 +10,217 @@ GEMINI_MODEL = "gemini-2.5-flash"
 
 FASTAPI_HOST = "localhost"
 FASTAPI_PORT = 8000
+
+# Token para los endpoints de administracion (si no se define, quedan deshabilitados)
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+# Circuit breaker compartido por las llamadas a Gemini
+LLM_BREAKER_WINDOW_SIZE = int(os.getenv("LLM_BREAKER_WINDOW_SIZE", "20"))
+LLM_BREAKER_MIN_CALLS = int(os.getenv("LLM_BREAKER_MIN_CALLS", "5"))
+LLM_BREAKER_FAILURE_RATE = float(os.getenv("LLM_BREAKER_FAILURE_RATE", "0.5"))
+LLM_BREAKER_SLOW_CALL_SECONDS = float(os.getenv("LLM_BREAKER_SLOW_CALL_SECONDS", "15"))
+LLM_BREAKER_SLOW_CALL_RATE = float(os.getenv("LLM_BREAKER_SLOW_CALL_RATE", "0.8"))
+LLM_BREAKER_OPEN_SECONDS = float(os.getenv("LLM_BREAKER_OPEN_SECONDS", "30"))
+LLM_BREAKER_HALF_OPEN_CALLS = int(os.getenv("LLM_BREAKER_HALF_OPEN_CALLS", "2"))
+
+# Presupuesto de tiempo por solicitud (segundos). Se puede acotar con el header X-Request-Timeout-Ms
+REQUEST_DEADLINES = {
+    "create_plan": float(os.getenv("DEADLINE_CREATE_PLAN", "45")),
+    "regenerate_plan": float(os.getenv("DEADLINE_REGENERATE_PLAN", "45")),
+    "execute_plan": float(os.getenv("DEADLINE_EXECUTE_PLAN", "90")),
+    "register_student": float(os.getenv("DEADLINE_REGISTER_STUDENT", "5")),
+    "default": float(os.getenv("DEADLINE_DEFAULT", "10"))
+}
+REQUEST_DEADLINE_MAX_SECONDS = float(os.getenv("REQUEST_DEADLINE_MAX_SECONDS", "120"))
+# Tiempo minimo que se concede a una operacion de base de datos aunque el presupuesto se haya agotado,
+# para poder persistir los resultados deterministas
+DEADLINE_MIN_DB_SECONDS = float(os.getenv("DEADLINE_MIN_DB_SECONDS", "0.5"))
+LLM_CALL_WORKERS = int(os.getenv("LLM_CALL_WORKERS", "16"))
+# Una llamada al LLM que vence sigue ocupando su hilo hasta terminar; con este numero de llamadas
+# abandonadas en curso las nuevas fallan de inmediato (y usan el modo automatico) en vez de esperar
+LLM_MAX_ABANDONED_CALLS = int(os.getenv("LLM_MAX_ABANDONED_CALLS", str(max(1, LLM_CALL_WORKERS // 2))))
+
+# Cache de respuestas para endpoints de listado
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "5"))
+RESPONSE_CACHE_STALE_SECONDS = float(os.getenv("RESPONSE_CACHE_STALE_SECONDS", "30"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "256"))
+
+# Pool de conexiones de MongoDB (los valores vacios usan el default de pymongo o el de la URI)
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_MAX_IDLE_TIME_MS = os.getenv("MONGO_MAX_IDLE_TIME_MS")
+MONGO_WAIT_QUEUE_TIMEOUT_MS = os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "2000")
+MONGO_SERVER_SELECTION_TIMEOUT_MS = os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000")
+MONGO_CONNECT_TIMEOUT_MS = os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000")
+MONGO_SOCKET_TIMEOUT_MS = os.getenv("MONGO_SOCKET_TIMEOUT_MS")
+# Lista separada por comas, p. ej. "zstd,snappy,zlib" (zstd y snappy requieren paquetes extra)
+MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "")
+MONGO_ZLIB_COMPRESSION_LEVEL = os.getenv("MONGO_ZLIB_COMPRESSION_LEVEL")
+
+# Preferencia de lectura para los endpoints de listado; escrituras y chequeos de cupo van siempre al primario.
+# "secondaryPreferred" descarga el primario a cambio de listados que pueden llegar con retraso
+MONGO_LISTING_READ_PREFERENCE = os.getenv("MONGO_LISTING_READ_PREFERENCE", "primary")
+# Retraso maximo tolerado en secundarios (-1 sin limite; MongoDB exige minimo 90)
+MONGO_MAX_STALENESS_SECONDS = int(os.getenv("MONGO_MAX_STALENESS_SECONDS", "-1"))
+# Tras escribir en una coleccion, sus lecturas de listado van al primario durante este tiempo
+MONGO_PRIMARY_AFTER_WRITE_SECONDS = float(os.getenv("MONGO_PRIMARY_AFTER_WRITE_SECONDS", "5"))
+
+# Arranque: la reconciliacion de indices y la carga del LLM corren en segundo plano
+DB_INIT_RETRY_SECONDS = float(os.getenv("DB_INIT_RETRY_SECONDS", "5"))
+LLM_WARMUP_ON_STARTUP = os.getenv("LLM_WARMUP_ON_STARTUP", "true").lower() == "true"
+
+# Motor de almacenamiento del DatabaseAgent: "mongo" o "memory" (en proceso, para pruebas de carga y benchmarks)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "mongo")
+
+# Proveedor del LLM: "gemini" o "local" (modelo simulado sin red, ver utils/local_llm.py)
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "gemini")
+LOCAL_LLM_LATENCY_MS = float(os.getenv("LOCAL_LLM_LATENCY_MS", "800"))
+# Distribucion de latencia: fixed, uniform, normal o lognormal (LOCAL_LLM_LATENCY_MS es la mediana)
+LOCAL_LLM_LATENCY_DISTRIBUTION = os.getenv("LOCAL_LLM_LATENCY_DISTRIBUTION", "lognormal")
+LOCAL_LLM_LATENCY_JITTER_MS = float(os.getenv("LOCAL_LLM_LATENCY_JITTER_MS", "200"))
+LOCAL_LLM_LATENCY_SIGMA = float(os.getenv("LOCAL_LLM_LATENCY_SIGMA", "0.5"))
+LOCAL_LLM_ERROR_RATE = float(os.getenv("LOCAL_LLM_ERROR_RATE", "0"))
+LOCAL_LLM_MALFORMED_RATE = float(os.getenv("LOCAL_LLM_MALFORMED_RATE", "0"))
+LOCAL_LLM_FENCED_RATE = float(os.getenv("LOCAL_LLM_FENCED_RATE", "0"))
+LOCAL_LLM_SEED = int(os.getenv("LOCAL_LLM_SEED")) if os.getenv("LOCAL_LLM_SEED") else None
+
+# Profiling: X-Profile por solicitud (requiere ADMIN_TOKEN; sin el queda deshabilitado) y muestreo de las mas lentas
+PROFILING_SAMPLER_ENABLED = os.getenv("PROFILING_SAMPLER_ENABLED", "false").lower() == "true"
+PROFILING_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILING_SAMPLE_INTERVAL_MS", "10"))
+PROFILING_SLOWEST_N = int(os.getenv("PROFILING_SLOWEST_N", "20"))
+PROFILING_MAX_ON_DEMAND = int(os.getenv("PROFILING_MAX_ON_DEMAND", "20"))
+
+# Bus de mensajes A2A/ANP: buzones acotados por agente, entrega por prioridad fuera de la solicitud
+MESSAGE_BUS_ENABLED = os.getenv("MESSAGE_BUS_ENABLED", "true").lower() == "true"
+MESSAGE_BUS_MAILBOX_SIZE = int(os.getenv("MESSAGE_BUS_MAILBOX_SIZE", "1000"))
+# Espera maxima del emisor con el buzon lleno; despues el mensaje se entrega en su propio hilo
+MESSAGE_BUS_PUBLISH_TIMEOUT_MS = float(os.getenv("MESSAGE_BUS_PUBLISH_TIMEOUT_MS", "100"))
+MESSAGE_BUS_DRAIN_TIMEOUT_SECONDS = float(os.getenv("MESSAGE_BUS_DRAIN_TIMEOUT_SECONDS", "5"))
+
+# Ejecucion de planes: "parallel" (hasta TASK_MAX_PARALLEL tareas listas a la vez) o "sequential"
+TASK_EXECUTION_MODE = os.getenv("TASK_EXECUTION_MODE", "parallel")
+TASK_MAX_PARALLEL = int(os.getenv("TASK_MAX_PARALLEL", "4"))
+# Duraciones historicas por parameters.action para el orden por camino critico
+TASK_DURATION_STATS_TTL_SECONDS = float(os.getenv("TASK_DURATION_STATS_TTL_SECONDS", "60"))
+TASK_DEFAULT_DURATION_SECONDS = float(os.getenv("TASK_DEFAULT_DURATION_SECONDS", "1"))
+
+# Checkpoints de ejecucion: el lease se renueva con cada tarea y debe superar la duracion de la mas lenta
+EXECUTION_LEASE_SECONDS = float(os.getenv("EXECUTION_LEASE_SECONDS", "120"))
+# Cada cuanto se buscan ejecuciones con el lease vencido para reanudarlas (0 desactiva el reaper)
+EXECUTION_REAPER_INTERVAL_SECONDS = float(os.getenv("EXECUTION_REAPER_INTERVAL_SECONDS", "30"))
+
+# Idempotency-Key en POST /api/plan, /api/execute y /api/students/register
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+# Espera maxima de un duplicado concurrente por la respuesta de la solicitud original
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "90"))
+# Pasado este tiempo un registro en curso se considera abandonado y otra solicitud lo retoma
+IDEMPOTENCY_LOCK_SECONDS = float(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "180"))
+IDEMPOTENCY_POLL_INTERVAL_MS = float(os.getenv("IDEMPOTENCY_POLL_INTERVAL_MS", "200"))
+
+# Lecturas puntuales (ACP read): single-flight de consultas identicas concurrentes y cache de "no encontrado"
+READ_SINGLE_FLIGHT_ENABLED = os.getenv("READ_SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+# Corto a proposito: las escrituras de otros procesos no invalidan el cache local
+NEGATIVE_CACHE_TTL_SECONDS = float(os.getenv("NEGATIVE_CACHE_TTL_SECONDS", "2"))
+NEGATIVE_CACHE_MAX_ENTRIES = int(os.getenv("NEGATIVE_CACHE_MAX_ENTRIES", "10000"))
+
+# Control de admision: carriles por prioridad con limite de concurrencia y token bucket opcional por cliente
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+# Solicitudes en curso entre todos los carriles (debajo de los 40 hilos del threadpool de anyio)
+ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "32"))
+# Header que identifica al cliente para el token bucket (p. ej. x-forwarded-for detras de un proxy); vacio usa la IP
+ADMISSION_CLIENT_HEADER = os.getenv("ADMISSION_CLIENT_HEADER", "").lower()
+ADMISSION_MAX_CLIENTS = int(os.getenv("ADMISSION_MAX_CLIENTS", "10000"))
+# Por carril: prioridad (mayor primero), concurrencia, cola maxima, espera objetivo en cola y tasa/rafaga por cliente.
+# La suma de las concurrencias supera el limite global, pero ningun carril lo ocupa entero para no dejar sin lugar al resto.
+# Las tasas por cliente vienen en 0 (sin limite): el cliente se identifica por IP y detras de un NAT o de
+# un proxy toda una escuela comparte la misma. Activarlas solo con ADMISSION_CLIENT_HEADER de confianza
+ADMISSION_LANES = {
+    "registration": {
+        "priority": 3,
+        "max_concurrency": int(os.getenv("ADMISSION_REGISTRATION_CONCURRENCY", "24")),
+        "max_queue": int(os.getenv("ADMISSION_REGISTRATION_QUEUE", "500")),
+        "queue_target_ms": float(os.getenv("ADMISSION_REGISTRATION_QUEUE_TARGET_MS", "500")),
+        "rate_per_second": float(os.getenv("ADMISSION_REGISTRATION_RATE", "0")),
+        "burst": float(os.getenv("ADMISSION_REGISTRATION_BURST", "10"))
+    },
+    "default": {
+        "priority": 2,
+        "max_concurrency": int(os.getenv("ADMISSION_DEFAULT_CONCURRENCY", "16")),
+        "max_queue": int(os.getenv("ADMISSION_DEFAULT_QUEUE", "200")),
+        "queue_target_ms": float(os.getenv("ADMISSION_DEFAULT_QUEUE_TARGET_MS", "1000")),
+        "rate_per_second": float(os.getenv("ADMISSION_DEFAULT_RATE", "0")),
+        "burst": float(os.getenv("ADMISSION_DEFAULT_BURST", "40"))
+    },
+    "llm": {
+        "priority": 1,
+        "max_concurrency": int(os.getenv("ADMISSION_LLM_CONCURRENCY", "8")),
+        "max_queue": int(os.getenv("ADMISSION_LLM_QUEUE", "20")),
+        "queue_target_ms": float(os.getenv("ADMISSION_LLM_QUEUE_TARGET_MS", "2000")),
+        "rate_per_second": float(os.getenv("ADMISSION_LLM_RATE", "0")),
+        "burst": float(os.getenv("ADMISSION_LLM_BURST", "5"))
+    }
+}
+
+# Inscripciones: "sync" (confirmacion en la solicitud) o "queued" (ticket pendiente y confirmacion por lotes)
+REGISTRATION_INTAKE_MODE = os.getenv("REGISTRATION_INTAKE_MODE", "sync")
+REGISTRATION_INTAKE_BATCH_SIZE = int(os.getenv("REGISTRATION_INTAKE_BATCH_SIZE", "200"))
+# Espera tras la primera inscripcion para juntar un lote mas grande
+REGISTRATION_INTAKE_LINGER_MS = float(os.getenv("REGISTRATION_INTAKE_LINGER_MS", "20"))
+# Sondeo de la cola (tickets encolados por otros procesos)
+REGISTRATION_INTAKE_POLL_INTERVAL_MS = float(os.getenv("REGISTRATION_INTAKE_POLL_INTERVAL_MS", "500"))
+# Un lote tomado por un proceso que no termino en este tiempo vuelve a la cola
+REGISTRATION_INTAKE_CLAIM_TIMEOUT_SECONDS = float(os.getenv("REGISTRATION_INTAKE_CLAIM_TIMEOUT_SECONDS", "30"))
+REGISTRATION_TICKET_TTL_SECONDS = int(os.getenv("REGISTRATION_TICKET_TTL_SECONDS", "86400"))
+
+# Retencion de logs, notificaciones y ejecuciones (campo stored_at, fecha nativa):
+# - "ttl": un indice TTL borra cada documento pasados "days" dias
+# - "archive": el job de archivo mueve a <coleccion>_archive los documentos con
+#   mas de "days" dias; el indice TTL queda como respaldo en days + RETENTION_ARCHIVE_GRACE_DAYS
+# - "capped": coleccion de tamaño fijo, solo para logs (se aplica al crearla; Mongo no admite borrados ni crecer documentos)
+RETENTION_POLICIES = {
+    "logs": {
+        "mode": os.getenv("LOGS_RETENTION_MODE", "ttl"),
+        "days": float(os.getenv("LOGS_RETENTION_DAYS", "30")),
+        "capped_bytes": int(os.getenv("LOGS_CAPPED_MB", "256")) * 1024 * 1024,
+        "capped_max": int(os.getenv("LOGS_CAPPED_MAX_DOCUMENTS", "0")) or None
+    },
+    "notifications": {
+        "mode": os.getenv("NOTIFICATIONS_RETENTION_MODE", "ttl"),
+        "days": float(os.getenv("NOTIFICATIONS_RETENTION_DAYS", "90"))
+    },
+    "executions": {
+        "mode": os.getenv("EXECUTIONS_RETENTION_MODE", "ttl"),
+        "days": float(os.getenv("EXECUTIONS_RETENTION_DAYS", "180"))
+    }
+}
+RETENTION_ARCHIVE_GRACE_DAYS = float(os.getenv("RETENTION_ARCHIVE_GRACE_DAYS", "7"))
+# 0 desactiva el job de archivo
+RETENTION_ARCHIVE_INTERVAL_SECONDS = float(os.getenv("RETENTION_ARCHIVE_INTERVAL_SECONDS", "3600"))
+RETENTION_ARCHIVE_BATCH_SIZE = int(os.getenv("RETENTION_ARCHIVE_BATCH_SIZE", "1000"))
+# Compresion de bloques de WiredTiger para las colecciones de archivo
+RETENTION_ARCHIVE_BLOCK_COMPRESSOR = os.getenv("RETENTION_ARCHIVE_BLOCK_COMPRESSOR", "zstd")
+
+# Compresion de respuestas: br (si el paquete brotli esta instalado) o gzip segun Accept-Encoding
+RESPONSE_COMPRESSION_ENABLED = os.getenv("RESPONSE_COMPRESSION_ENABLED", "true").lower() == "true"
+# Por debajo de este tamaño comprimir cuesta mas de lo que ahorra
+RESPONSE_COMPRESSION_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", "1024"))
+RESPONSE_GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", "5"))
+RESPONSE_BROTLI_QUALITY = int(os.getenv("RESPONSE_BROTLI_QUALITY", "4"))
+# Respuestas AG-UI en MessagePack para clientes con Accept: application/msgpack (requiere el paquete msgpack)
+RESPONSE_MSGPACK_ENABLED = os.getenv("RESPONSE_MSGPACK_ENABLED", "true").lower() == "true"
+
+# Transporte de las tareas del Ejecutor: "inprocess" (mismo proceso) o "socket"
+# (procesos worker con ExecutionAgent, ver scripts/agent_worker.py)
+EXECUTION_TRANSPORT = os.getenv("EXECUTION_TRANSPORT", "inprocess")
+# Direcciones de las replicas, separadas por coma: "unix:/ruta.sock" o "tcp:host:puerto"
+EXECUTION_WORKER_ADDRESSES = [address.strip() for address in os.getenv("EXECUTION_WORKER_ADDRESSES", "").split(",") if address.strip()]
+# Si no hay direcciones, la API lanza esta cantidad de workers locales en sockets Unix
+# (con varios procesos de API, lanzar los workers aparte y listar sus direcciones)
+EXECUTION_WORKER_SPAWN = int(os.getenv("EXECUTION_WORKER_SPAWN", "2"))
+EXECUTION_WORKER_SOCKET_DIR = os.getenv("EXECUTION_WORKER_SOCKET_DIR", "/tmp/agentes")
+EXECUTION_WORKER_STARTUP_TIMEOUT_SECONDS = float(os.getenv("EXECUTION_WORKER_STARTUP_TIMEOUT_SECONDS", "30"))
+# Conexiones persistentes por replica y espera maxima de una respuesta sin deadline
+TRANSPORT_POOL_SIZE = int(os.getenv("TRANSPORT_POOL_SIZE", "8"))
+TRANSPORT_TIMEOUT_SECONDS = float(os.getenv("TRANSPORT_TIMEOUT_SECONDS", "60"))
+# Tiempo fuera del balanceo de una replica que no acepto la conexion
+TRANSPORT_RETRY_SECONDS = float(os.getenv("TRANSPORT_RETRY_SECONDS", "5"))
@@ -1,21 +1,74 @@
-from fastapi import FastAPI, HTTPException
+import time
+# Inicio de la importacion del modulo, para el reporte de tiempos de arranque
+_IMPORT_STARTED_AT = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, Header, Response, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Dict, Any, List, Optional
 from contextlib import asynccontextmanager
 import uuid
+import hmac
 from datetime import datetime
 import sys
 import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from config.settings import GEMINI_API_KEY, MONGODB_URI
+from config.settings import (
+    GEMINI_API_KEY,
+    MONGODB_URI,
+    ADMIN_TOKEN,
+    RESPONSE_CACHE_TTL_SECONDS,
+    RESPONSE_CACHE_STALE_SECONDS,
+    RESPONSE_CACHE_MAX_ENTRIES,
+    MONGO_LISTING_READ_PREFERENCE,
+    DB_INIT_RETRY_SECONDS,
+    LLM_WARMUP_ON_STARTUP,
+    EXECUTION_REAPER_INTERVAL_SECONDS,
+    MESSAGE_BUS_ENABLED,
+    MESSAGE_BUS_MAILBOX_SIZE,
+    MESSAGE_BUS_PUBLISH_TIMEOUT_MS,
+    MESSAGE_BUS_DRAIN_TIMEOUT_SECONDS,
+    ADMISSION_ENABLED,
+    ADMISSION_MAX_CONCURRENCY,
+    ADMISSION_CLIENT_HEADER,
+    ADMISSION_MAX_CLIENTS,
+    ADMISSION_LANES,
+    REGISTRATION_INTAKE_MODE,
+    RETENTION_ARCHIVE_INTERVAL_SECONDS,
+    RESPONSE_COMPRESSION_ENABLED,
+    RESPONSE_COMPRESSION_MIN_BYTES,
+    RESPONSE_GZIP_LEVEL,
+    RESPONSE_BROTLI_QUALITY,
+    EXECUTION_TRANSPORT,
+    EXECUTION_WORKER_ADDRESSES,
+    EXECUTION_WORKER_SPAWN,
+    EXECUTION_WORKER_SOCKET_DIR,
+    EXECUTION_WORKER_STARTUP_TIMEOUT_SECONDS,
+    TRANSPORT_POOL_SIZE,
+    TRANSPORT_TIMEOUT_SECONDS,
+    TRANSPORT_RETRY_SECONDS
+)
 from agents.database_agent import DatabaseAgent
 from agents.planning_agent import PlanningAgent
 from agents.execution_agent import ExecutionAgent
 from agents.notification_agent import NotificationAgent
 from protocols.ag_ui import AGUIProtocol
+from utils.circuit_breaker import gemini_breaker
+from utils.deadline import Deadline, llm_call_pool
+from utils.responses import AGUIJSONResponse
+from utils.response_cache import ResponseCache
+from utils.message_bus import MessageBus
+from utils.idempotency import IdempotencyStore
+from utils.admission import AdmissionController, AdmissionMiddleware
+from utils.compression import ResponseCompressor, CompressionMiddleware
+from utils.registration_intake import RegistrationIntake
+from utils.transport import SocketTransport, LoadBalancedTransport
+from utils.worker_pool import WorkerPool
+from utils.startup import startup_timer
+from utils.profiling import ProfiledRoute, request_profiler, to_pstats, to_speedscope
 
 
 database_agent = None
@@ -23,36 +76,137 @@ planning_agent = None
 execution_agent = None
 notification_agent = None
 agui_protocol = None
+idempotency_store = None
+registration_intake = None
+execution_worker_pool = None
+response_cache = ResponseCache(
+    ttl_seconds=RESPONSE_CACHE_TTL_SECONDS,
+    stale_seconds=RESPONSE_CACHE_STALE_SECONDS,
+    max_entries=RESPONSE_CACHE_MAX_ENTRIES
+)
+message_bus = MessageBus(
+    mailbox_size=MESSAGE_BUS_MAILBOX_SIZE,
+    publish_timeout_ms=MESSAGE_BUS_PUBLISH_TIMEOUT_MS,
+    enabled=MESSAGE_BUS_ENABLED
+)
+admission_controller = AdmissionController(
+    ADMISSION_LANES,
+    max_concurrency=ADMISSION_MAX_CONCURRENCY,
+    client_header=ADMISSION_CLIENT_HEADER,
+    max_clients=ADMISSION_MAX_CLIENTS,
+    enabled=ADMISSION_ENABLED
+)
+response_compressor = ResponseCompressor(
+    minimum_size=RESPONSE_COMPRESSION_MIN_BYTES,
+    gzip_level=RESPONSE_GZIP_LEVEL,
+    brotli_quality=RESPONSE_BROTLI_QUALITY,
+    enabled=RESPONSE_COMPRESSION_ENABLED
+)
+_IMPORTS_DONE_AT = time.perf_counter()
+
+
+def _warmup_llms():
+    """Importar langchain e instanciar los modelos antes de la primera solicitud"""
+    planning_agent.llm
+    if execution_agent.task_transport is None:
+        execution_agent.llm
+
+
+def _start_execution_workers():
+    """Enviar las tareas del Ejecutor a sus replicas worker, lanzandolas si no hay direcciones configuradas"""
+    global execution_worker_pool
+    addresses = EXECUTION_WORKER_ADDRESSES
+    if not addresses:
+        addresses = [
+            f"unix:{os.path.join(EXECUTION_WORKER_SOCKET_DIR, f'ejecutor-{index + 1}.sock')}"
+            for index in range(EXECUTION_WORKER_SPAWN)
+        ]
+        execution_worker_pool = WorkerPool("execution", addresses, EXECUTION_WORKER_STARTUP_TIMEOUT_SECONDS)
+        execution_worker_pool.start()
+    
+    execution_agent.set_task_transport(LoadBalancedTransport(
+        [SocketTransport(address, TRANSPORT_POOL_SIZE, TRANSPORT_TIMEOUT_SECONDS) for address in addresses],
+        TRANSPORT_RETRY_SECONDS
+    ))
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global database_agent, planning_agent, execution_agent, notification_agent, agui_protocol
-    database_agent = DatabaseAgent(MONGODB_URI)
-    planning_agent = PlanningAgent(GEMINI_API_KEY)
-    execution_agent = ExecutionAgent(GEMINI_API_KEY)
-    notification_agent = NotificationAgent()
-    agui_protocol = AGUIProtocol()
+    global database_agent, planning_agent, execution_agent, notification_agent, agui_protocol, idempotency_store
+    global registration_intake
+    startup_timer.record("import", _IMPORTS_DONE_AT - _IMPORT_STARTED_AT)
+    
+    # MongoClient no bloquea: la conexion se establece en segundo plano
+    with startup_timer.phase("connect"):
+        database_agent = DatabaseAgent(MONGODB_URI, initialize=False)
+    
+    with startup_timer.phase("agents"):
+        planning_agent = PlanningAgent(GEMINI_API_KEY)
+        execution_agent = ExecutionAgent(GEMINI_API_KEY)
+        notification_agent = NotificationAgent()
+        agui_protocol = AGUIProtocol()
+        idempotency_store = IdempotencyStore(database_agent)
+        registration_intake = RegistrationIntake(database_agent, _on_registrations_committed)
+        
+        # Conectar database_agent con planning_agent para cargar planes
+        planning_agent.set_database_agent(database_agent)
+        
+        # Cada escritura invalida las respuestas cacheadas que dependen de esa coleccion
+        database_agent.add_write_listener(response_cache.invalidate_tags)
+        
+        # Los mensajes A2A hacia el Notificador se entregan fuera del camino de la solicitud
+        message_bus.register(notification_agent.agent_name, notification_agent.receive_event)
+        await message_bus.start()
     
-    # Conectar database_agent con planning_agent para cargar planes
-    planning_agent.set_database_agent(database_agent)
+    # Tareas del Ejecutor en procesos aparte: el LLM no compite con la API por el GIL ni el threadpool
+    if EXECUTION_TRANSPORT == "socket":
+        with startup_timer.phase("workers"):
+            _start_execution_workers()
+    
+    # Fuera del camino critico: indices (marca /api/health/ready) y carga del LLM
+    startup_timer.run_background("indexes", database_agent.initialize_with_retry, DB_INIT_RETRY_SECONDS)
+    if LLM_WARMUP_ON_STARTUP:
+        startup_timer.run_background("llm_warmup", _warmup_llms)
+    # Reanuda ejecuciones con el lease vencido (proceso caido o solicitud abortada)
+    if EXECUTION_REAPER_INTERVAL_SECONDS > 0:
+        execution_agent.start_reaper(database_agent, _finalize_resumed_execution, EXECUTION_REAPER_INTERVAL_SECONDS)
+    # Mueve a las colecciones de archivo los documentos vencidos (politicas "archive")
+    if RETENTION_ARCHIVE_INTERVAL_SECONDS > 0:
+        database_agent.start_archiver(RETENTION_ARCHIVE_INTERVAL_SECONDS)
+    # Confirma por lotes las inscripciones encoladas
+    if REGISTRATION_INTAKE_MODE == "queued":
+        registration_intake.start()
     
     print("INFO:     Todos los agentes inicializados correctamente")
+    startup_timer.mark_serving()
     yield
+    registration_intake.stop()
+    execution_agent.close()
+    if execution_worker_pool is not None:
+        execution_worker_pool.stop()
+    await message_bus.stop(MESSAGE_BUS_DRAIN_TIMEOUT_SECONDS)
     database_agent.close()
 
 
 app = FastAPI(
     title="Sistema Multiagente para Eventos Escolares",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=AGUIJSONResponse
 )
+# Todas las rutas pasan por el profiler (X-Profile o muestreo de las solicitudes mas lentas)
+app.router.route_class = ProfiledRoute
 
+# Se agrega antes que CORS para que los 429/503 tambien lleven sus headers
+app.add_middleware(AdmissionMiddleware, controller=admission_controller)
+# Fuera de la admision: comprimir no ocupa un lugar del carril
+app.add_middleware(CompressionMiddleware, compressor=response_compressor)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:5173", "http://localhost:3000"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Profile-Id", "Idempotent-Replayed", "Retry-After"],
 )
 
 
@@ -66,6 +220,14 @@ class EventRequest(BaseModel):
     organizer_email: str
 
 
+class EventUpdateRequest(BaseModel):
+    event_name: Optional[str] = None
+    event_date: Optional[str] = None
+    expected_attendees: Optional[int] = None
+    budget: Optional[float] = None
+    description: Optional[str] = None
+
+
 class UserRequest(BaseModel):
     name: str
     email: str
@@ -84,6 +246,34 @@ class StudentRegistrationRequest(BaseModel):
     event_id: str
 
 
+def _collection_etag(resource: str, collections: List[str]) -> str:
+    """ETag derivado de las versiones persistidas de las colecciones.
+    
+    Las escriben todos los procesos que pasan por el agente de base de datos
+    (workers, intake, scripts), asi la ETag cambia aunque la escritura venga de otro proceso.
+    Los endpoints con response_cache incluyen la ETag en la clave de cache, porque
+    la invalidacion por listeners solo ve las escrituras de este proceso.
+    """
+    versions = "-".join(database_agent.get_collection_version(name) for name in collections)
+    return f'W/"{resource}-{versions}"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def _etag_headers(etag: str) -> Dict[str, str]:
+    # no-cache: el navegador guarda la respuesta pero revalida siempre con If-None-Match
+    return {"ETag": etag, "Cache-Control": "no-cache"}
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=_etag_headers(etag))
+
+
 @app.get("/")
 def root():
     return {
@@ -94,9 +284,132 @@ def root():
     }
 
 
+def _save_new_event(event_request: EventRequest, deadline: Deadline):
+    """Crear el documento del evento en estado de planificacion"""
+    event_details = event_request.model_dump()
+    event_details["event_id"] = str(uuid.uuid4())
+    event_details["status"] = "planning"
+    event_details["available_for_registration"] = False
+    event_details["created_at"] = datetime.now().isoformat()
+    
+    event_acp_msg = database_agent.acp_protocol.create_write_request(
+        message_id=str(uuid.uuid4()),
+        sender="UI",
+        collection="events",
+        data=event_details
+    )
+    db_response = database_agent.process_acp_message(event_acp_msg.model_dump(), deadline)
+    
+    if db_response.status == "success":
+        _increment_dashboard_stats(deadline, total_events=1)
+    
+    return event_details, db_response
+
+
+def _refresh_available_event(event: Dict[str, Any], deadline: Optional[Deadline]):
+    """Crear o recalcular la entrada del evento en la proyeccion available_events"""
+    acp_registrations = database_agent.acp_protocol.create_query_request(
+        message_id=str(uuid.uuid4()),
+        sender="Ejecutor",
+        collection="student_registrations",
+        query_filter={"event_id": event.get("event_id")},
+        projection={"_id": 1}
+    )
+    registrations_response = database_agent.process_acp_message(acp_registrations.model_dump(), deadline)
+    current_registrations = len(registrations_response.data or [])
+    
+    acp_view = database_agent.acp_protocol.create_update_request(
+        message_id=str(uuid.uuid4()),
+        sender="Ejecutor",
+        collection="available_events",
+        query_filter={"event_id": event.get("event_id")},
+        update_data=DatabaseAgent.build_available_event_view(event, current_registrations),
+        upsert=True
+    )
+    view_response = database_agent.process_acp_message(acp_view.model_dump(), deadline)
+    if view_response.status != "success":
+        print(f"Error actualizando available_events: {view_response.error_message}")
+
+
+def _adjust_seats_left(event_id: str, delta: int, deadline: Optional[Deadline]):
+    """Mover el contador de cupos que reserva la cola de inscripciones (si el evento ya lo tiene)"""
+    acp_seats = database_agent.acp_protocol.create_update_request(
+        message_id=str(uuid.uuid4()),
+        sender="Ejecutor",
+        collection="events",
+        query_filter={"event_id": event_id, "seats_left": {"$exists": True}},
+        increment_data={"seats_left": delta}
+    )
+    seats_response = database_agent.process_acp_message(acp_seats.model_dump(), deadline)
+    if seats_response.status != "success":
+        print(f"Error actualizando cupos del evento {event_id}: {seats_response.error_message}")
+
+
+def _record_available_event_registration(event_id: str, deadline: Optional[Deadline], count: int = 1):
+    """Descontar count cupos en la proyeccion available_events tras una o varias inscripciones"""
+    acp_view = database_agent.acp_protocol.create_update_request(
+        message_id=str(uuid.uuid4()),
+        sender="Ejecutor",
+        collection="available_events",
+        query_filter={"event_id": event_id},
+        increment_data={"current_registrations": count, "available_spots": -count}
+    )
+    view_response = database_agent.process_acp_message(acp_view.model_dump(), deadline)
+    if view_response.status != "success":
+        print(f"Error actualizando available_events: {view_response.error_message}")
+        return
+    
+    acp_full = database_agent.acp_protocol.create_update_request(
+        message_id=str(uuid.uuid4()),
+        sender="Ejecutor",
+        collection="available_events",
+        query_filter={"event_id": event_id, "available_spots": {"$lte": 0}, "is_full": False},
+        update_data={"available_spots": 0, "is_full": True}
+    )
+    database_agent.process_acp_message(acp_full.model_dump(), deadline)
+
+
+def _increment_dashboard_stats(deadline: Optional[Deadline], **counters: int):
+    """Actualizar con $inc el documento materializado de estadisticas.
+    
+    Sin upsert: si el documento aun no existe se reconstruye desde los conteos
+    reales (que ya incluyen esta escritura) en vez de crearlo solo con el incremento.
+    """
+    acp_stats = database_agent.acp_protocol.create_update_request(
+        message_id=str(uuid.uuid4()),
+        sender="Database",
+        collection="stats",
+        query_filter={"stat_id": "dashboard"},
+        increment_data=counters
+    )
+    stats_response = database_agent.process_acp_message(acp_stats.model_dump(), deadline)
+    if stats_response.status != "success":
+        print(f"Error actualizando estadisticas: {stats_response.error_message}")
+    elif not stats_response.data.get("matched_count"):
+        database_agent.rebuild_dashboard_stats()
+
+
+@app.get("/api/health/ready")
+def readiness():
+    """Readiness: responde 503 hasta que colecciones e indices esten reconciliados"""
+    ready = database_agent is not None and database_agent.ready.is_set()
+    status = database_agent.initialization_status if database_agent else {"status": "starting"}
+    return AGUIJSONResponse({"ready": ready, "database": status}, status_code=200 if ready else 503)
+
+
 @app.post("/api/plan")
-def create_plan(event_request: EventRequest):
+def create_plan(event_request: EventRequest, x_request_timeout_ms: Optional[str] = Header(default=None),
+                idempotency_key: Optional[str] = Header(default=None)):
+    # Un reintento con la misma Idempotency-Key recibe el mismo evento y plan, sin llamar al LLM
+    return idempotency_store.run(
+        "create_plan", idempotency_key, event_request.model_dump(),
+        lambda: _create_plan(event_request, x_request_timeout_ms)
+    )
+
+
+def _create_plan(event_request: EventRequest, x_request_timeout_ms: Optional[str]):
     try:
+        deadline = Deadline.for_endpoint("create_plan", x_request_timeout_ms)
         message_id = str(uuid.uuid4())
         
         agui_request = agui_protocol.create_request(
@@ -107,20 +420,8 @@ def create_plan(event_request: EventRequest):
             payload=event_request.model_dump()
         )
         
-        event_id = str(uuid.uuid4())
-        event_details = event_request.model_dump()
-        event_details["event_id"] = event_id
-        event_details["status"] = "planning"
-        event_details["available_for_registration"] = False
-        event_details["created_at"] = datetime.now().isoformat()
-        
-        event_acp_msg = database_agent.acp_protocol.create_write_request(
-            message_id=str(uuid.uuid4()),
-            sender="UI",
-            collection="events",
-            data=event_details
-        )
-        db_response = database_agent.process_acp_message(event_acp_msg.model_dump())
+        event_details, db_response = _save_new_event(event_request, deadline)
+        event_id = event_details["event_id"]
         
         if db_response.status != "success":
             agui_error = agui_protocol.create_response(
@@ -131,18 +432,18 @@ def create_plan(event_request: EventRequest):
                 status="error",
                 payload={"error": f"Error al guardar evento: {db_response.error_message}"}
             )
-            return agui_error.model_dump()
+            return AGUIJSONResponse(agui_error)
         
-        plan = planning_agent.generate_plan(event_details)
+        plan = planning_agent.generate_plan(event_details, deadline)
         
-        planning_agent.save_plan_to_database(database_agent, plan["plan_id"])
+        planning_agent.save_plan_to_database(database_agent, plan["plan_id"], deadline)
         
         notify_msg = planning_agent.notify_progress(
             notification_agent.agent_name,
             plan["plan_id"],
             f"Plan creado exitosamente con {plan['total_tasks']} tareas"
         )
-        notification_agent.receive_event(notify_msg)
+        message_bus.publish(notify_msg)
         
         notification_id = notification_agent.create_custom_notification(
             title="Plan Creado",
@@ -164,7 +465,7 @@ def create_plan(event_request: EventRequest):
             }
         )
         
-        return agui_response.model_dump()
+        return AGUIJSONResponse(agui_response)
         
     except Exception as e:
         agui_error = agui_protocol.create_response(
@@ -175,12 +476,155 @@ def create_plan(event_request: EventRequest):
             status="error",
             payload={"error": str(e)}
         )
-        return agui_error.model_dump()
+        return AGUIJSONResponse(agui_error)
+
+
+@app.post("/api/plan/stream")
+def create_plan_stream(event_request: EventRequest, execute_early: bool = Query(default=False),
+                       x_request_timeout_ms: Optional[str] = Header(default=None)):
+    """Crear evento y generar el plan en streaming (NDJSON de mensajes AG-UI).
+    
+    Cada tarea se envia como notificacion AG-UI en cuanto el Planificador la
+    termina de recibir de Gemini; la ultima linea es la respuesta AG-UI final.
+    Con execute_early=true el Ejecutor arranca las tareas sin dependencias
+    pendientes mientras llega el resto del plan; sus resultados exitosos se
+    guardan en el plan y la ejecucion posterior no los repite.
+    """
+    deadline = Deadline.for_endpoint("create_plan", x_request_timeout_ms)
+    
+    def task_result_notification(plan_id: str, event_id: str, result: Dict[str, Any]) -> str:
+        agui_result = agui_protocol.create_notification(
+            message_id=str(uuid.uuid4()),
+            sender="Ejecutor",
+            receiver="UI",
+            action="plan_task_result",
+            notification_level="info" if result.get("status") == "success" else "warning",
+            payload={"plan_id": plan_id, "event_id": event_id, "result": result}
+        )
+        return agui_result.model_dump_json() + "\n"
+    
+    def stream_plan():
+        try:
+            event_details, db_response = _save_new_event(event_request, deadline)
+            event_id = event_details["event_id"]
+            
+            if db_response.status != "success":
+                agui_error = agui_protocol.create_response(
+                    message_id=str(uuid.uuid4()),
+                    sender="Planificador",
+                    receiver="UI",
+                    action="Plan",
+                    status="error",
+                    payload={"error": f"Error al guardar evento: {db_response.error_message}"}
+                )
+                yield agui_error.model_dump_json() + "\n"
+                return
+            
+            plan = None
+            early = None
+            for item in planning_agent.generate_plan_stream(event_details, deadline):
+                if item["type"] == "task":
+                    if execute_early:
+                        if early is None:
+                            early = execution_agent.start_early_execution(item["plan_id"], database_agent, deadline)
+                        early.add_task(item["task"])
+                    agui_task = agui_protocol.create_notification(
+                        message_id=str(uuid.uuid4()),
+                        sender="Planificador",
+                        receiver="UI",
+                        action="plan_task",
+                        notification_level="info",
+                        payload={
+                            "plan_id": item["plan_id"],
+                            "event_id": event_id,
+                            "index": item["index"],
+                            "task": item["task"]
+                        }
+                    )
+                    yield agui_task.model_dump_json() + "\n"
+                    if early is not None:
+                        for result in early.drain():
+                            yield task_result_notification(item["plan_id"], event_id, result)
+                elif item["type"] == "fallback":
+                    # Gemini se corto a la mitad: avisar antes de las tareas automaticas que completan el plan
+                    agui_fallback = agui_protocol.create_notification(
+                        message_id=str(uuid.uuid4()),
+                        sender="Planificador",
+                        receiver="UI",
+                        action="plan_stream_interrupted",
+                        notification_level="warning",
+                        payload={
+                            "plan_id": item["plan_id"],
+                            "event_id": event_id,
+                            "reason": item["reason"],
+                            "streamed_tasks": item["streamed_tasks"],
+                            "fallback_tasks": item["fallback_tasks"]
+                        }
+                    )
+                    yield agui_fallback.model_dump_json() + "\n"
+                else:
+                    plan = item["plan"]
+            
+            if early is not None:
+                plan["reused_results"] = early.finish()
+                for result in early.drain():
+                    yield task_result_notification(plan["plan_id"], event_id, result)
+            
+            planning_agent.save_plan_to_database(database_agent, plan["plan_id"], deadline)
+            
+            completed_with_fallback = plan.get("completed_with_fallback", False)
+            summary = f"{plan['total_tasks']} tareas"
+            if completed_with_fallback:
+                summary += " (completado con tareas automaticas tras cortarse Gemini)"
+            
+            notify_msg = planning_agent.notify_progress(
+                notification_agent.agent_name,
+                plan["plan_id"],
+                f"Plan creado con {summary}" if completed_with_fallback else f"Plan creado exitosamente con {summary}"
+            )
+            message_bus.publish(notify_msg)
+            
+            notification_id = notification_agent.create_custom_notification(
+                title="Plan Creado",
+                body=f"Se ha creado un plan para el evento '{event_request.event_name}' con {summary}",
+                level="warning" if completed_with_fallback else "success",
+                data={"plan_id": plan["plan_id"], "event_id": event_id}
+            )
+            
+            agui_response = agui_protocol.create_response(
+                message_id=str(uuid.uuid4()),
+                sender="Planificador",
+                receiver="UI",
+                action="Plan",
+                status="success",
+                payload={
+                    "plan": plan,
+                    "event_id": event_id,
+                    "notification_id": notification_id
+                }
+            )
+            yield agui_response.model_dump_json() + "\n"
+            
+        except Exception as e:
+            agui_error = agui_protocol.create_response(
+                message_id=str(uuid.uuid4()),
+                sender="Planificador",
+                receiver="UI",
+                action="Plan",
+                status="error",
+                payload={"error": str(e)}
+            )
+            yield agui_error.model_dump_json() + "\n"
+    
+    return StreamingResponse(stream_plan(), media_type="application/x-ndjson")
 
 
 @app.post("/api/events/{event_id}/replan")
-def regenerate_plan(event_id: str):
+def regenerate_plan(event_id: str, changes: Optional[EventUpdateRequest] = None,
+                    full: bool = Query(default=False),
+                    x_request_timeout_ms: Optional[str] = Header(default=None)):
     try:
+        deadline = Deadline.for_endpoint("regenerate_plan", x_request_timeout_ms)
         message_id = str(uuid.uuid4())
         
         # Obtener el evento de la base de datos
@@ -191,7 +635,7 @@ def regenerate_plan(event_id: str):
             query_filter={"event_id": event_id}
         )
         
-        event_response = database_agent.process_acp_message(acp_message.model_dump())
+        event_response = database_agent.process_acp_message(acp_message.model_dump(), deadline)
         
         if event_response.status != "success" or not event_response.data:
             agui_error = agui_protocol.create_response(
@@ -202,29 +646,67 @@ def regenerate_plan(event_id: str):
                 status="error",
                 payload={"error": "Evento no encontrado"}
             )
-            return agui_error.model_dump()
+            return AGUIJSONResponse(agui_error)
         
         event_details = event_response.data
         
-        # Generar un nuevo plan
-        plan = planning_agent.generate_plan(event_details)
-        
-        # Guardar el nuevo plan en la base de datos
-        planning_agent.save_plan_to_database(database_agent, plan["plan_id"])
+        # Aplicar al evento los campos que el organizador cambio
+        updates = {
+            field: value for field, value in (changes.model_dump(exclude_none=True) if changes else {}).items()
+            if event_details.get(field) != value
+        }
+        if updates:
+            acp_update = database_agent.acp_protocol.create_update_request(
+                message_id=str(uuid.uuid4()),
+                sender="UI",
+                collection="events",
+                query_filter={"event_id": event_id},
+                update_data=updates
+            )
+            update_response = database_agent.process_acp_message(acp_update.model_dump(), deadline)
+            if update_response.status != "success":
+                raise RuntimeError(update_response.error_message)
+            if "expected_attendees" in updates:
+                _adjust_seats_left(event_id, updates["expected_attendees"] - event_details.get("expected_attendees", 0), deadline)
+            event_details = {**event_details, **updates}
+            if event_details.get("available_for_registration"):
+                _refresh_available_event(event_details, deadline)
+        
+        # Replanificar solo las tareas afectadas por los cambios respecto al plan anterior
+        previous_plan = planning_agent.get_latest_plan_for_event(database_agent, event_id, deadline)
+        plan = planning_agent.replan(previous_plan, event_details, deadline, force_full=full)
+        replan = plan["replan"]
+        
+        if replan["mode"] == "incremental":
+            # Los resultados exitosos de las tareas conservadas no se vuelven a ejecutar
+            kept_tasks = set(replan["kept_tasks"])
+            completed = execution_agent.get_last_completed_results(database_agent, plan["plan_id"], deadline)
+            plan["reused_results"] = {
+                task_id: result for task_id, result in completed.items()
+                if task_id in kept_tasks and result.get("status") == "success"
+            }
+            replan["reused_results"] = len(plan["reused_results"])
+            planning_agent.update_plan_in_database(database_agent, plan["plan_id"], deadline)
+        elif replan["mode"] == "full":
+            planning_agent.save_plan_to_database(database_agent, plan["plan_id"], deadline)
+        
+        if replan["mode"] == "unchanged":
+            summary = f"El plan del evento '{event_details.get('event_name')}' ya esta al dia"
+        elif replan["mode"] == "incremental":
+            summary = (f"Plan del evento '{event_details.get('event_name')}' actualizado: "
+                       f"{len(replan['regenerated_tasks'])} de {plan['total_tasks']} tareas regeneradas")
+        else:
+            summary = f"Se ha creado un nuevo plan para el evento '{event_details.get('event_name')}' con {plan['total_tasks']} tareas"
         
         # Notificar
-        notify_msg = planning_agent.notify_progress(
-            notification_agent.agent_name,
-            plan["plan_id"],
-            f"Nuevo plan generado para el evento '{event_details.get('event_name')}' con {plan['total_tasks']} tareas"
-        )
-        notification_agent.receive_event(notify_msg)
+        notify_msg = planning_agent.notify_progress(notification_agent.agent_name, plan["plan_id"], summary)
+        message_bus.publish(notify_msg)
         
         notification_id = notification_agent.create_custom_notification(
             title="Plan Regenerado",
-            body=f"Se ha creado un nuevo plan para el evento '{event_details.get('event_name')}' con {plan['total_tasks']} tareas",
+            body=summary,
             level="success",
-            data={"plan_id": plan["plan_id"], "event_id": event_id}
+            data={"plan_id": plan["plan_id"], "event_id": event_id, "replan_mode": replan["mode"]}
         )
         
         agui_response = agui_protocol.create_response(
@@ -236,11 +718,12 @@ def regenerate_plan(event_id: str):
             payload={
                 "plan": plan,
                 "event_id": event_id,
-                "notification_id": notification_id
+                "notification_id": notification_id,
+                "replan": replan
             }
         )
         
-        return agui_response.model_dump()
+        return AGUIJSONResponse(agui_response)
         
     except Exception as e:
         agui_error = agui_protocol.create_response(
@@ -251,12 +734,107 @@ def regenerate_plan(event_id: str):
             status="error",
             payload={"error": str(e)}
         )
-        return agui_error.model_dump()
+        return AGUIJSONResponse(agui_error)
+
+
+def _finalize_execution(plan: Dict[str, Any], execution_id: str, results: List[Dict[str, Any]],
+                        deadline: Optional[Deadline]):
+    """Notificar el fin de la ejecucion y, sin errores, abrir el evento a inscripciones"""
+    plan_id = plan["plan_id"]
+    
+    # Contar errores y exitos
+    error_count = sum(1 for r in results if r.get("status") == "error")
+    success_count = len(results) - error_count
+    
+    notify_msg = execution_agent.notify_status(
+        notification_agent.agent_name,
+        execution_id,
+        "completed",
+        {
+            "plan_id": plan_id, 
+            "results_count": len(results),
+            "success_count": success_count,
+            "error_count": error_count
+        }
+    )
+    message_bus.publish(notify_msg)
+    
+    # Si la ejecución fue exitosa (sin errores), marcar el evento como completado y disponible
+    if error_count == 0:
+        event_id = plan.get("event_details", {}).get("event_id")
+        if event_id:
+            # Actualizar el estado del evento a "completed" y "available_for_registration"
+            event_update = {
+                "status": "completed",
+                "available_for_registration": True,
+                "execution_completed_at": datetime.now().isoformat(),
+                "plan_execution_id": execution_id
+            }
+            
+            # Primero solo si aun no estaba disponible, para saber si hubo cambio de estado
+            acp_update = database_agent.acp_protocol.create_update_request(
+                message_id=str(uuid.uuid4()),
+                sender="Ejecutor",
+                collection="events",
+                query_filter={"event_id": event_id, "available_for_registration": {"$ne": True}},
+                update_data=dict(event_update)
+            )
+            update_response = database_agent.process_acp_message(acp_update.model_dump(), deadline)
+            
+            if update_response.status == "success" and update_response.rows_affected > 0:
+                _increment_dashboard_stats(deadline, available_events=1)
+            elif update_response.status == "success":
+                # El evento ya estaba disponible (re-ejecucion): solo refrescar los datos de ejecucion
+                acp_update = database_agent.acp_protocol.create_update_request(
+                    message_id=str(uuid.uuid4()),
+                    sender="Ejecutor",
+                    collection="events",
+                    query_filter={"event_id": event_id},
+                    update_data=dict(event_update)
+                )
+                update_response = database_agent.process_acp_message(acp_update.model_dump(), deadline)
+            
+            if update_response.status == "success":
+                _refresh_available_event({**plan.get("event_details", {}), **event_update}, deadline)
+                
+                # Crear notificación adicional sobre la disponibilidad para inscripciones
+                notification_agent.create_custom_notification(
+                    title="Evento Disponible para Inscripciones",
+                    body=f"El evento '{plan.get('event_details', {}).get('event_name')}' está ahora disponible para que los estudiantes se inscriban",
+                    level="info",
+                    data={"event_id": event_id, "plan_id": plan_id, "execution_id": execution_id}
+                )
+    
+    notification_id = notification_agent.create_custom_notification(
+        title="Ejecucion Completada",
+        body=f"Ejecutadas {len(results)} tareas: {success_count} exitosas, {error_count} con errores" + 
+             (" - Evento disponible para inscripciones" if error_count == 0 else ""),
+        level="success" if error_count == 0 else "warning",
+        data={"plan_id": plan_id, "execution_id": execution_id}
+    )
+    
+    return success_count, error_count, notification_id
+
+
+def _finalize_resumed_execution(execution: Dict[str, Any], results: List[Dict[str, Any]]):
+    """Cierre de una ejecucion reanudada por el reaper (sin solicitud que responder)"""
+    plan = planning_agent.get_plan(execution["plan_id"])
+    if plan:
+        _finalize_execution(plan, execution["execution_id"], results, Deadline.for_endpoint("execute_plan"))
 
 
 @app.post("/api/execute/{plan_id}")
-def execute_plan(plan_id: str):
+def execute_plan(plan_id: str, x_request_timeout_ms: Optional[str] = Header(default=None),
+                 idempotency_key: Optional[str] = Header(default=None)):
+    return idempotency_store.run(
+        "execute_plan", idempotency_key, {"plan_id": plan_id},
+        lambda: _execute_plan(plan_id, x_request_timeout_ms)
+    )
+
+
+def _execute_plan(plan_id: str, x_request_timeout_ms: Optional[str]):
     try:
+        deadline = Deadline.for_endpoint("execute_plan", x_request_timeout_ms)
         message_id = str(uuid.uuid4())
         
         agui_request = agui_protocol.create_request(
@@ -267,7 +845,7 @@ def execute_plan(plan_id: str):
             payload={"plan_id": plan_id}
         )
         
-        plan = planning_agent.get_plan(plan_id)
+        plan = planning_agent.get_plan(plan_id, deadline)
         if not plan:
             agui_error = agui_protocol.create_response(
                 message_id=str(uuid.uuid4()),
@@ -277,12 +855,34 @@ def execute_plan(plan_id: str):
                 status="error",
                 payload={"error": "Plan no encontrado"}
             )
-            return agui_error.model_dump()
-        
-        anp_message = planning_agent.send_tasks_to_executor(plan_id, execution_agent.agent_name)
-        
-        execution_response = execution_agent.receive_tasks(anp_message)
-        execution_id = execution_response["execution_id"]
+            return AGUIJSONResponse(agui_error)
+        
+        # Un reintento retoma el checkpoint abandonado en lugar de repetir las tareas completadas
+        execution_id = execution_agent.claim_execution(database_agent, plan_id=plan_id, deadline=deadline)
+        if execution_id is None:
+            active = execution_agent.find_active_execution(database_agent, plan_id, deadline)
+            if active:
+                agui_error = agui_protocol.create_response(
+                    message_id=str(uuid.uuid4()),
+                    sender="Ejecutor",
+                    receiver="UI",
+                    action="Ejecutar",
+                    status="error",
+                    payload={
+                        "error": "El plan ya se esta ejecutando",
+                        "execution_id": active["execution_id"]
+                    }
+                )
+                return AGUIJSONResponse(agui_error)
+            
+            anp_message = planning_agent.send_tasks_to_executor(plan_id, execution_agent.agent_name)
+            
+            # Tras una replanificacion incremental las tareas conservadas no se repiten
+            reused_results = plan.get("reused_results") or {}
+            execution_response = execution_agent.receive_tasks(anp_message, reused_results)
+            execution_id = execution_response["execution_id"]
+            if reused_results:
+                planning_agent.clear_reused_results(database_agent, plan_id, deadline)
         
         notify_msg = execution_agent.notify_status(
             notification_agent.agent_name,
@@ -290,66 +890,10 @@ def execute_plan(plan_id: str):
             "received",
             {"plan_id": plan_id, "tasks_count": len(plan["tasks"])}
         )
-        notification_agent.receive_event(notify_msg)
-        
-        results = execution_agent.execute_tasks(execution_id, database_agent)
+        message_bus.publish(notify_msg)
         
-        # Contar errores y exitos
-        error_count = sum(1 for r in results if r.get("status") == "error")
-        success_count = len(results) - error_count
-        # Contar errores y exitos
-        error_count = sum(1 for r in results if r.get("status") == "error")
-        success_count = len(results) - error_count
-        
-        notify_msg = execution_agent.notify_status(
-            notification_agent.agent_name,
-            execution_id,
-            "completed",
-            {
-                "plan_id": plan_id, 
-                "results_count": len(results),
-                "success_count": success_count,
-                "error_count": error_count
-            }
-        )
-        notification_agent.receive_event(notify_msg)
-        
-        # Si la ejecución fue exitosa (sin errores), marcar el evento como completado y disponible
-        if error_count == 0:
-            event_id = plan.get("event_details", {}).get("event_id")
-            if event_id:
-                # Actualizar el estado del evento a "completed" y "available_for_registration"
-                acp_update = database_agent.acp_protocol.create_update_request(
-                    message_id=str(uuid.uuid4()),
-                    sender="Ejecutor",
-                    collection="events",
-                    query_filter={"event_id": event_id},
-                    update_data={
-                        "status": "completed",
-                        "available_for_registration": True,
-                        "execution_completed_at": datetime.now().isoformat(),
-                        "plan_execution_id": execution_id
-                    }
-                )
-                
-                update_response = database_agent.process_acp_message(acp_update.model_dump())
-                
-                if update_response.status == "success":
-                    # Crear notificación adicional sobre la disponibilidad para inscripciones
-                    notification_agent.create_custom_notification(
-                        title="Evento Disponible para Inscripciones",
-                        body=f"El evento '{plan.get('event_details', {}).get('event_name')}' está ahora disponible para que los estudiantes se inscriban",
-                        level="info",
-                        data={"event_id": event_id, "plan_id": plan_id, "execution_id": execution_id}
-                    )
-        
-        notification_id = notification_agent.create_custom_notification(
-            title="Ejecucion Completada",
-            body=f"Ejecutadas {len(results)} tareas: {success_count} exitosas, {error_count} con errores" + 
-                 (" - Evento disponible para inscripciones" if error_count == 0 else ""),
-            level="success" if error_count == 0 else "warning",
-            data={"plan_id": plan_id, "execution_id": execution_id}
-        )
+        results = execution_agent.execute_tasks(execution_id, database_agent, deadline)
+        success_count, error_count, notification_id = _finalize_execution(plan, execution_id, results, deadline)
         
         agui_response = agui_protocol.create_response(
             message_id=str(uuid.uuid4()),
@@ -370,7 +914,7 @@ def execute_plan(plan_id: str):
             }
         )
         
-        return agui_response.model_dump()
+        return AGUIJSONResponse(agui_response)
         
     except HTTPException:
         raise
@@ -383,7 +927,7 @@ def execute_plan(plan_id: str):
             status="error",
             payload={"error": str(e)}
         )
-        return agui_error.model_dump()
+        return AGUIJSONResponse(agui_error)
 
 
 @app.get("/api/notifications")
@@ -414,16 +958,17 @@ def get_notifications():
             }
         )
         
-        return agui_response.model_dump()
+        return AGUIJSONResponse(agui_response)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/events/available")
-def get_available_events():
+def get_available_events(x_request_timeout_ms: Optional[str] = Header(default=None)):
     """Obtener eventos disponibles para estudiantes con cupos disponibles"""
     try:
+        deadline = Deadline.for_endpoint("default", x_request_timeout_ms)
         message_id = str(uuid.uuid4())
         
         # Crear solicitud AG-UI hacia el executor para obtener eventos con cupos
@@ -435,44 +980,25 @@ def get_available_events():
             payload={"operation": "get_available_events"}
         )
         
-        # Usar protocolo ACP para consultar eventos completados y disponibles para inscripción
-        acp_message = database_agent.acp_protocol.create_query_request(
-            message_id=str(uuid.uuid4()),
-            sender="Ejecutor",
-            collection="events",
-            query_filter={
-                "status": "completed",
-                "available_for_registration": True
-            },
-            sort={"event_date": 1}
-        )
-        
-        events_response = database_agent.process_acp_message(acp_message.model_dump())
-        
-        if events_response.status != "success":
-            raise HTTPException(status_code=500, detail="Error al obtener eventos")
-        
-        events_with_capacity = []
-        for event in events_response.data or []:
-            # Consultar registros para este evento
-            acp_registrations = database_agent.acp_protocol.create_query_request(
+        def load_available_events():
+            # Proyeccion available_events: ya trae los cupos y se recorre por el indice de event_date
+            acp_message = database_agent.acp_protocol.create_query_request(
                 message_id=str(uuid.uuid4()),
                 sender="Ejecutor",
-                collection="student_registrations",
-                query_filter={"event_id": event.get("event_id")}
+                collection="available_events",
+                sort={"event_date": 1},
+                projection={"_id": 0},
+                read_preference=MONGO_LISTING_READ_PREFERENCE
             )
             
-            registrations_response = database_agent.process_acp_message(acp_registrations.model_dump())
-            current_registrations = len(registrations_response.data or [])
-            max_capacity = event.get("expected_attendees", 0)
+            events_response = database_agent.process_acp_message(acp_message.model_dump(), deadline)
             
-            event_with_capacity = {
-                **event,
-                "current_registrations": current_registrations,
-                "available_spots": max(0, max_capacity - current_registrations),
-                "is_full": current_registrations >= max_capacity
-            }
-            events_with_capacity.append(event_with_capacity)
+            if events_response.status != "success":
+                raise HTTPException(status_code=500, detail="Error al obtener eventos")
+            
+            return {"events": events_response.data or []}
+        
+        payload = response_cache.get_or_load("events_available", None, ["available_events"], load_available_events)
         
         agui_response = agui_protocol.create_response(
             message_id=str(uuid.uuid4()),
@@ -480,18 +1006,26 @@ def get_available_events():
             receiver="UI",
             action="Base de datos",
             status="success",
-            payload={"events": events_with_capacity}
+            payload=payload
         )
         
-        return agui_response.model_dump()
+        return AGUIJSONResponse(agui_response)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/events")
-def get_events():
+def get_events(x_request_timeout_ms: Optional[str] = Header(default=None),
+               if_none_match: Optional[str] = Header(default=None)):
     try:
+        etag = _collection_etag("events", ["events"])
+        if _etag_matches(if_none_match, etag):
+            return _not_modified(etag)
+        
+        deadline = Deadline.for_endpoint("default", x_request_timeout_ms)
         message_id = str(uuid.uuid4())
         
         agui_request = agui_protocol.create_request(
@@ -502,35 +1036,47 @@ def get_events():
             payload={"collection": "events", "operation": "query"}
         )
         
-        acp_message = database_agent.acp_protocol.create_query_request(
-            message_id=str(uuid.uuid4()),
-            sender="UI",
-            collection="events",
-            query_filter={},
-            sort={"created_at": -1},
-            limit=50
-        )
+        def load_events():
+            acp_message = database_agent.acp_protocol.create_query_request(
+                message_id=str(uuid.uuid4()),
+                sender="UI",
+                collection="events",
+                query_filter={},
+                sort={"created_at": -1},
+                limit=50,
+                read_preference=MONGO_LISTING_READ_PREFERENCE
+            )
+            
+            response = database_agent.process_acp_message(acp_message.model_dump(), deadline)
+            if response.status != "success":
+                raise HTTPException(status_code=500, detail=response.error_message)
+            
+            return {"events": response.data or []}
         
-        response = database_agent.process_acp_message(acp_message.model_dump())
+        # La version va en la clave: el cuerpo en cache nunca es anterior a la ETag que lo acompania
+        payload = response_cache.get_or_load("events", {"limit": 50, "etag": etag}, ["events"], load_events)
         
         agui_response = agui_protocol.create_response(
             message_id=str(uuid.uuid4()),
             sender="Database",
             receiver="UI",
             action="Base de datos",
-            status="success" if response.status == "success" else "error",
-            payload={"events": response.data or []}
+            status="success",
+            payload=payload
         )
         
-        return agui_response.model_dump()
+        return AGUIJSONResponse(agui_response, headers=_etag_headers(etag))
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/events/{event_id}")
-def get_event(event_id: str):
+def get_event(event_id: str, x_request_timeout_ms: Optional[str] = Header(default=None)):
     try:
+        deadline = Deadline.for_endpoint("default", x_request_timeout_ms)
         acp_message = database_agent.acp_protocol.create_read_request(
             message_id=str(uuid.uuid4()),
             sender="UI",
@@ -538,7 +1084,7 @@ def get_event(event_id: str):
             query_filter={"event_id": event_id}
         )
         
-        response = database_agent.process_acp_message(acp_message.model_dump())
+        response = database_agent.process_acp_message(acp_message.model_dump(), deadline)
         
         if response.status == "error" or not response.data:
             raise HTTPException(status_code=404, detail="Event not found")
@@ -552,7 +1098,7 @@ def get_event(event_id: str):
             payload={"event": response.data}
         )
         
-        return agui_response.model_dump()
+        return AGUIJSONResponse(agui_response)
         
     except HTTPException:
         raise
@@ -561,8 +1107,9 @@ def get_event(event_id: str):
 
 
 @app.post("/api/users")
-def create_user(user_request: UserRequest):
+def create_user(user_request: UserRequest, x_request_timeout_ms: Optional[str] = Header(default=None)):
     try:
+        deadline = Deadline.for_endpoint("default", x_request_timeout_ms)
         user_data = user_request.model_dump()
         user_data["user_id"] = str(uuid.uuid4())
         user_data["created_at"] = datetime.now().isoformat()
@@ -574,7 +1121,7 @@ def create_user(user_request: UserRequest):
             data=user_data
         )
         
-        response = database_agent.process_acp_message(acp_message.model_dump())
+        response = database_agent.process_acp_message(acp_message.model_dump(), deadline)
         
         agui_response = agui_protocol.create_response(
             message_id=str(uuid.uuid4()),
@@ -585,24 +1132,26 @@ def create_user(user_request: UserRequest):
             payload={"user": user_data}
         )
         
-        return agui_response.model_dump()
+        return AGUIJSONResponse(agui_response)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/users")
-def get_users():
+def get_users(x_request_timeout_ms: Optional[str] = Header(default=None)):
     try:
+        deadline = Deadline.for_endpoint("default", x_request_timeout_ms)
         acp_message = database_agent.acp_protocol.create_query_request(
             message_id=str(uuid.uuid4()),
             sender="UI",
             collection="users",
             query_filter={},
-            sort={"created_at": -1}
+            sort={"created_at": -1},
+            read_preference=MONGO_LISTING_READ_PREFERENCE
         )
         
-        response = database_agent.process_acp_message(acp_message.model_dump())
+        response = database_agent.process_acp_message(acp_message.model_dump(), deadline)
         
         agui_response = agui_protocol.create_response(
             message_id=str(uuid.uuid4()),
@@ -613,15 +1162,16 @@ def get_users():
             payload={"users": response.data or []}
         )
         
-        return agui_response.model_dump()
+        return AGUIJSONResponse(agui_response)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/api/events/{event_id}/attend")
-def register_attendance(event_id: str, attendance: EventAttendanceRequest):
+def register_attendance(event_id: str, attendance: EventAttendanceRequest, x_request_timeout_ms: Optional[str] = Header(default=None)):
     try:
+        deadline = Deadline.for_endpoint("default", x_request_timeout_ms)
         acp_message = database_agent.acp_protocol.create_read_request(
             message_id=str(uuid.uuid4()),
             sender="UI",
@@ -629,7 +1179,7 @@ def register_attendance(event_id: str, attendance: EventAttendanceRequest):
             query_filter={"event_id": event_id}
         )
         
-        event_response = database_agent.process_acp_message(acp_message.model_dump())
+        event_response = database_agent.process_acp_message(acp_message.model_dump(), deadline)
         
         if not event_response.data:
             raise HTTPException(status_code=404, detail="Event not found")
@@ -649,7 +1199,7 @@ def register_attendance(event_id: str, attendance: EventAttendanceRequest):
             data=attendance_data
         )
         
-        response = database_agent.process_acp_message(acp_write.model_dump())
+        response = database_agent.process_acp_message(acp_write.model_dump(), deadline)
         
         notification_id = notification_agent.create_custom_notification(
             title="Asistencia Registrada",
@@ -670,7 +1220,7 @@ def register_attendance(event_id: str, attendance: EventAttendanceRequest):
             }
         )
         
-        return agui_response.model_dump()
+        return AGUIJSONResponse(agui_response)
         
     except HTTPException:
         raise
@@ -679,9 +1229,18 @@ def register_attendance(event_id: str, attendance: EventAttendanceRequest):
 
 
 @app.get("/api/plans")
-def get_plans():
+def get_plans(x_request_timeout_ms: Optional[str] = Header(default=None),
+              if_none_match: Optional[str] = Header(default=None)):
     try:
-        plans = planning_agent.list_plans()
+        etag = _collection_etag("plans", ["plans"])
+        if _etag_matches(if_none_match, etag):
+            return _not_modified(etag)
+        
+        deadline = Deadline.for_endpoint("default", x_request_timeout_ms)
+        payload = response_cache.get_or_load(
+            "plans", {"limit": 100, "etag": etag}, ["plans"],
+            lambda: {"plans": planning_agent.list_plans(deadline)}
+        )
         
         agui_response = agui_protocol.create_response(
             message_id=str(uuid.uuid4()),
@@ -689,19 +1248,20 @@ def get_plans():
             receiver="UI",
             action="Base de datos",
             status="success",
-            payload={"plans": plans}
+            payload=payload
         )
         
-        return agui_response.model_dump()
+        return AGUIJSONResponse(agui_response, headers=_etag_headers(etag))
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/plans/{plan_id}")
-def get_plan_detail(plan_id: str):
+def get_plan_detail(plan_id: str, x_request_timeout_ms: Optional[str] = Header(default=None)):
     try:
-        plan = planning_agent.get_plan(plan_id)
+        deadline = Deadline.for_endpoint("default", x_request_timeout_ms)
+        plan = planning_agent.get_plan(plan_id, deadline)
         
         if not plan:
             raise HTTPException(status_code=404, detail="Plan not found")
@@ -715,7 +1275,7 @@ def get_plan_detail(plan_id: str):
             payload={"plan": plan}
         )
         
-        return agui_response.model_dump()
+        return AGUIJSONResponse(agui_response)
         
     except HTTPException:
         raise
@@ -737,7 +1297,7 @@ def get_executions():
             payload=executions
         )
         
-        return agui_response.model_dump()
+        return AGUIJSONResponse(agui_response)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -760,7 +1320,7 @@ def get_execution_status(execution_id: str):
             payload={"execution": execution}
         )
         
-        return agui_response.model_dump()
+        return AGUIJSONResponse(agui_response)
         
     except HTTPException:
         raise
@@ -769,36 +1329,39 @@ def get_execution_status(execution_id: str):
 
 
 @app.get("/api/dashboard/stats")
-def get_dashboard_stats():
+def get_dashboard_stats(x_request_timeout_ms: Optional[str] = Header(default=None)):
     """Obtener estadísticas para el dashboard"""
     try:
-        # Obtener eventos totales
-        acp_all_events = database_agent.acp_protocol.create_query_request(
-            message_id=str(uuid.uuid4()),
-            sender="UI",
-            collection="events"
-        )
-        all_events_response = database_agent.process_acp_message(acp_all_events.model_dump())
+        deadline = Deadline.for_endpoint("default", x_request_timeout_ms)
         
-        # Obtener eventos disponibles para inscripción
-        acp_available_events = database_agent.acp_protocol.create_query_request(
-            message_id=str(uuid.uuid4()),
-            sender="UI",
-            collection="events",
-            query_filter={
-                "status": "completed",
-                "available_for_registration": True
+        def load_stats():
+            # Lectura puntual del documento materializado (indice unico en stat_id)
+            acp_stats = database_agent.acp_protocol.create_read_request(
+                message_id=str(uuid.uuid4()),
+                sender="UI",
+                collection="stats",
+                query_filter={"stat_id": "dashboard"},
+                projection={"_id": 0, "total_events": 1, "available_events": 1, "total_registrations": 1}
+            )
+            stats_response = database_agent.process_acp_message(acp_stats.model_dump(), deadline)
+            
+            if stats_response.status != "success":
+                raise HTTPException(status_code=500, detail="Error al obtener estadisticas")
+            
+            stats = stats_response.data
+            if not stats:
+                # Primera lectura sin documento de estadisticas: reconstruirlo una vez
+                stats = database_agent.rebuild_dashboard_stats()
+            
+            return {
+                "stats": {
+                    "total_events": stats.get("total_events", 0),
+                    "available_events": stats.get("available_events", 0),
+                    "total_registrations": stats.get("total_registrations", 0)
+                }
             }
-        )
-        available_events_response = database_agent.process_acp_message(acp_available_events.model_dump())
         
-        # Obtener total de inscripciones de estudiantes
-        acp_registrations = database_agent.acp_protocol.create_query_request(
-            message_id=str(uuid.uuid4()),
-            sender="UI",
-            collection="student_registrations"
-        )
-        registrations_response = database_agent.process_acp_message(acp_registrations.model_dump())
+        payload = response_cache.get_or_load("dashboard_stats", None, ["stats"], load_stats)
         
         agui_response = agui_protocol.create_response(
             message_id=str(uuid.uuid4()),
@@ -806,25 +1369,125 @@ def get_dashboard_stats():
             receiver="UI",
             action="Base de datos",
             status="success",
-            payload={
-                "stats": {
-                    "total_events": len(all_events_response.data or []),
-                    "available_events": len(available_events_response.data or []),
-                    "total_registrations": len(registrations_response.data or [])
-                }
-            }
+            payload=payload
         )
         
-        return agui_response.model_dump()
+        return AGUIJSONResponse(agui_response)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/api/students/register")
-def register_student_to_event(registration: StudentRegistrationRequest):
+def register_student_to_event(registration: StudentRegistrationRequest, x_request_timeout_ms: Optional[str] = Header(default=None),
+                              idempotency_key: Optional[str] = Header(default=None)):
     """Registrar estudiante a un evento usando protocolos AG-UI y ACP"""
+    if REGISTRATION_INTAKE_MODE == "queued":
+        handler = lambda: _enqueue_student_registration(registration)
+    else:
+        handler = lambda: _register_student_to_event(registration, x_request_timeout_ms)
+    return idempotency_store.run("register_student", idempotency_key, registration.model_dump(), handler)
+
+
+def _enqueue_student_registration(registration: StudentRegistrationRequest):
+    """Encolar la inscripcion y responder 202 con el ticket; el worker la confirma por lotes"""
     try:
+        ticket = registration_intake.enqueue(registration.model_dump())
+    except Exception as e:
+        agui_error = agui_protocol.create_response(
+            message_id=str(uuid.uuid4()),
+            sender="Ejecutor",
+            receiver="UI",
+            action="Ejecutar",
+            status="error",
+            payload={"error": f"Error al encolar la inscripcion: {str(e)}"}
+        )
+        return AGUIJSONResponse(agui_error)
+    
+    agui_response = agui_protocol.create_response(
+        message_id=str(uuid.uuid4()),
+        sender="Ejecutor",
+        receiver="UI",
+        action="Ejecutar",
+        status="pending",
+        payload={
+            "ticket_id": ticket["ticket_id"],
+            "event_id": ticket["event_id"],
+            "status": "pending",
+            "poll_url": f"/api/students/registrations/tickets/{ticket['ticket_id']}"
+        }
+    )
+    return AGUIJSONResponse(agui_response, status_code=202)
+
+
+def _on_registrations_committed(event: Dict[str, Any], registrations: List[Dict[str, Any]],
+                                rejected: List[Dict[str, Any]]):
+    """Contadores y notificaciones de un lote confirmado por el worker de inscripciones"""
+    if registrations:
+        _increment_dashboard_stats(None, total_registrations=len(registrations))
+        _record_available_event_registration(event["event_id"], None, len(registrations))
+    
+    for registration in registrations:
+        notification_agent.create_custom_notification(
+            title="Registro Exitoso",
+            body=f"Estudiante {registration['student_name']} registrado exitosamente en el evento '{event.get('event_name')}'",
+            level="success",
+            data={
+                "event_id": registration["event_id"],
+                "student_email": registration["student_email"],
+                "registration_id": registration["registration_id"],
+                "ticket_id": registration["registration_id"]
+            }
+        )
+    for ticket in rejected:
+        notification_agent.create_custom_notification(
+            title="Registro Rechazado",
+            body=f"No se pudo registrar a {ticket['student_name']}: {ticket.get('reason')}",
+            level="warning",
+            data={"event_id": ticket["event_id"], "student_email": ticket["student_email"], "ticket_id": ticket["ticket_id"]}
+        )
+
+
+@app.get("/api/students/registrations/tickets/{ticket_id}")
+def get_registration_ticket(ticket_id: str):
+    """Estado de una inscripcion encolada: pending, success (confirmada) o error (rechazada)"""
+    try:
+        ticket = registration_intake.get_ticket(ticket_id)
+        if not ticket:
+            status, payload = "error", {"error": "Ticket no encontrado", "ticket_id": ticket_id}
+        elif ticket["status"] == "confirmed":
+            acp_registration = database_agent.acp_protocol.create_read_request(
+                message_id=str(uuid.uuid4()),
+                sender="UI",
+                collection="student_registrations",
+                query_filter={"registration_id": ticket_id},
+                projection={"_id": 0}
+            )
+            registration_response = database_agent.process_acp_message(acp_registration.model_dump())
+            status, payload = "success", {"ticket": ticket, "registration": registration_response.data}
+        elif ticket["status"] == "rejected":
+            status, payload = "error", {"error": ticket.get("reason"), "ticket": ticket}
+        else:
+            status, payload = "pending", {"ticket": ticket}
+    except Exception as e:
+        status, payload = "error", {"error": str(e), "ticket_id": ticket_id}
+    
+    agui_response = agui_protocol.create_response(
+        message_id=str(uuid.uuid4()),
+        sender="Ejecutor",
+        receiver="UI",
+        action="Ejecutar",
+        status=status,
+        payload=payload
+    )
+    return AGUIJSONResponse(agui_response)
+
+
+def _register_student_to_event(registration: StudentRegistrationRequest, x_request_timeout_ms: Optional[str]):
+    try:
+        deadline = Deadline.for_endpoint("register_student", x_request_timeout_ms)
         message_id = str(uuid.uuid4())
         
         print(f"DEBUG: Iniciando registro para estudiante: {registration.student_email}")
@@ -850,7 +1513,7 @@ def register_student_to_event(registration: StudentRegistrationRequest):
         )
         
         print(f"DEBUG: Verificando evento: {registration.event_id}")
-        event_response = database_agent.process_acp_message(acp_event_check.model_dump())
+        event_response = database_agent.process_acp_message(acp_event_check.model_dump(), deadline)
         
         if event_response.status != "success" or not event_response.data:
             print(f"ERROR: Evento no encontrado: {event_response}")
@@ -862,7 +1525,7 @@ def register_student_to_event(registration: StudentRegistrationRequest):
                 status="error",
                 payload={"error": "Evento no encontrado"}
             )
-            return agui_error.model_dump()
+            return AGUIJSONResponse(agui_error)
         
         event = event_response.data
         max_capacity = event.get("expected_attendees", 0)
@@ -877,7 +1540,7 @@ def register_student_to_event(registration: StudentRegistrationRequest):
         )
         
         print("DEBUG: Consultando registros existentes...")
-        registrations_response = database_agent.process_acp_message(acp_registrations.model_dump())
+        registrations_response = database_agent.process_acp_message(acp_registrations.model_dump(), deadline)
         current_count = len(registrations_response.data or [])
         print(f"DEBUG: Registros actuales: {current_count}")
         
@@ -891,7 +1554,7 @@ def register_student_to_event(registration: StudentRegistrationRequest):
                 status="error",
                 payload={"error": "El evento está lleno. No hay cupos disponibles."}
             )
-            return agui_error.model_dump()
+            return AGUIJSONResponse(agui_error)
         
         # Verificar que el estudiante no esté ya registrado
         acp_duplicate_check = database_agent.acp_protocol.create_query_request(
@@ -905,7 +1568,7 @@ def register_student_to_event(registration: StudentRegistrationRequest):
         )
         
         print("DEBUG: Verificando duplicados...")
-        duplicate_response = database_agent.process_acp_message(acp_duplicate_check.model_dump())
+        duplicate_response = database_agent.process_acp_message(acp_duplicate_check.model_dump(), deadline)
         
         if duplicate_response.data and len(duplicate_response.data) > 0:
             print(f"ERROR: Estudiante ya registrado")
@@ -917,7 +1580,7 @@ def register_student_to_event(registration: StudentRegistrationRequest):
                 status="error",
                 payload={"error": "Ya estás registrado en este evento"}
             )
-            return agui_error.model_dump()
+            return AGUIJSONResponse(agui_error)
         
         # Crear registro usando ACP
         registration_data = {
@@ -938,9 +1601,14 @@ def register_student_to_event(registration: StudentRegistrationRequest):
             data=registration_data
         )
         
-        write_response = database_agent.process_acp_message(acp_write.model_dump())
+        write_response = database_agent.process_acp_message(acp_write.model_dump(), deadline)
         print(f"DEBUG: Respuesta de escritura: {write_response.status}")
         
+        if write_response.status == "success":
+            _adjust_seats_left(registration.event_id, -1, deadline)
+            _increment_dashboard_stats(deadline, total_registrations=1)
+            _record_available_event_registration(registration.event_id, deadline)
+        
         if write_response.status != "success":
             print(f"ERROR: Error al escribir: {write_response}")
             agui_error = agui_protocol.create_response(
@@ -951,7 +1619,7 @@ def register_student_to_event(registration: StudentRegistrationRequest):
                 status="error",
                 payload={"error": f"Error al registrar estudiante: {write_response.error_message}"}
             )
-            return agui_error.model_dump()
+            return AGUIJSONResponse(agui_error)
         
         # Crear notificación
         notification_id = notification_agent.create_custom_notification(
@@ -981,7 +1649,7 @@ def register_student_to_event(registration: StudentRegistrationRequest):
             }
         )
         
-        return agui_response.model_dump()
+        return AGUIJSONResponse(agui_response)
         
     except Exception as e:
         print(f"ERROR: Excepción en registro: {str(e)}")
@@ -996,13 +1664,14 @@ def register_student_to_event(registration: StudentRegistrationRequest):
             status="error",
             payload={"error": f"Error interno: {str(e)}"}
         )
-        return agui_error.model_dump()
+        return AGUIJSONResponse(agui_error)
 
 
 @app.get("/api/students/{student_email}/registrations")
-def get_student_registrations(student_email: str):
+def get_student_registrations(student_email: str, x_request_timeout_ms: Optional[str] = Header(default=None)):
     """Obtener registros de un estudiante"""
     try:
+        deadline = Deadline.for_endpoint("default", x_request_timeout_ms)
         message_id = str(uuid.uuid4())
         
         agui_request = agui_protocol.create_request(
@@ -1018,10 +1687,11 @@ def get_student_registrations(student_email: str):
             sender="Ejecutor",
             collection="student_registrations",
             query_filter={"student_email": student_email},
-            sort={"registered_at": -1}
+            sort={"registered_at": -1},
+            read_preference=MONGO_LISTING_READ_PREFERENCE
         )
         
-        response = database_agent.process_acp_message(acp_message.model_dump())
+        response = database_agent.process_acp_message(acp_message.model_dump(), deadline)
         
         agui_response = agui_protocol.create_response(
             message_id=str(uuid.uuid4()),
@@ -1032,16 +1702,22 @@ def get_student_registrations(student_email: str):
             payload={"registrations": response.data or []}
         )
         
-        return agui_response.model_dump()
+        return AGUIJSONResponse(agui_response)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/events/{event_id}/registrations")
-def get_event_registrations(event_id: str):
+def get_event_registrations(event_id: str, x_request_timeout_ms: Optional[str] = Header(default=None),
+                            if_none_match: Optional[str] = Header(default=None)):
     """Obtener registros de un evento específico"""
     try:
+        etag = _collection_etag(f"registrations-{event_id}", ["student_registrations"])
+        if _etag_matches(if_none_match, etag):
+            return _not_modified(etag)
+        
+        deadline = Deadline.for_endpoint("default", x_request_timeout_ms)
         message_id = str(uuid.uuid4())
         
         agui_request = agui_protocol.create_request(
@@ -1057,10 +1733,11 @@ def get_event_registrations(event_id: str):
             sender="Ejecutor",
             collection="student_registrations",
             query_filter={"event_id": event_id},
-            sort={"registered_at": -1}
+            sort={"registered_at": -1},
+            read_preference=MONGO_LISTING_READ_PREFERENCE
         )
         
-        response = database_agent.process_acp_message(acp_message.model_dump())
+        response = database_agent.process_acp_message(acp_message.model_dump(), deadline)
         
         agui_response = agui_protocol.create_response(
             message_id=str(uuid.uuid4()),
@@ -1071,12 +1748,187 @@ def get_event_registrations(event_id: str):
             payload={"registrations": response.data or []}
         )
         
-        return agui_response.model_dump()
+        if response.status != "success":
+            return AGUIJSONResponse(agui_response)
+        return AGUIJSONResponse(agui_response, headers=_etag_headers(etag))
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _require_admin(admin_token: Optional[str]):
+    """Validar el token de administracion; sin ADMIN_TOKEN configurado los endpoints quedan cerrados"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Endpoints de administracion deshabilitados (ADMIN_TOKEN no configurado)")
+    if not admin_token or not hmac.compare_digest(admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin token invalido")
+
+
+@app.get("/api/admin/circuit-breaker")
+def get_circuit_breaker_status(x_admin_token: Optional[str] = Header(default=None)):
+    """Estado del circuit breaker compartido de Gemini y de las llamadas al LLM en curso o abandonadas"""
+    _require_admin(x_admin_token)
+    return {"circuit_breakers": [gemini_breaker.get_status()], "llm_calls": llm_call_pool.get_metrics()}
+
+
+@app.post("/api/admin/circuit-breaker/reset")
+def reset_circuit_breaker(x_admin_token: Optional[str] = Header(default=None)):
+    """Forzar el cierre del circuit breaker de Gemini"""
+    _require_admin(x_admin_token)
+    gemini_breaker.reset()
+    return {"circuit_breakers": [gemini_breaker.get_status()]}
+
+
+
+@app.get("/api/admin/cache")
+def get_cache_metrics(x_admin_token: Optional[str] = Header(default=None)):
+    """Metricas del cache de respuestas (hit ratio, invalidaciones, stale)"""
+    _require_admin(x_admin_token)
+    return {"response_cache": response_cache.get_metrics()}
+
+
+@app.post("/api/admin/cache/clear")
+def clear_response_cache(x_admin_token: Optional[str] = Header(default=None)):
+    """Vaciar el cache de respuestas"""
+    _require_admin(x_admin_token)
+    response_cache.clear()
+    return {"response_cache": response_cache.get_metrics()}
+
+
+
+@app.get("/api/admin/message-bus")
+def get_message_bus_metrics(x_admin_token: Optional[str] = Header(default=None)):
+    """Profundidad de los buzones, esperas en cola y entregas del bus A2A/ANP"""
+    _require_admin(x_admin_token)
+    return {"message_bus": message_bus.get_metrics()}
+
+
+@app.get("/api/admin/idempotency")
+def get_idempotency_metrics(x_admin_token: Optional[str] = Header(default=None)):
+    """Solicitudes ejecutadas, respuestas repetidas y esperas por Idempotency-Key"""
+    _require_admin(x_admin_token)
+    return {"idempotency": idempotency_store.get_metrics()}
+
+
+@app.get("/api/admin/registration-intake")
+def get_registration_intake_metrics(x_admin_token: Optional[str] = Header(default=None)):
+    """Tickets encolados, lotes confirmados y tamanio de los lotes de inscripcion"""
+    _require_admin(x_admin_token)
+    return {"mode": REGISTRATION_INTAKE_MODE, "registration_intake": registration_intake.get_metrics()}
+
+
+@app.get("/api/admin/transport")
+def get_transport_metrics(x_admin_token: Optional[str] = Header(default=None)):
+    """Replicas del Ejecutor: solicitudes en curso, errores, failovers y latencia por replica"""
+    _require_admin(x_admin_token)
+    transport = execution_agent.task_transport
+    return {
+        "execution_transport": EXECUTION_TRANSPORT,
+        "transport": transport.get_metrics() if transport else {"type": "inprocess"},
+        "workers": execution_worker_pool.get_status() if execution_worker_pool else None
+    }
+
+
+@app.get("/api/admin/compression")
+def get_compression_metrics(x_admin_token: Optional[str] = Header(default=None)):
+    """Respuestas comprimidas y bytes antes/despues por codificacion"""
+    _require_admin(x_admin_token)
+    return {"compression": response_compressor.get_metrics()}
+
+
+@app.get("/api/admin/retention")
+def get_retention_status(x_admin_token: Optional[str] = Header(default=None)):
+    """Politica de retencion, documentos vivos y archivados por coleccion"""
+    _require_admin(x_admin_token)
+    return {"retention": database_agent.get_retention_status()}
+
+
+@app.post("/api/admin/retention/archive")
+def run_retention_archive(x_admin_token: Optional[str] = Header(default=None)):
+    """Ejecutar ahora el job de archivo"""
+    _require_admin(x_admin_token)
+    return {"archived": database_agent.archive_expired(), "retention": database_agent.get_retention_status()}
+
+
+@app.get("/api/admin/admission")
+def get_admission_metrics(x_admin_token: Optional[str] = Header(default=None)):
+    """Solicitudes admitidas, encoladas y rechazadas (429/503) por carril"""
+    _require_admin(x_admin_token)
+    return {"admission": admission_controller.get_metrics()}
+
+
+@app.get("/api/admin/db-pool")
+def get_db_pool_stats(x_admin_token: Optional[str] = Header(default=None)):
+    """Estadisticas del pool de conexiones de MongoDB y del enrutamiento de lecturas"""
+    _require_admin(x_admin_token)
+    return {"mongo_pool": database_agent.get_pool_stats()}
+
+
+@app.get("/api/admin/startup")
+def get_startup_report(x_admin_token: Optional[str] = Header(default=None)):
+    """Tiempos de arranque por fase (import, connect, agents) y tareas en segundo plano"""
+    _require_admin(x_admin_token)
+    return {"startup": startup_timer.get_report()}
+
+
+@app.get("/api/admin/profiles")
+def list_profiles(x_admin_token: Optional[str] = Header(default=None)):
+    """Perfiles bajo demanda (X-Profile) y de las solicitudes mas lentas"""
+    _require_admin(x_admin_token)
+    return {"profiler": request_profiler.get_status(), "profiles": request_profiler.store.list()}
+
+
+@app.get("/api/admin/profiles/{profile_id}")
+def download_profile(profile_id: str, format: str = Query(default="speedscope", pattern="^(pstats|speedscope)$"),
+                     x_admin_token: Optional[str] = Header(default=None)):
+    """Descargar un perfil como pstats (snakeviz, pstats.Stats) o JSON de speedscope"""
+    _require_admin(x_admin_token)
+    session = request_profiler.store.get(profile_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Perfil no encontrado")
+    
+    if format == "pstats":
+        return Response(
+            content=to_pstats(session),
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="{profile_id}.pstats"'}
+        )
+    return AGUIJSONResponse(
+        to_speedscope(session),
+        headers={"Content-Disposition": f'attachment; filename="{profile_id}.speedscope.json"'}
+    )
+
+
+@app.post("/api/admin/profiles/sampler")
+def set_profile_sampler(enabled: bool, x_admin_token: Optional[str] = Header(default=None)):
+    """Activar o desactivar el muestreo continuo de solicitudes"""
+    _require_admin(x_admin_token)
+    request_profiler.sampler_enabled = enabled
+    return {"profiler": request_profiler.get_status()}
+
+
+@app.delete("/api/admin/profiles")
+def clear_profiles(x_admin_token: Optional[str] = Header(default=None)):
+    """Descartar los perfiles guardados"""
+    _require_admin(x_admin_token)
+    request_profiler.store.clear()
+    return {"profiles": request_profiler.store.list()}
+
+
+@app.post("/api/admin/stats/rebuild")
+def rebuild_dashboard_stats(x_admin_token: Optional[str] = Header(default=None)):
+    """Reconciliar desde cero el documento de estadisticas del dashboard"""
+    _require_admin(x_admin_token)
+    return {"stats": database_agent.rebuild_dashboard_stats()}
+
+
+@app.post("/api/admin/available-events/rebuild")
+def rebuild_available_events(x_admin_token: Optional[str] = Header(default=None)):
+    """Reconstruir la proyeccion de eventos disponibles con sus cupos"""
+    _require_admin(x_admin_token)
+    return database_agent.rebuild_available_events()
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -9,7 +9,7 @@ class ACPMessage(BaseModel):
     message_id: str = Field(description="Identificador unico del mensaje")
     sender: str = Field(description="Agente que solicita acceso a datos")
     receiver: str = Field(default="Database", description="Receptor del mensaje")
-    operation: Literal["read", "write", "update", "delete", "query"] = Field(description="Operacion a realizar")
+    operation: Literal["read", "write", "bulk_write", "update", "delete", "query"] = Field(description="Operacion a realizar")
     collection: str = Field(description="Coleccion o tabla objetivo")
 
 
@@ -17,6 +17,7 @@ class ACPReadRequest(ACPMessage):
     operation: Literal["read"] = "read"
     query_filter: Dict[str, Any] = Field(default_factory=dict, description="Filtros de busqueda")
     projection: Optional[Dict[str, int]] = Field(default=None, description="Campos a retornar")
+    read_preference: Optional[str] = Field(default=None, description="Read preference de MongoDB (por defecto primary)")
 
 
 class ACPWriteRequest(ACPMessage):
@@ -24,10 +25,17 @@ class ACPWriteRequest(ACPMessage):
     data: Dict[str, Any] = Field(description="Datos a escribir")
 
 
+class ACPBulkWriteRequest(ACPMessage):
+    operation: Literal["bulk_write"] = "bulk_write"
+    documents: List[Dict[str, Any]] = Field(description="Documentos a insertar en una sola operacion")
+
+
 class ACPUpdateRequest(ACPMessage):
     operation: Literal["update"] = "update"
     query_filter: Dict[str, Any] = Field(description="Filtros para encontrar documentos")
-    update_data: Dict[str, Any] = Field(description="Datos a actualizar")
+    update_data: Dict[str, Any] = Field(default_factory=dict, description="Datos a actualizar")
+    increment_data: Optional[Dict[str, Any]] = Field(default=None, description="Contadores a incrementar atomicamente")
+    upsert: bool = Field(default=False, description="Crear el documento si no existe")
 
 
 class ACPDeleteRequest(ACPMessage):
@@ -40,6 +48,8 @@ class ACPQueryRequest(ACPMessage):
     query_filter: Dict[str, Any] = Field(default_factory=dict, description="Filtros de busqueda")
     sort: Optional[Dict[str, int]] = Field(default=None, description="Ordenamiento")
     limit: Optional[int] = Field(default=None, description="Limite de resultados")
+    projection: Optional[Dict[str, int]] = Field(default=None, description="Campos a retornar")
+    read_preference: Optional[str] = Field(default=None, description="Read preference de MongoDB (por defecto primary)")
 
 
 class ACPResponse(BaseModel):
@@ -61,13 +71,15 @@ class ACPProtocol:
     
     def create_read_request(self, message_id: str, sender: str, collection: str,
                            query_filter: Dict[str, Any] = None, 
-                           projection: Dict[str, int] = None) -> ACPReadRequest:
+                           projection: Dict[str, int] = None,
+                           read_preference: str = None) -> ACPReadRequest:
         return ACPReadRequest(
             message_id=message_id,
             sender=sender,
             collection=collection,
             query_filter=query_filter or {},
-            projection=projection
+            projection=projection,
+            read_preference=read_preference
         )
     
     def create_write_request(self, message_id: str, sender: str, collection: str,
@@ -79,15 +91,28 @@ class ACPProtocol:
             data=data
         )
     
+    def create_bulk_write_request(self, message_id: str, sender: str, collection: str,
+                                  documents: List[Dict[str, Any]]) -> ACPBulkWriteRequest:
+        return ACPBulkWriteRequest(
+            message_id=message_id,
+            sender=sender,
+            collection=collection,
+            documents=documents
+        )
+    
     def create_update_request(self, message_id: str, sender: str, collection: str,
                              query_filter: Dict[str, Any], 
-                             update_data: Dict[str, Any]) -> ACPUpdateRequest:
+                             update_data: Dict[str, Any] = None,
+                             increment_data: Dict[str, Any] = None,
+                             upsert: bool = False) -> ACPUpdateRequest:
         return ACPUpdateRequest(
             message_id=message_id,
             sender=sender,
             collection=collection,
             query_filter=query_filter,
-            update_data=update_data
+            update_data=update_data or {},
+            increment_data=increment_data,
+            upsert=upsert
         )
     
     def create_delete_request(self, message_id: str, sender: str, collection: str,
@@ -102,14 +127,18 @@ class ACPProtocol:
     def create_query_request(self, message_id: str, sender: str, collection: str,
                             query_filter: Dict[str, Any] = None,
                             sort: Dict[str, int] = None,
-                            limit: int = None) -> ACPQueryRequest:
+                            limit: int = None,
+                            projection: Dict[str, int] = None,
+                            read_preference: str = None) -> ACPQueryRequest:
         return ACPQueryRequest(
             message_id=message_id,
             sender=sender,
             collection=collection,
             query_filter=query_filter or {},
             sort=sort,
-            limit=limit
+            limit=limit,
+            projection=projection,
+            read_preference=read_preference
         )
     
     def create_response(self, message_id: str, request_id: str, receiver: str,
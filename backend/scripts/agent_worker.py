@@ -0,0 +1,56 @@
+"""Proceso worker de un agente, atendiendo mensajes por socket Unix o TCP.
+
+Hoy solo el Ejecutor corre fuera de la API: recibe ANP task_assignment y
+devuelve los resultados de sus tareas (las llamadas al LLM no compiten
+con las solicitudes de la API por el GIL ni el threadpool).
+
+Uso (desde backend/):
+    python -m scripts.agent_worker execution --listen unix:/tmp/agentes/ejecutor-1.sock
+    python -m scripts.agent_worker execution --listen tcp:127.0.0.1:9101
+
+La API los usa con EXECUTION_TRANSPORT=socket y EXECUTION_WORKER_ADDRESSES
+(o los lanza ella misma con EXECUTION_WORKER_SPAWN).
+"""
+import argparse
+import signal
+import threading
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import GEMINI_API_KEY
+from agents.execution_agent import ExecutionAgent
+from utils.transport import AgentServer
+
+
+def build_handlers(agent: str):
+    if agent == "execution":
+        execution_agent = ExecutionAgent(GEMINI_API_KEY)
+        # Cargar el LLM antes de aceptar tareas
+        execution_agent.llm
+        return {"ANP": execution_agent.handle_anp_message}
+    raise ValueError(f"Agente no soportado: {agent}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker de un agente del sistema")
+    parser.add_argument("agent", choices=["execution"])
+    parser.add_argument("--listen", required=True, help="unix:/ruta.sock o tcp:host:puerto")
+    args = parser.parse_args()
+
+    server = AgentServer(args.listen, build_handlers(args.agent))
+
+    def stop(signum, frame):
+        # shutdown() espera a serve_forever: se llama desde otro hilo
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    print(f"Worker {args.agent} escuchando en {args.listen} (pid {os.getpid()})", flush=True)
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""Reconstruir las vistas materializadas: estadisticas del dashboard y
+la proyeccion available_events.
+
+Uso (desde backend/):
+    python -m scripts.rebuild_stats
+"""
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import MONGODB_URI
+from agents.database_agent import DatabaseAgent
+
+
+def main():
+    database_agent = DatabaseAgent(MONGODB_URI)
+    try:
+        stats = database_agent.rebuild_dashboard_stats()
+        print("Estadisticas reconstruidas:")
+        for key, value in stats.items():
+            print(f"  {key}: {value}")
+        
+        available = database_agent.rebuild_available_events()
+        print(f"Proyeccion available_events reconstruida: {available['available_events']} eventos")
+    finally:
+        database_agent.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+from typing import Dict, Any, List, Optional, Tuple, Union
+from contextlib import nullcontext
+
+
+# Claves de indice como en pymongo: "campo" o [("campo", 1), ("otro", -1)]
+IndexKeys = Union[str, List[Tuple[str, int]]]
+# Ordenamiento ACP: {"campo": 1} o lista de pares
+SortSpec = Union[Dict[str, int], List[Tuple[str, int]]]
+
+
+def normalize_keys(keys: Optional[Union[IndexKeys, SortSpec]]) -> List[Tuple[str, int]]:
+    """Normalizar claves de indice u ordenamiento a una lista de (campo, direccion)"""
+    if not keys:
+        return []
+    if isinstance(keys, str):
+        return [(keys, 1)]
+    if isinstance(keys, dict):
+        return list(keys.items())
+    return [(field, direction) for field, direction in keys]
+
+
+class UpdateResult:
+    def __init__(self, matched_count: int, modified_count: int, upserted_id: Any = None):
+        self.matched_count = matched_count
+        self.modified_count = modified_count
+        self.upserted_id = upserted_id
+
+
+class StorageCollection:
+    """Operaciones que el DatabaseAgent necesita sobre una coleccion.
+
+    La semantica sigue a pymongo (filtros y documentos de actualizacion con
+    operadores $), para que los handlers ACP no dependan del motor.
+    """
+
+    name: str = ""
+
+    def find_one(self, query_filter: Dict[str, Any], projection: Optional[Dict[str, int]] = None) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def find(self, query_filter: Dict[str, Any], projection: Optional[Dict[str, int]] = None,
+             sort: Optional[SortSpec] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def insert_one(self, document: Dict[str, Any]) -> Any:
+        """Insertar y devolver el _id (se agrega al documento, como en pymongo)"""
+        raise NotImplementedError
+
+    def insert_many(self, documents: List[Dict[str, Any]]) -> int:
+        raise NotImplementedError
+
+    def update_many(self, query_filter: Dict[str, Any], update: Dict[str, Any], upsert: bool = False) -> UpdateResult:
+        raise NotImplementedError
+
+    def delete_many(self, query_filter: Dict[str, Any]) -> int:
+        raise NotImplementedError
+
+    def count_documents(self, query_filter: Dict[str, Any]) -> int:
+        raise NotImplementedError
+
+    def count_by(self, field: str, query_filter: Optional[Dict[str, Any]] = None) -> Dict[Any, int]:
+        """Contar documentos agrupados por el valor de un campo"""
+        raise NotImplementedError
+
+    def average_by(self, field: str, value_field: str,
+                   query_filter: Optional[Dict[str, Any]] = None) -> Dict[Any, Dict[str, float]]:
+        """Media y numero de valores de value_field agrupados por el valor de field"""
+        raise NotImplementedError
+
+    def create_index(self, keys: IndexKeys, unique: bool = False, expire_after_seconds: Optional[int] = None):
+        """Crear un indice; con expire_after_seconds es un indice TTL sobre un campo fecha"""
+        raise NotImplementedError
+
+
+class StorageBackend:
+    """Motor de almacenamiento del DatabaseAgent (ver storage.factory)"""
+
+    name = "base"
+
+    def collection(self, name: str, read_preference: Optional[str] = None) -> StorageCollection:
+        raise NotImplementedError
+
+    def list_collection_names(self) -> List[str]:
+        raise NotImplementedError
+
+    def create_collection(self, name: str, capped_bytes: Optional[int] = None, capped_max: Optional[int] = None,
+                          block_compressor: Optional[str] = None):
+        """Crear una coleccion; capped_* la hace de tamaño fijo y block_compressor fija su compresion en disco"""
+        raise NotImplementedError
+
+    def collection_options(self, name: str) -> Dict[str, Any]:
+        """Opciones con las que se creo la coleccion (capped, size, max...)"""
+        return {}
+
+    def timeout(self, seconds: float):
+        """Contexto que acota las operaciones al tiempo dado (si el motor lo soporta)"""
+        return nullcontext()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"backend": self.name}
+
+    def close(self):
+        pass
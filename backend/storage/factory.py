@@ -0,0 +1,19 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage.base import StorageBackend
+
+
+def create_storage(backend: str, mongodb_uri: str = None) -> StorageBackend:
+    """Crear el motor indicado por STORAGE_BACKEND ("mongo" o "memory")"""
+    if backend == "memory":
+        from storage.memory import MemoryStorage
+        return MemoryStorage()
+
+    if backend == "mongo":
+        from storage.mongo import MongoStorage
+        return MongoStorage(mongodb_uri)
+
+    raise ValueError(f"Unknown storage backend: {backend}")
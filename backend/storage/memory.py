@@ -0,0 +1,464 @@
+from typing import Dict, Any, List, Optional, Tuple
+from collections import defaultdict, Counter
+from datetime import datetime, timedelta
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+import threading
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage.base import StorageBackend, StorageCollection, UpdateResult, IndexKeys, SortSpec, normalize_keys
+
+
+# Marca de campo ausente (distinto de un campo con valor None)
+_MISSING = object()
+
+
+def _copy(value: Any) -> Any:
+    """Copia de documentos JSON-like (mas rapida que copy.deepcopy)"""
+    if isinstance(value, dict):
+        return {key: _copy(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_copy(item) for item in value]
+    return value
+
+
+def _get_path(document: Dict[str, Any], path: str) -> Any:
+    value = document
+    for part in path.split("."):
+        if isinstance(value, dict) and part in value:
+            value = value[part]
+        else:
+            return _MISSING
+    return value
+
+
+def _set_path(document: Dict[str, Any], path: str, value: Any):
+    parts = path.split(".")
+    for part in parts[:-1]:
+        document = document.setdefault(part, {})
+    document[parts[-1]] = value
+
+
+def _unset_path(document: Dict[str, Any], path: str):
+    parts = path.split(".")
+    for part in parts[:-1]:
+        document = document.get(part)
+        if not isinstance(document, dict):
+            return
+    document.pop(parts[-1], None)
+
+
+def _hashable(value: Any) -> Any:
+    if value is _MISSING:
+        return None
+    if isinstance(value, dict):
+        return tuple((key, _hashable(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return tuple(_hashable(item) for item in value)
+    return value
+
+
+# Orden de tipos de BSON para comparar y ordenar valores heterogeneos
+def _type_rank(value: Any) -> int:
+    if value is _MISSING or value is None:
+        return 0
+    if isinstance(value, bool):
+        return 6
+    if isinstance(value, (int, float)):
+        return 1
+    if isinstance(value, str):
+        return 2
+    if isinstance(value, dict):
+        return 3
+    if isinstance(value, list):
+        return 4
+    if isinstance(value, ObjectId):
+        return 5
+    if isinstance(value, datetime):
+        return 7
+    return 8
+
+
+def _sort_key(value: Any) -> Tuple[int, Any]:
+    rank = _type_rank(value)
+    if rank == 0:
+        return (rank, 0)
+    if rank in (3, 4, 8):
+        return (rank, repr(value))
+    return (rank, value)
+
+
+def _equals(value: Any, expected: Any) -> bool:
+    if value is _MISSING:
+        return expected is None
+    if isinstance(value, list) and not isinstance(expected, list):
+        return expected in value
+    return value == expected
+
+
+def _compare(value: Any, operand: Any, predicate) -> bool:
+    if value is _MISSING or _type_rank(value) != _type_rank(operand):
+        return False
+    return predicate(value, operand)
+
+
+_OPERATORS = {
+    "$eq": _equals,
+    "$ne": lambda value, operand: not _equals(value, operand),
+    "$gt": lambda value, operand: _compare(value, operand, lambda a, b: a > b),
+    "$gte": lambda value, operand: _compare(value, operand, lambda a, b: a >= b),
+    "$lt": lambda value, operand: _compare(value, operand, lambda a, b: a < b),
+    "$lte": lambda value, operand: _compare(value, operand, lambda a, b: a <= b),
+    "$in": lambda value, operand: any(_equals(value, item) for item in operand),
+    "$nin": lambda value, operand: not any(_equals(value, item) for item in operand),
+    "$exists": lambda value, operand: (value is not _MISSING) == bool(operand)
+}
+
+
+def _is_operator_dict(condition: Any) -> bool:
+    return isinstance(condition, dict) and bool(condition) and all(key.startswith("$") for key in condition)
+
+
+def matches(document: Dict[str, Any], query_filter: Dict[str, Any]) -> bool:
+    """Evaluar un filtro estilo MongoDB (subconjunto usado por los agentes)"""
+    for key, condition in query_filter.items():
+        if key == "$and":
+            if not all(matches(document, sub_filter) for sub_filter in condition):
+                return False
+        elif key == "$or":
+            if not any(matches(document, sub_filter) for sub_filter in condition):
+                return False
+        elif key == "$nor":
+            if any(matches(document, sub_filter) for sub_filter in condition):
+                return False
+        else:
+            value = _get_path(document, key)
+            if _is_operator_dict(condition):
+                for operator, operand in condition.items():
+                    if operator not in _OPERATORS:
+                        raise ValueError(f"Unsupported query operator: {operator}")
+                    if not _OPERATORS[operator](value, operand):
+                        return False
+            elif not _equals(value, condition):
+                return False
+    return True
+
+
+def _project(document: Dict[str, Any], projection: Optional[Dict[str, int]]) -> Dict[str, Any]:
+    if not projection:
+        return _copy(document)
+
+    included = {field for field, flag in projection.items() if flag and field != "_id"}
+    if included:
+        keep_id = bool(projection.get("_id", 1))
+        return {
+            field: _copy(value) for field, value in document.items()
+            if field in included or (field == "_id" and keep_id)
+        }
+
+    excluded = {field for field, flag in projection.items() if not flag}
+    return {field: _copy(value) for field, value in document.items() if field not in excluded}
+
+
+def _apply_update(document: Dict[str, Any], update: Dict[str, Any], inserting: bool = False):
+    for operator, fields in update.items():
+        if operator == "$set" or (operator == "$setOnInsert" and inserting):
+            for path, value in fields.items():
+                _set_path(document, path, _copy(value))
+        elif operator == "$inc":
+            for path, amount in fields.items():
+                current = _get_path(document, path)
+                _set_path(document, path, amount if current is _MISSING else current + amount)
+        elif operator == "$unset":
+            for path in fields:
+                _unset_path(document, path)
+        elif operator != "$setOnInsert":
+            raise ValueError(f"Unsupported update operator: {operator}")
+
+
+class MemoryIndex:
+    """Indice secundario: clave (tupla de valores) -> ids de documentos"""
+
+    def __init__(self, fields: Tuple[str, ...], unique: bool):
+        self.fields = fields
+        self.unique = unique
+        # Si algun documento tiene un arreglo en el campo, el indice no sirve para igualdad exacta
+        self.multikey = False
+        self.entries: Dict[tuple, Dict[Any, None]] = defaultdict(dict)
+
+    def key(self, document: Dict[str, Any]) -> tuple:
+        values = []
+        for field in self.fields:
+            value = _get_path(document, field)
+            if isinstance(value, list):
+                self.multikey = True
+            values.append(_hashable(value))
+        return tuple(values)
+
+    def check(self, doc_id: Any, document: Dict[str, Any]):
+        if not self.unique:
+            return
+        owners = self.entries.get(self.key(document))
+        if owners and any(owner != doc_id for owner in owners):
+            raise DuplicateKeyError(f"E11000 duplicate key error index: {'_'.join(self.fields)}")
+
+    def add(self, doc_id: Any, document: Dict[str, Any]):
+        self.entries[self.key(document)][doc_id] = None
+
+    def remove(self, doc_id: Any, document: Dict[str, Any]):
+        key = self.key(document)
+        owners = self.entries.get(key)
+        if owners is not None:
+            owners.pop(doc_id, None)
+            if not owners:
+                del self.entries[key]
+
+
+class MemoryCollection(StorageCollection):
+    def __init__(self, name: str, stats: Dict[str, int], capped_max: Optional[int] = None):
+        self.name = name
+        # Coleccion capped: se descartan los documentos mas antiguos (por orden de insercion)
+        self.capped_max = capped_max
+        self._documents: Dict[Any, Dict[str, Any]] = {}
+        self._indexes: Dict[Tuple[str, ...], MemoryIndex] = {}
+        self._lock = threading.RLock()
+        self._stats = stats
+        # Indice TTL (campo, segundos): como el monitor TTL de Mongo, purga a lo sumo una vez por segundo
+        self._ttl: Optional[Tuple[str, int]] = None
+        self._next_purge_at = 0.0
+
+    def _purge_expired(self):
+        if self._ttl is None or time.monotonic() < self._next_purge_at:
+            return
+        self._next_purge_at = time.monotonic() + 1.0
+        field, seconds = self._ttl
+        cutoff = datetime.utcnow() - timedelta(seconds=seconds)
+        for doc_id, document in list(self._documents.items()):
+            value = _get_path(document, field)
+            if isinstance(value, datetime) and value < cutoff:
+                self._remove(doc_id)
+                self._stats["ttl_deletes"] += 1
+
+    def _candidates(self, query_filter: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Documentos a evaluar: por _id o por el indice con mas campos de igualdad; si no, scan"""
+        self._purge_expired()
+        doc_id = query_filter.get("_id")
+        if doc_id is not None and not _is_operator_dict(doc_id):
+            self._stats["id_lookups"] += 1
+            document = self._documents.get(doc_id)
+            return [document] if document is not None else []
+
+        best_index, best_key = None, None
+        for index in self._indexes.values():
+            if index.multikey or (best_index and len(best_index.fields) >= len(index.fields)):
+                continue
+            values = []
+            for field in index.fields:
+                condition = query_filter.get(field, _MISSING)
+                if _is_operator_dict(condition) and set(condition) == {"$eq"}:
+                    condition = condition["$eq"]
+                if condition is _MISSING or condition is None or isinstance(condition, (dict, list)):
+                    break
+                values.append(condition)
+            else:
+                best_index, best_key = index, tuple(values)
+
+        if best_index is not None:
+            self._stats["index_lookups"] += 1
+            return [self._documents[doc_id] for doc_id in best_index.entries.get(best_key, ())]
+
+        self._stats["collection_scans"] += 1
+        return list(self._documents.values())
+
+    def _matching(self, query_filter: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return [document for document in self._candidates(query_filter) if matches(document, query_filter)]
+
+    def find_one(self, query_filter: Dict[str, Any], projection: Optional[Dict[str, int]] = None) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            for document in self._candidates(query_filter):
+                if matches(document, query_filter):
+                    return _project(document, projection)
+        return None
+
+    def find(self, query_filter: Dict[str, Any], projection: Optional[Dict[str, int]] = None,
+             sort: Optional[SortSpec] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            results = self._matching(query_filter)
+            # Orden estable aplicando las claves de la menos a la mas significativa
+            for field, direction in reversed(normalize_keys(sort)):
+                results.sort(key=lambda document: _sort_key(_get_path(document, field)), reverse=direction < 0)
+            if limit:
+                results = results[:limit]
+            return [_project(document, projection) for document in results]
+
+    def _insert(self, document: Dict[str, Any]) -> Any:
+        # Como en pymongo, el _id generado se agrega al documento original
+        if "_id" not in document:
+            document["_id"] = ObjectId()
+        doc_id = document["_id"]
+        if doc_id in self._documents:
+            raise DuplicateKeyError("E11000 duplicate key error index: _id_")
+
+        stored = _copy(document)
+        for index in self._indexes.values():
+            index.check(doc_id, stored)
+        for index in self._indexes.values():
+            index.add(doc_id, stored)
+        self._documents[doc_id] = stored
+        if self.capped_max and len(self._documents) > self.capped_max:
+            self._remove(next(iter(self._documents)))
+        return doc_id
+
+    def _remove(self, doc_id: Any):
+        document = self._documents.pop(doc_id)
+        for index in self._indexes.values():
+            index.remove(doc_id, document)
+
+    def insert_one(self, document: Dict[str, Any]) -> Any:
+        with self._lock:
+            return self._insert(document)
+
+    def insert_many(self, documents: List[Dict[str, Any]]) -> int:
+        with self._lock:
+            for document in documents:
+                self._insert(document)
+            return len(documents)
+
+    def update_many(self, query_filter: Dict[str, Any], update: Dict[str, Any], upsert: bool = False) -> UpdateResult:
+        with self._lock:
+            matched = self._matching(query_filter)
+            modified = 0
+
+            for document in matched:
+                updated = _copy(document)
+                _apply_update(updated, update)
+                if updated == document:
+                    continue
+
+                doc_id = document["_id"]
+                for index in self._indexes.values():
+                    index.check(doc_id, updated)
+                for index in self._indexes.values():
+                    index.remove(doc_id, document)
+                    index.add(doc_id, updated)
+                self._documents[doc_id] = updated
+                modified += 1
+
+            if matched or not upsert:
+                return UpdateResult(len(matched), modified)
+
+            # Upsert: el documento nuevo parte de las igualdades del filtro
+            document = {}
+            for field, condition in query_filter.items():
+                if field.startswith("$"):
+                    continue
+                if _is_operator_dict(condition):
+                    if set(condition) != {"$eq"}:
+                        continue
+                    condition = condition["$eq"]
+                _set_path(document, field, _copy(condition))
+            _apply_update(document, update, inserting=True)
+            return UpdateResult(0, 0, self._insert(document))
+
+    def delete_many(self, query_filter: Dict[str, Any]) -> int:
+        with self._lock:
+            matched = self._matching(query_filter)
+            for document in matched:
+                self._remove(document["_id"])
+            return len(matched)
+
+    def count_documents(self, query_filter: Dict[str, Any]) -> int:
+        with self._lock:
+            return len(self._matching(query_filter))
+
+    def count_by(self, field: str, query_filter: Optional[Dict[str, Any]] = None) -> Dict[Any, int]:
+        with self._lock:
+            counts = Counter(
+                _hashable(_get_path(document, field)) for document in self._matching(query_filter or {})
+            )
+            return dict(counts)
+
+    def average_by(self, field: str, value_field: str,
+                   query_filter: Optional[Dict[str, Any]] = None) -> Dict[Any, Dict[str, float]]:
+        totals: Dict[Any, List[float]] = {}
+        with self._lock:
+            for document in self._matching(query_filter or {}):
+                value = _get_path(document, value_field)
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    entry = totals.setdefault(_hashable(_get_path(document, field)), [0.0, 0])
+                    entry[0] += value
+                    entry[1] += 1
+        return {key: {"avg": total / count, "count": count} for key, (total, count) in totals.items()}
+
+    def create_index(self, keys: IndexKeys, unique: bool = False, expire_after_seconds: Optional[int] = None):
+        fields = tuple(field for field, _ in normalize_keys(keys))
+        with self._lock:
+            if expire_after_seconds is not None:
+                self._ttl = (fields[0], expire_after_seconds)
+            if fields in self._indexes:
+                return
+            index = MemoryIndex(fields, unique)
+            for doc_id, document in self._documents.items():
+                index.check(doc_id, document)
+                index.add(doc_id, document)
+            self._indexes[fields] = index
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "documents": len(self._documents),
+                "indexes": [
+                    {"fields": list(index.fields), "unique": index.unique, "keys": len(index.entries), "multikey": index.multikey}
+                    for index in self._indexes.values()
+                ]
+            }
+
+
+class MemoryStorage(StorageBackend):
+    """Motor en memoria con indices secundarios.
+
+    Pensado para pruebas de carga y benchmarks locales sin MongoDB: los datos
+    viven en el proceso y se pierden al reiniciar. Las lecturas con read
+    preference y los timeouts no aplican.
+    """
+
+    name = "memory"
+
+    def __init__(self):
+        self._collections: Dict[str, MemoryCollection] = {}
+        self._lock = threading.Lock()
+        self._stats = defaultdict(int)
+
+    def collection(self, name: str, read_preference: Optional[str] = None) -> MemoryCollection:
+        with self._lock:
+            if name not in self._collections:
+                self._collections[name] = MemoryCollection(name, self._stats)
+            return self._collections[name]
+
+    def list_collection_names(self) -> List[str]:
+        with self._lock:
+            return list(self._collections)
+
+    def create_collection(self, name: str, capped_bytes: Optional[int] = None, capped_max: Optional[int] = None,
+                          block_compressor: Optional[str] = None):
+        """En memoria no hay compresion ni limite en bytes: capped solo respeta capped_max"""
+        with self._lock:
+            if name not in self._collections:
+                self._collections[name] = MemoryCollection(name, self._stats, capped_max if capped_bytes else None)
+
+    def collection_options(self, name: str) -> Dict[str, Any]:
+        collection = self.collection(name)
+        return {"capped": True, "max": collection.capped_max} if collection.capped_max else {}
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            collections = dict(self._collections)
+        return {
+            "backend": self.name,
+            "lookups": dict(self._stats),
+            "collections": {name: collection.get_stats() for name, collection in collections.items()}
+        }
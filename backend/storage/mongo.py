@@ -0,0 +1,186 @@
+from typing import Dict, Any, List, Optional
+from urllib.parse import urlsplit, parse_qs
+from pymongo import MongoClient
+from pymongo.read_preferences import read_pref_mode_from_name, make_read_preference
+from pymongo.errors import OperationFailure
+import pymongo
+import threading
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import (
+    MONGO_MAX_POOL_SIZE,
+    MONGO_MIN_POOL_SIZE,
+    MONGO_MAX_IDLE_TIME_MS,
+    MONGO_WAIT_QUEUE_TIMEOUT_MS,
+    MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    MONGO_CONNECT_TIMEOUT_MS,
+    MONGO_SOCKET_TIMEOUT_MS,
+    MONGO_COMPRESSORS,
+    MONGO_ZLIB_COMPRESSION_LEVEL,
+    MONGO_MAX_STALENESS_SECONDS
+)
+from storage.base import StorageBackend, StorageCollection, UpdateResult, IndexKeys, SortSpec, normalize_keys
+from utils.mongo_pool import PoolStatsListener
+
+
+class MongoCollection(StorageCollection):
+    def __init__(self, collection):
+        self.name = collection.name
+        self._collection = collection
+
+    def find_one(self, query_filter: Dict[str, Any], projection: Optional[Dict[str, int]] = None) -> Optional[Dict[str, Any]]:
+        return self._collection.find_one(query_filter, projection)
+
+    def find(self, query_filter: Dict[str, Any], projection: Optional[Dict[str, int]] = None,
+             sort: Optional[SortSpec] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        cursor = self._collection.find(query_filter, projection)
+        if sort:
+            cursor = cursor.sort(normalize_keys(sort))
+        if limit:
+            cursor = cursor.limit(limit)
+        return list(cursor)
+
+    def insert_one(self, document: Dict[str, Any]) -> Any:
+        return self._collection.insert_one(document).inserted_id
+
+    def insert_many(self, documents: List[Dict[str, Any]]) -> int:
+        return len(self._collection.insert_many(documents).inserted_ids)
+
+    def update_many(self, query_filter: Dict[str, Any], update: Dict[str, Any], upsert: bool = False) -> UpdateResult:
+        result = self._collection.update_many(query_filter, update, upsert=upsert)
+        return UpdateResult(result.matched_count, result.modified_count, result.upserted_id)
+
+    def delete_many(self, query_filter: Dict[str, Any]) -> int:
+        return self._collection.delete_many(query_filter).deleted_count
+
+    def count_documents(self, query_filter: Dict[str, Any]) -> int:
+        return self._collection.count_documents(query_filter)
+
+    def count_by(self, field: str, query_filter: Optional[Dict[str, Any]] = None) -> Dict[Any, int]:
+        pipeline = [{"$group": {"_id": f"${field}", "count": {"$sum": 1}}}]
+        if query_filter:
+            pipeline.insert(0, {"$match": query_filter})
+        return {row["_id"]: row["count"] for row in self._collection.aggregate(pipeline)}
+
+    def average_by(self, field: str, value_field: str,
+                   query_filter: Optional[Dict[str, Any]] = None) -> Dict[Any, Dict[str, float]]:
+        pipeline = [
+            {"$match": {**(query_filter or {}), value_field: {"$type": "number"}}},
+            {"$group": {"_id": f"${field}", "avg": {"$avg": f"${value_field}"}, "count": {"$sum": 1}}}
+        ]
+        return {row["_id"]: {"avg": row["avg"], "count": row["count"]} for row in self._collection.aggregate(pipeline)}
+
+    def create_index(self, keys: IndexKeys, unique: bool = False, expire_after_seconds: Optional[int] = None):
+        options = {"unique": unique}
+        if expire_after_seconds is not None:
+            options["expireAfterSeconds"] = expire_after_seconds
+        try:
+            self._collection.create_index(keys, **options)
+        except OperationFailure as e:
+            # IndexOptionsConflict: el indice TTL ya existe con otro plazo; collMod lo cambia sin reconstruirlo
+            if e.code != 85 or expire_after_seconds is None:
+                raise
+            self._collection.database.command(
+                "collMod", self.name,
+                index={"keyPattern": dict(normalize_keys(keys)), "expireAfterSeconds": expire_after_seconds}
+            )
+
+
+class MongoStorage(StorageBackend):
+    name = "mongo"
+
+    def __init__(self, mongodb_uri: str, database_name: str = "eventos_escolares"):
+        self.pool_listener = PoolStatsListener()
+        self.client = MongoClient(mongodb_uri, **self._client_options(mongodb_uri))
+        self.db = self.client[database_name]
+
+        # Colecciones por (nombre, read preference); with_options crea un objeto nuevo en cada llamada
+        self._collections = {}
+        self._lock = threading.Lock()
+
+    def _client_options(self, mongodb_uri: Optional[str]) -> Dict[str, Any]:
+        """Opciones del MongoClient desde settings.
+
+        Las opciones escritas en la URI tienen prioridad (pymongo da prioridad a
+        los kwargs, asi que no se pasan); las no definidas quedan en el default.
+        """
+        uri_options = {name.lower() for name in parse_qs(urlsplit(mongodb_uri or "").query)}
+
+        configured = {
+            "maxPoolSize": MONGO_MAX_POOL_SIZE,
+            "minPoolSize": MONGO_MIN_POOL_SIZE,
+            "maxIdleTimeMS": MONGO_MAX_IDLE_TIME_MS,
+            "waitQueueTimeoutMS": MONGO_WAIT_QUEUE_TIMEOUT_MS,
+            "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+            "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+            "socketTimeoutMS": MONGO_SOCKET_TIMEOUT_MS,
+            "zlibCompressionLevel": MONGO_ZLIB_COMPRESSION_LEVEL if MONGO_COMPRESSORS else None
+        }
+        options = {"event_listeners": [self.pool_listener]}
+        for option, value in configured.items():
+            if value not in (None, "") and option.lower() not in uri_options:
+                options[option] = int(value)
+
+        if MONGO_COMPRESSORS and "compressors" not in uri_options:
+            options["compressors"] = MONGO_COMPRESSORS
+        self.compressors = parse_qs(urlsplit(mongodb_uri or "").query).get("compressors", [MONGO_COMPRESSORS])[0]
+
+        return options
+
+    def collection(self, name: str, read_preference: Optional[str] = None) -> MongoCollection:
+        key = (name, read_preference or "primary")
+        with self._lock:
+            if key not in self._collections:
+                collection = self.db[name]
+                if read_preference and read_preference != "primary":
+                    mode = read_pref_mode_from_name(read_preference)
+                    collection = collection.with_options(
+                        read_preference=make_read_preference(mode, None, MONGO_MAX_STALENESS_SECONDS)
+                    )
+                self._collections[key] = MongoCollection(collection)
+            return self._collections[key]
+
+    def list_collection_names(self) -> List[str]:
+        return self.db.list_collection_names()
+
+    def create_collection(self, name: str, capped_bytes: Optional[int] = None, capped_max: Optional[int] = None,
+                          block_compressor: Optional[str] = None):
+        options = {}
+        if capped_bytes:
+            options.update({"capped": True, "size": capped_bytes})
+            if capped_max:
+                options["max"] = capped_max
+        if block_compressor:
+            options["storageEngine"] = {"wiredTiger": {"configString": f"block_compressor={block_compressor}"}}
+        self.db.create_collection(name, **options)
+
+    def collection_options(self, name: str) -> Dict[str, Any]:
+        return self.db[name].options()
+
+    def timeout(self, seconds: float):
+        # pymongo.timeout (CSOT) hace que el driver envie maxTimeMS con el tiempo
+        # restante en cada find/update, ademas de acotar la seleccion de servidor
+        return pymongo.timeout(seconds)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estadisticas del pool de conexiones"""
+        options = self.client.options.pool_options
+        return {
+            "backend": self.name,
+            "config": {
+                "max_pool_size": options.max_pool_size,
+                "min_pool_size": options.min_pool_size,
+                "max_idle_time_seconds": options.max_idle_time_seconds,
+                "wait_queue_timeout": options.wait_queue_timeout,
+                "connect_timeout": options.connect_timeout,
+                "socket_timeout": options.socket_timeout,
+                "compressors": [name for name in self.compressors.split(",") if name]
+            },
+            "servers": self.pool_listener.get_stats()
+        }
+
+    def close(self):
+        self.client.close()
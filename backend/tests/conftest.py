@@ -0,0 +1,33 @@
+"""Fixtures comunes: motor de almacenamiento en memoria y modelo local, sin MongoDB ni Gemini.
+
+Las variables se fijan antes de importar config.settings (se leen al importar).
+"""
+import sys
+import os
+
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+os.environ.setdefault("LLM_PROVIDER", "local")
+os.environ.setdefault("LOCAL_LLM_LATENCY_MS", "0")
+os.environ.setdefault("LOCAL_LLM_LATENCY_DISTRIBUTION", "fixed")
+os.environ.setdefault("LLM_WARMUP_ON_STARTUP", "false")
+os.environ.setdefault("IDEMPOTENCY_WAIT_SECONDS", "0.2")
+os.environ.setdefault("IDEMPOTENCY_POLL_INTERVAL_MS", "20")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from agents.database_agent import DatabaseAgent
+from storage.memory import MemoryStorage
+
+
+@pytest.fixture
+def storage():
+    return MemoryStorage()
+
+
+@pytest.fixture
+def database_agent(storage):
+    agent = DatabaseAgent("", storage=storage)
+    yield agent
+    agent.close()
@@ -0,0 +1,86 @@
+import time
+
+from utils.circuit_breaker import CircuitBreaker
+
+
+def make_breaker(**overrides):
+    options = dict(window_size=4, min_calls=2, failure_rate=0.5, slow_call_seconds=1.0,
+                   slow_call_rate=0.8, open_seconds=0.05, half_open_calls=1)
+    options.update(overrides)
+    return CircuitBreaker("test", **options)
+
+
+def test_opens_when_failure_rate_reached():
+    breaker = make_breaker()
+    breaker.record_success(0.1)
+    assert breaker.state == "closed"
+
+    breaker.record_failure(0.1)
+    assert breaker.state == "open"
+    assert breaker.allow_request() is False
+    assert breaker.get_status()["counters"]["rejected"] == 1
+
+
+def test_stays_closed_below_min_calls():
+    breaker = make_breaker(min_calls=3)
+    breaker.record_failure(0.1)
+    breaker.record_failure(0.1)
+    assert breaker.state == "closed"
+
+
+def test_slow_calls_open_the_circuit():
+    breaker = make_breaker()
+    breaker.record_success(2.0)
+    breaker.record_success(2.0)
+    assert breaker.state == "open"
+
+
+def test_half_open_trial_success_closes():
+    breaker = make_breaker()
+    breaker.record_failure(0.1)
+    breaker.record_failure(0.1)
+    time.sleep(0.06)
+
+    assert breaker.allow_request() is True
+    assert breaker.state == "half_open"
+    # Solo half_open_calls pruebas a la vez
+    assert breaker.allow_request() is False
+
+    breaker.record_success(0.1)
+    assert breaker.state == "closed"
+    assert breaker.allow_request() is True
+
+
+def test_half_open_trial_failure_reopens():
+    breaker = make_breaker()
+    breaker.record_failure(0.1)
+    breaker.record_failure(0.1)
+    time.sleep(0.06)
+
+    assert breaker.allow_request() is True
+    breaker.record_failure(0.1)
+    assert breaker.state == "open"
+    assert breaker.get_status()["counters"]["times_opened"] == 2
+
+
+def test_release_frees_half_open_slot():
+    breaker = make_breaker()
+    breaker.record_failure(0.1)
+    breaker.record_failure(0.1)
+    time.sleep(0.06)
+
+    assert breaker.allow_request() is True
+    breaker.release()
+    assert breaker.state == "half_open"
+    assert breaker.allow_request() is True
+
+
+def test_reset_closes_and_clears_window():
+    breaker = make_breaker()
+    breaker.record_failure(0.1)
+    breaker.record_failure(0.1)
+    breaker.reset()
+
+    assert breaker.state == "closed"
+    breaker.record_failure(0.1)
+    assert breaker.state == "closed"
@@ -0,0 +1,73 @@
+import asyncio
+import uuid
+
+import httpx
+
+import main
+from agents.database_agent import DatabaseAgent
+
+
+def run_with_client(scenario):
+    """Ejecutar scenario(client) con la app levantada (lifespan incluido)"""
+    async def run():
+        async with main.lifespan(main.app):
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                await scenario(client)
+    asyncio.run(run())
+
+
+def other_process() -> DatabaseAgent:
+    # Otro proceso (intake, worker, scripts) escribiendo en la misma base
+    return DatabaseAgent("", initialize=False, storage=main.database_agent.storage)
+
+
+def write(agent, collection, data):
+    message = agent.acp_protocol.create_write_request(
+        message_id=str(uuid.uuid4()), sender="Script", collection=collection, data=data
+    )
+    assert agent.process_acp_message(message.model_dump()).status == "success"
+
+
+def event_ids(response):
+    return sorted(event["event_id"] for event in response.json()["payload"]["events"])
+
+
+def test_unchanged_collection_answers_304():
+    async def scenario(client):
+        first = await client.get("/api/events")
+        second = await client.get("/api/events", headers={"If-None-Match": first.headers["etag"]})
+        assert second.status_code == 304
+
+    run_with_client(scenario)
+
+
+def test_write_from_other_process_changes_etag_and_body():
+    async def scenario(client):
+        write(main.database_agent, "events", {"event_id": "e1", "created_at": "1"})
+        first = await client.get("/api/events")
+        assert event_ids(first) == ["e1"]
+
+        # El cache local no ve esta escritura; la version persistida si
+        write(other_process(), "events", {"event_id": "e2", "created_at": "2"})
+        second = await client.get("/api/events", headers={"If-None-Match": first.headers["etag"]})
+        assert second.status_code == 200
+        assert second.headers["etag"] != first.headers["etag"]
+        assert event_ids(second) == ["e1", "e2"]
+
+        third = await client.get("/api/events", headers={"If-None-Match": second.headers["etag"]})
+        assert third.status_code == 304
+
+    run_with_client(scenario)
+
+
+def test_plans_listing_follows_other_process_writes():
+    async def scenario(client):
+        first = await client.get("/api/plans")
+        write(other_process(), "plans", {"plan_id": "p1", "tasks": [], "created_at": "1"})
+
+        second = await client.get("/api/plans", headers={"If-None-Match": first.headers["etag"]})
+        assert second.status_code == 200
+        assert [plan["plan_id"] for plan in second.json()["payload"]["plans"]] == ["p1"]
+
+    run_with_client(scenario)
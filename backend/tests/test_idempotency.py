@@ -0,0 +1,126 @@
+from datetime import datetime, timedelta
+import json
+import threading
+
+import pytest
+from fastapi import HTTPException, Response
+
+from utils.idempotency import IdempotencyStore, request_fingerprint
+
+
+def agui_response(status="success", **payload):
+    return Response(content=json.dumps({"status": status, "payload": payload}), media_type="application/json")
+
+
+class CountingHandler:
+    def __init__(self, response_factory):
+        self.calls = 0
+        self.response_factory = response_factory
+
+    def __call__(self):
+        self.calls += 1
+        return self.response_factory(self.calls)
+
+
+@pytest.fixture
+def store(database_agent):
+    return IdempotencyStore(database_agent)
+
+
+def test_without_key_always_executes(store):
+    handler = CountingHandler(lambda call: agui_response(call=call))
+    store.run("create_plan", None, {"a": 1}, handler)
+    store.run("create_plan", None, {"a": 1}, handler)
+    assert handler.calls == 2
+
+
+def test_retry_replays_stored_response(store):
+    handler = CountingHandler(lambda call: agui_response(call=call))
+    first = store.run("create_plan", "key-1", {"a": 1}, handler)
+    second = store.run("create_plan", "key-1", {"a": 1}, handler)
+
+    assert handler.calls == 1
+    assert second.body == first.body
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert store.get_metrics()["replayed"] == 1
+
+
+def test_same_key_on_other_endpoint_is_independent(store):
+    handler = CountingHandler(lambda call: agui_response(call=call))
+    store.run("create_plan", "key-1", {"a": 1}, handler)
+    store.run("execute_plan", "key-1", {"a": 1}, handler)
+    assert handler.calls == 2
+
+
+def test_key_reused_with_other_payload_conflicts(store):
+    store.run("create_plan", "key-1", {"a": 1}, lambda: agui_response())
+
+    with pytest.raises(HTTPException) as error:
+        store.run("create_plan", "key-1", {"a": 2}, lambda: agui_response())
+    assert error.value.status_code == 422
+
+
+def test_error_response_is_not_stored(store):
+    handler = CountingHandler(lambda call: agui_response("error" if call == 1 else "success", call=call))
+    first = store.run("register_student", "key-1", {"a": 1}, handler)
+    second = store.run("register_student", "key-1", {"a": 1}, handler)
+
+    assert json.loads(first.body)["status"] == "error"
+    assert json.loads(second.body)["payload"]["call"] == 2
+    assert "Idempotent-Replayed" not in second.headers
+
+
+def test_concurrent_duplicate_waits_for_original(store):
+    started, release = threading.Event(), threading.Event()
+
+    def slow_handler():
+        started.set()
+        release.wait(5)
+        return agui_response(call="original")
+
+    results = {}
+    original = threading.Thread(target=lambda: results.update(first=store.run("create_plan", "key-1", {"a": 1}, slow_handler)))
+    original.start()
+    started.wait(5)
+    threading.Timer(0.05, release.set).start()
+
+    duplicate = store.run("create_plan", "key-1", {"a": 1}, lambda: agui_response(call="duplicate"))
+    original.join(5)
+
+    assert json.loads(duplicate.body)["payload"]["call"] == "original"
+    assert duplicate.headers["Idempotent-Replayed"] == "true"
+
+
+def test_in_progress_elsewhere_answers_409_after_wait(store, storage):
+    # Registro en curso de otro proceso con el lock vigente
+    storage.collection("idempotency_keys").insert_one({
+        "key": "create_plan:key-1",
+        "fingerprint": request_fingerprint({"a": 1}),
+        "status": "in_progress",
+        "owner": "other",
+        "locked_until": datetime.utcnow() + timedelta(seconds=60),
+        "expires_at": datetime.utcnow() + timedelta(seconds=60)
+    })
+    handler = CountingHandler(lambda call: agui_response())
+
+    with pytest.raises(HTTPException) as error:
+        store.run("create_plan", "key-1", {"a": 1}, handler)
+    assert error.value.status_code == 409
+    assert error.value.headers["Retry-After"]
+    assert handler.calls == 0
+
+
+def test_expired_lock_is_taken_over(store, storage):
+    storage.collection("idempotency_keys").insert_one({
+        "key": "create_plan:key-1",
+        "fingerprint": request_fingerprint({"a": 1}),
+        "status": "in_progress",
+        "owner": "crashed",
+        "locked_until": datetime.utcnow() - timedelta(seconds=1),
+        "expires_at": datetime.utcnow() + timedelta(seconds=60)
+    })
+    handler = CountingHandler(lambda call: agui_response())
+
+    store.run("create_plan", "key-1", {"a": 1}, handler)
+    assert handler.calls == 1
+    assert store.get_metrics()["takeovers"] == 1
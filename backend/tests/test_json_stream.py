@@ -0,0 +1,60 @@
+import json
+
+from utils.json_stream import IncrementalTaskParser
+
+
+PLAN = {
+    "plan_summary": "Plan {con llaves} y \"comillas\"",
+    "total_tasks": 3,
+    "tasks": [
+        {"task_name": "Reservar", "parameters": {"action": "reserve_space", "capacity": 50}},
+        {"task_name": "Catering [menu]", "description": "llave } en texto", "parameters": {}},
+        {"task_name": "Logistica", "dependencies": ["t1", "t2"], "parameters": {"nested": {"a": [1, {"b": 2}]}}}
+    ],
+    "estimated_duration": "2 semanas"
+}
+
+
+def feed_in_chunks(parser, text, size):
+    emitted = []
+    for start in range(0, len(text), size):
+        emitted.append(parser.feed(text[start:start + size]))
+    return emitted
+
+
+def test_each_task_is_emitted_when_it_closes():
+    text = json.dumps(PLAN, ensure_ascii=False)
+    parser = IncrementalTaskParser()
+    emitted = feed_in_chunks(parser, text, 1)
+
+    tasks = [task for chunk in emitted for task in chunk]
+    assert tasks == PLAN["tasks"]
+    # La primera tarea sale antes de que llegue el resto de la respuesta
+    first_index = next(index for index, chunk in enumerate(emitted) if chunk)
+    assert first_index < len(text) - len(json.dumps(PLAN["tasks"][1:], ensure_ascii=False))
+    assert parser.finish() == PLAN
+
+
+def test_ignores_code_fences_and_arbitrary_chunking():
+    text = "```json\n" + json.dumps(PLAN) + "\n```"
+    for size in (2, 7, 64, len(text)):
+        parser = IncrementalTaskParser()
+        tasks = [task for chunk in feed_in_chunks(parser, text, size) for task in chunk]
+        assert tasks == PLAN["tasks"]
+        assert parser.finish() == PLAN
+
+
+def test_only_top_level_tasks_array_is_streamed():
+    text = json.dumps({"meta": {"tasks": [{"x": 1}]}, "tasks": [{"y": 2}]})
+    parser = IncrementalTaskParser()
+    assert parser.feed(text) == [{"y": 2}]
+
+
+def test_truncated_stream_keeps_emitted_tasks():
+    text = json.dumps(PLAN)
+    cut = text.index("Logistica")
+    parser = IncrementalTaskParser()
+    tasks = parser.feed(text[:cut])
+
+    assert tasks == PLAN["tasks"][:2]
+    assert parser.finish() is None
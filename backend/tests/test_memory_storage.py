@@ -0,0 +1,45 @@
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+
+def test_conditional_inc_only_matches_when_enough_left(storage):
+    events = storage.collection("events")
+    events.insert_one({"event_id": "e1", "seats_left": 2})
+
+    assert events.update_many({"event_id": "e1", "seats_left": {"$gte": 3}}, {"$inc": {"seats_left": -3}}).matched_count == 0
+    assert events.update_many({"event_id": "e1", "seats_left": {"$gte": 2}}, {"$inc": {"seats_left": -2}}).matched_count == 1
+    assert events.find_one({"event_id": "e1"})["seats_left"] == 0
+
+
+def test_upsert_builds_document_from_filter_equalities(storage):
+    versions = storage.collection("collection_versions")
+    versions.update_many({"collection": "events"}, {"$inc": {"version": 1}, "$setOnInsert": {"epoch": "a"}}, upsert=True)
+    versions.update_many({"collection": "events"}, {"$inc": {"version": 1}, "$setOnInsert": {"epoch": "b"}}, upsert=True)
+
+    document = versions.find_one({"collection": "events"}, {"_id": 0})
+    assert document == {"collection": "events", "version": 2, "epoch": "a"}
+
+
+def test_unique_index_rejects_duplicates(storage):
+    registrations = storage.collection("student_registrations")
+    registrations.create_index([("event_id", 1), ("student_email", 1)], unique=True)
+    registrations.insert_one({"event_id": "e1", "student_email": "a@x"})
+
+    with pytest.raises(DuplicateKeyError):
+        registrations.insert_one({"event_id": "e1", "student_email": "a@x"})
+    registrations.insert_one({"event_id": "e2", "student_email": "a@x"})
+    assert registrations.count_documents({"student_email": "a@x"}) == 2
+
+
+def test_missing_field_matches_ne_null_like_mongo(storage):
+    executions = storage.collection("executions")
+    executions.insert_many([{"action": "a", "execution_time": 2.0, "status": "success"},
+                            {"action": None, "execution_time": 9.0, "status": "success"},
+                            {"execution_time": 9.0, "status": "success"}])
+
+    assert executions.average_by("action", "execution_time", {"action": {"$ne": None}}) == {"a": {"avg": 2.0, "count": 1}}
+
+
+def test_database_agent_initializes_collections_and_indexes(database_agent):
+    assert database_agent.ready.is_set()
+    assert set(database_agent.COLLECTIONS) <= set(database_agent.storage.list_collection_names())
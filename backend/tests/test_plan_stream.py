@@ -0,0 +1,94 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from agents.planning_agent import PlanningAgent
+from utils.circuit_breaker import CircuitBreaker
+
+
+EVENT = {
+    "event_id": "e1",
+    "event_name": "Feria de ciencias",
+    "event_type": "feria",
+    "event_date": "2026-11-20",
+    "expected_attendees": 120,
+    "budget": 5000.0,
+    "description": "Feria anual"
+}
+
+STREAMED_TASKS = [
+    {"task_name": "Reservar auditorio", "description": "Auditorio principal", "priority": 5,
+     "parameters": {"action": "reserve_space", "capacity": 120}},
+    {"task_name": "Definir presupuesto", "description": "Repartir el presupuesto", "priority": 4,
+     "parameters": {"action": "manage_budget", "budget": 5000}}
+]
+
+
+class StreamingLLM:
+    """Modelo falso que entrega la respuesta en trozos y se detiene donde se le indique"""
+
+    def __init__(self, text, size=16, error=None):
+        self.text = text
+        self.size = size
+        self.error = error
+
+    def stream(self, prompt):
+        for start in range(0, len(self.text), self.size):
+            yield SimpleNamespace(content=self.text[start:start + self.size])
+        if self.error:
+            raise self.error
+
+
+def cut_after_streamed_tasks():
+    """Respuesta cortada justo despues de cerrar la segunda tarea"""
+    text = json.dumps({"plan_summary": "Plan de Gemini", "tasks": STREAMED_TASKS + [{"task_name": "Cat"}]})
+    return text[:text.index('{"task_name": "Cat')]
+
+
+def agent_with(llm):
+    agent = PlanningAgent(None)
+    agent._llm_loader._model = llm
+    agent._llm_loader._loaded = True
+    agent.circuit_breaker = CircuitBreaker(name="test")
+    return agent
+
+
+@pytest.mark.parametrize("error", [None, RuntimeError("conexion perdida")])
+def test_interrupted_stream_is_completed_with_fallback_tasks(error):
+    agent = agent_with(StreamingLLM(cut_after_streamed_tasks(), error=error))
+    items = list(agent.generate_plan_stream(dict(EVENT)))
+
+    kinds = [item["type"] for item in items]
+    assert kinds == ["task", "task", "fallback", "task", "task", "plan"]
+    fallback = items[2]
+    assert fallback["streamed_tasks"] == 2 and fallback["fallback_tasks"] == 2
+
+    plan = items[-1]["plan"]
+    assert plan["completed_with_fallback"] is True
+    assert plan["total_tasks"] == 4
+    tasks = plan["tasks"]
+    assert [task["parameters"]["action"] for task in tasks] == [
+        "reserve_space", "manage_budget", "hire_catering", "coordinate_logistics"
+    ]
+    # Las tareas emitidas se conservan tal como llegaron de Gemini
+    assert tasks[0]["task_name"] == "Reservar auditorio"
+    # Las automaticas siguen la numeracion y dependen de tareas que existen en el plan
+    plan_id = plan["plan_id"]
+    assert [task["task_id"] for task in tasks] == [f"{plan_id}-task-{index}" for index in range(1, 5)]
+    assert tasks[2]["dependencies"] == [f"{plan_id}-task-1"]
+    assert tasks[3]["dependencies"] == [f"{plan_id}-task-1", f"{plan_id}-task-3"]
+    # Lo que vio el cliente por el stream coincide con el plan final
+    assert [item["task"] for item in items if item["type"] == "task"] == tasks
+
+
+def test_complete_stream_is_not_marked_as_fallback():
+    text = json.dumps({"plan_summary": "Plan de Gemini", "tasks": STREAMED_TASKS})
+    agent = agent_with(StreamingLLM(text))
+    items = list(agent.generate_plan_stream(dict(EVENT)))
+
+    assert [item["type"] for item in items] == ["task", "task", "plan"]
+    plan = items[-1]["plan"]
+    assert "completed_with_fallback" not in plan
+    assert plan["plan_summary"] == "Plan de Gemini"
+    assert plan["total_tasks"] == 2
@@ -0,0 +1,100 @@
+import threading
+import time
+
+import pytest
+
+from utils.registration_intake import RegistrationIntake, EVENT_FULL, EVENT_NOT_FOUND, ALREADY_REGISTERED
+
+
+def ticket_for(event_id, index):
+    return {"event_id": event_id, "student_name": f"Estudiante {index}",
+            "student_email": f"s{index}@escuela.edu", "student_id": str(index)}
+
+
+@pytest.fixture
+def event(storage):
+    event = {"event_id": "e1", "event_name": "Feria", "expected_attendees": 3}
+    storage.collection("events").insert_one(dict(event))
+    return event
+
+
+@pytest.fixture
+def commits():
+    return []
+
+
+@pytest.fixture
+def intake(database_agent, commits):
+    return RegistrationIntake(database_agent, lambda event, registrations, rejected: commits.append((registrations, rejected)))
+
+
+def statuses(intake, tickets):
+    return [(intake.get_ticket(ticket["ticket_id"])["status"], intake.get_ticket(ticket["ticket_id"]).get("reason"))
+            for ticket in tickets]
+
+
+def test_batch_confirms_up_to_capacity_in_arrival_order(intake, event, storage, commits):
+    tickets = [intake.enqueue(ticket_for("e1", index)) for index in range(5)]
+
+    assert intake.process_batch() == 5
+    assert statuses(intake, tickets) == [("confirmed", None)] * 3 + [("rejected", EVENT_FULL)] * 2
+    assert storage.collection("student_registrations").count_documents({"event_id": "e1"}) == 3
+    assert storage.collection("events").find_one({"event_id": "e1"})["seats_left"] == 0
+    registrations, rejected = commits[0]
+    assert [registration["registration_id"] for registration in registrations] == [ticket["ticket_id"] for ticket in tickets[:3]]
+    assert len(rejected) == 2
+
+
+def test_duplicates_are_rejected_in_batch_and_against_existing(intake, event, storage):
+    storage.collection("student_registrations").insert_one({"registration_id": "old", "event_id": "e1",
+                                                            "student_email": "s0@escuela.edu"})
+    tickets = [intake.enqueue(ticket_for("e1", index)) for index in (0, 1, 1)]
+
+    intake.process_batch()
+    assert statuses(intake, tickets) == [("rejected", ALREADY_REGISTERED), ("confirmed", None),
+                                         ("rejected", ALREADY_REGISTERED)]
+    # El duplicado no consume cupo: quedan capacidad - inscripciones
+    assert storage.collection("events").find_one({"event_id": "e1"})["seats_left"] == 1
+
+
+def test_unknown_event_is_rejected(intake):
+    ticket = intake.enqueue(ticket_for("missing", 1))
+    intake.process_batch()
+    assert statuses(intake, [ticket]) == [("rejected", EVENT_NOT_FOUND)]
+
+
+def test_concurrent_workers_never_overbook(database_agent, storage):
+    storage.collection("events").insert_one({"event_id": "e2", "expected_attendees": 20})
+    workers = [RegistrationIntake(database_agent) for _ in range(4)]
+    for worker in workers:
+        worker.batch_size = 7
+    for index in range(60):
+        workers[0].enqueue(ticket_for("e2", index))
+
+    def drain(worker):
+        while worker.process_batch():
+            pass
+
+    threads = [threading.Thread(target=drain, args=(worker,)) for worker in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    queue = storage.collection("registration_queue")
+    assert storage.collection("student_registrations").count_documents({"event_id": "e2"}) == 20
+    assert queue.count_documents({"status": "confirmed"}) == 20
+    assert queue.count_documents({"status": "rejected", "reason": EVENT_FULL}) == 40
+
+
+def test_stale_claims_return_to_the_queue(intake, event, storage):
+    ticket = intake.enqueue(ticket_for("e1", 1))
+    storage.collection("registration_queue").update_many(
+        {"ticket_id": ticket["ticket_id"]},
+        {"$set": {"status": "processing", "claimed_by": "crashed", "claimed_at": time.time() - 3600}}
+    )
+    assert intake.process_batch() == 0
+
+    intake._requeue_stale()
+    assert intake.process_batch() == 1
+    assert statuses(intake, [ticket]) == [("confirmed", None)]
@@ -0,0 +1,81 @@
+import pytest
+
+from agents.planning_agent import PlanningAgent
+
+
+EVENT = {
+    "event_id": "e1",
+    "event_name": "Feria de ciencias",
+    "event_type": "feria",
+    "event_date": "2026-11-20",
+    "expected_attendees": 120,
+    "budget": 5000.0,
+    "description": "Feria anual"
+}
+
+
+@pytest.fixture
+def planning_agent():
+    return PlanningAgent(None)
+
+
+@pytest.fixture
+def previous_plan(planning_agent):
+    plan = planning_agent._create_fallback_plan("p1", dict(EVENT))
+    # El plan guardado conserva los datos del evento con los que se genero
+    plan["event_details"] = dict(EVENT)
+    return plan
+
+
+def task_ids(plan):
+    return [task["task_id"] for task in plan["tasks"]]
+
+
+def test_diff_reports_changed_input_fields(planning_agent):
+    changed = planning_agent.diff_event_details(EVENT, {**EVENT, "budget": 1.0, "organizer_email": "x@y"})
+    assert changed == ["budget"]
+
+
+def test_unchanged_event_keeps_plan(planning_agent, previous_plan):
+    plan = planning_agent.replan(previous_plan, dict(EVENT))
+
+    assert plan["replan"]["mode"] == "unchanged"
+    assert plan["replan"]["kept_tasks"] == task_ids(previous_plan)
+    assert task_ids(plan) == task_ids(previous_plan)
+
+
+def test_budget_change_regenerates_only_dependent_tasks(planning_agent, previous_plan):
+    plan = planning_agent.replan(previous_plan, {**EVENT, "budget": 8000.0})
+    replan = plan["replan"]
+    by_action = {task["parameters"]["action"]: task["task_id"] for task in previous_plan["tasks"]}
+
+    assert replan["mode"] == "incremental"
+    assert replan["changed_fields"] == ["budget"]
+    assert plan["version"] == 2
+    assert sorted(replan["regenerated_tasks"]) == sorted(
+        f"{by_action[action]}-v2" for action in ("hire_catering", "manage_budget")
+    )
+    assert by_action["reserve_space"] in replan["kept_tasks"]
+    assert by_action["coordinate_logistics"] in replan["kept_tasks"]
+    assert len(plan["tasks"]) == len(previous_plan["tasks"])
+
+
+def test_dependencies_follow_renamed_tasks(planning_agent, previous_plan):
+    plan = planning_agent.replan(previous_plan, {**EVENT, "expected_attendees": 300})
+    current_ids = set(task_ids(plan))
+
+    for task in plan["tasks"]:
+        assert set(task["dependencies"]) <= current_ids
+    # Una segunda replanificacion no acumula sufijos de version
+    again = planning_agent.replan(plan, {**EVENT, "expected_attendees": 400})
+    assert all(not task_id.endswith("-v2-v3") for task_id in task_ids(again))
+    assert any(task_id.endswith("-v3") for task_id in task_ids(again))
+
+
+def test_structural_change_or_force_full_regenerates_everything(planning_agent, previous_plan):
+    plan = planning_agent.replan(previous_plan, {**EVENT, "event_type": "graduacion"})
+    assert plan["replan"]["mode"] == "full"
+    assert plan["replan"]["kept_tasks"] == []
+
+    forced = planning_agent.replan(previous_plan, dict(EVENT), force_full=True)
+    assert forced["replan"]["mode"] == "full"
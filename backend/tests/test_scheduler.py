@@ -0,0 +1,95 @@
+from utils.scheduler import CriticalPathScheduler, TaskDurationEstimator
+
+
+def task(task_id, dependencies=(), priority=1):
+    return {"task_id": task_id, "dependencies": list(dependencies), "priority": priority}
+
+
+def run_in_order(scheduler):
+    """Orden de arranque ejecutando de a una tarea"""
+    order = []
+    while scheduler.has_pending():
+        next_task = scheduler.ready()[0]
+        scheduler.start(next_task["task_id"])
+        scheduler.finish(next_task["task_id"])
+        order.append(next_task["task_id"])
+    return order
+
+
+def test_longest_chain_starts_first():
+    tasks = [task("short"), task("head"), task("tail", ["head"])]
+    durations = {"short": 3.0, "head": 1.0, "tail": 5.0}
+    scheduler = CriticalPathScheduler(tasks, durations)
+
+    assert scheduler.ranks == {"short": 3.0, "head": 6.0, "tail": 5.0}
+    assert scheduler.critical_path_seconds() == 6.0
+    assert [item["task_id"] for item in scheduler.ready()] == ["head", "short"]
+    assert run_in_order(scheduler) == ["head", "tail", "short"]
+
+
+def test_priority_then_plan_order_break_ties():
+    tasks = [task("a", priority=1), task("b", priority=3), task("c", priority=3)]
+    scheduler = CriticalPathScheduler(tasks, {"a": 1.0, "b": 1.0, "c": 1.0})
+
+    assert [item["task_id"] for item in scheduler.ready()] == ["b", "c", "a"]
+
+
+def test_dependencies_gate_readiness():
+    tasks = [task("t1"), task("t2", ["t1"]), task("t3", ["t1", "t2"])]
+    scheduler = CriticalPathScheduler(tasks, {"t1": 1.0, "t2": 1.0, "t3": 1.0})
+
+    assert [item["task_id"] for item in scheduler.ready()] == ["t1"]
+    scheduler.start("t1")
+    assert scheduler.ready() == []
+    scheduler.finish("t1")
+    assert [item["task_id"] for item in scheduler.ready()] == ["t2"]
+
+
+def test_unknown_and_self_dependencies_are_ignored():
+    tasks = [task("t1", ["Reservar espacio", "t1"]), task("t2", ["t1"])]
+    scheduler = CriticalPathScheduler(tasks, {"t1": 1.0, "t2": 1.0})
+
+    assert scheduler.dependencies == {"t1": set(), "t2": {"t1"}}
+    assert run_in_order(scheduler) == ["t1", "t2"]
+
+
+def test_cycle_does_not_block_the_plan():
+    tasks = [task("a", ["c"]), task("b", ["a"]), task("c", ["b"]), task("free")]
+    scheduler = CriticalPathScheduler(tasks, {"a": 1.0, "b": 1.0, "c": 1.0, "free": 1.0})
+
+    order = run_in_order(scheduler)
+    assert sorted(order) == ["a", "b", "c", "free"]
+    # La tarea sin dependencias corre antes de romper el ciclo
+    assert order[0] == "free"
+    # Solo una tarea del ciclo arranca sin su dependencia; las demas la respetan
+    position = {task_id: index for index, task_id in enumerate(order)}
+    early = [task_id for task_id in ("a", "b", "c")
+             if any(position[dep] > position[task_id] for dep in scheduler.dependencies[task_id])]
+    assert len(early) == 1
+
+
+def test_estimator_uses_action_average_or_weighted_fallback():
+    estimator = TaskDurationEstimator(ttl_seconds=60, default_seconds=2.0)
+    assert estimator.estimate("reserve_space") == 2.0
+
+    estimator.refresh(lambda: {"reserve_space": {"avg": 4.0, "count": 1},
+                               "hire_catering": {"avg": 1.0, "count": 3},
+                               None: {"avg": 100.0, "count": 10}})
+    assert estimator.estimate("reserve_space") == 4.0
+    assert estimator.estimate("unknown") == (4.0 + 3.0) / 4
+
+
+def test_duration_stats_ignore_fallback_results_and_backfill_actions(database_agent, storage):
+    storage.collection("plans").insert_one({"plan_id": "p1", "tasks": [
+        {"task_id": "t1", "parameters": {"action": "reserve_space"}}
+    ]})
+    executions = storage.collection("executions")
+    executions.insert_many([
+        {"plan_id": "p1", "task_id": "t1", "status": "success", "execution_time": 2.0},
+        {"plan_id": "p1", "task_id": "t2", "status": "success", "execution_time": 50.0},
+        {"plan_id": "p1", "task_id": "t1", "action": "reserve_space", "fallback": True,
+         "status": "success", "execution_time": 0.0}
+    ])
+
+    assert database_agent.backfill_execution_actions() == 2
+    assert database_agent.get_task_duration_stats() == {"reserve_space": {"avg": 2.0, "count": 1}}
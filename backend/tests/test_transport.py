@@ -0,0 +1,109 @@
+import io
+import threading
+
+import pytest
+
+from utils import transport
+from utils.transport import (
+    AgentServer, FRAME_HEADER, CODEC_JSON, CODEC_MSGPACK, LoadBalancedTransport, RemoteAgentError,
+    SocketTransport, TransportError, encode_frame, parse_address, read_frame
+)
+
+
+MESSAGE = {"protocol": "ANP", "tasks": [{"task_id": "t1", "priority": 2}], "text": "áéí ñ", "ratio": 0.5}
+
+
+def test_frame_roundtrip_with_msgpack():
+    pytest.importorskip("msgpack")
+    frame = encode_frame(MESSAGE)
+    length, codec = FRAME_HEADER.unpack(frame[:FRAME_HEADER.size])
+
+    assert codec == CODEC_MSGPACK
+    assert length == len(frame) - FRAME_HEADER.size
+    assert read_frame(io.BytesIO(frame)) == MESSAGE
+
+
+def test_frame_roundtrip_with_json(monkeypatch):
+    monkeypatch.setattr(transport, "msgpack", None)
+    frame = encode_frame(MESSAGE)
+
+    assert FRAME_HEADER.unpack(frame[:FRAME_HEADER.size])[1] == CODEC_JSON
+    assert read_frame(io.BytesIO(frame)) == MESSAGE
+
+
+def test_consecutive_frames_on_one_stream():
+    stream = io.BytesIO(encode_frame({"n": 1}) + encode_frame({"n": 2}))
+    assert read_frame(stream) == {"n": 1}
+    assert read_frame(stream) == {"n": 2}
+    with pytest.raises(EOFError):
+        read_frame(stream)
+
+
+def test_truncated_and_oversized_frames_are_rejected():
+    frame = encode_frame(MESSAGE)
+    with pytest.raises(EOFError):
+        read_frame(io.BytesIO(frame[:-1]))
+
+    oversized = FRAME_HEADER.pack(transport.MAX_FRAME_BYTES + 1, CODEC_JSON)
+    with pytest.raises(ValueError):
+        read_frame(io.BytesIO(oversized))
+
+
+def test_parse_address():
+    assert parse_address("unix:/tmp/agent.sock")[1] == "/tmp/agent.sock"
+    assert parse_address("tcp:127.0.0.1:9000")[1] == ("127.0.0.1", 9000)
+    with pytest.raises(ValueError):
+        parse_address("http://localhost")
+
+
+@pytest.fixture
+def agent_server(tmp_path):
+    def handler(message, deadline):
+        if message.get("fail"):
+            raise RuntimeError("handler roto")
+        return {"echo": message, "has_deadline": deadline is not None}
+
+    server = AgentServer(f"unix:{tmp_path / 'agent.sock'}", {"ANP": handler})
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+
+
+def test_socket_transport_roundtrip_reuses_connection(agent_server):
+    client = SocketTransport(agent_server.address, pool_size=2, timeout_seconds=5)
+    try:
+        for index in range(3):
+            reply = client.request({"protocol": "ANP", "n": index}, timeout_seconds=2)
+            assert reply == {"echo": {"protocol": "ANP", "n": index}, "has_deadline": True}
+        assert client.get_metrics()["connections"] == 1
+    finally:
+        client.close()
+
+
+def test_remote_errors_are_reported(agent_server):
+    client = SocketTransport(agent_server.address, timeout_seconds=5)
+    try:
+        with pytest.raises(RemoteAgentError, match="handler roto"):
+            client.request({"protocol": "ANP", "fail": True})
+        with pytest.raises(RemoteAgentError, match="Protocolo no soportado"):
+            client.request({"protocol": "ACP"})
+    finally:
+        client.close()
+
+
+def test_load_balancer_fails_over_to_healthy_replica(agent_server, tmp_path):
+    down = SocketTransport(f"unix:{tmp_path / 'missing.sock'}", timeout_seconds=1)
+    healthy = SocketTransport(agent_server.address, timeout_seconds=5)
+    balancer = LoadBalancedTransport([down, healthy], retry_seconds=60)
+    try:
+        for _ in range(3):
+            assert balancer.request({"protocol": "ANP"})["echo"] == {"protocol": "ANP"}
+        metrics = balancer.get_metrics()
+        assert metrics["failovers"] == 1
+        assert metrics["replicas"][0]["down"] is True
+    finally:
+        balancer.close()
+
+    with pytest.raises(TransportError):
+        LoadBalancedTransport([down]).request({"protocol": "ANP"})
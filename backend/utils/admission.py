@@ -0,0 +1,257 @@
+from typing import Dict, Any, List, Optional, Tuple
+from collections import OrderedDict, deque
+from fastapi.responses import JSONResponse
+import asyncio
+import math
+import re
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.stats import summarize_samples
+
+
+# (metodo, ruta) -> carril; lo que no aparece va al carril "default"
+ROUTE_LANES = [
+    ("POST", re.compile(r"^/api/students/register$"), "registration"),
+    ("GET", re.compile(r"^/api/events/available$"), "registration"),
+    ("GET", re.compile(r"^/api/students/[^/]+/registrations$"), "registration"),
+    ("GET", re.compile(r"^/api/students/registrations/tickets/[^/]+$"), "registration"),
+    ("POST", re.compile(r"^/api/plan(/stream)?$"), "llm"),
+    ("POST", re.compile(r"^/api/events/[^/]+/replan$"), "llm"),
+    ("POST", re.compile(r"^/api/execute/[^/]+$"), "llm")
+]
+# Sondas y administracion nunca se rechazan
+EXEMPT_PREFIXES = ("/api/admin/", "/api/health/")
+
+
+class Lane:
+    """Carril de admision: limite de concurrencia, cola FIFO acotada y token bucket por cliente"""
+
+    def __init__(self, name: str, priority: int, max_concurrency: int, max_queue: int,
+                 queue_target_ms: float, rate_per_second: float, burst: float):
+        self.name = name
+        self.priority = priority
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_target_seconds = queue_target_ms / 1000.0
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.in_flight = 0
+        self.waiters: deque = deque()
+        self.max_depth = 0
+        # Media movil del tiempo de servicio, para estimar el Retry-After
+        self.service_seconds = 0.0
+        self._wait_ms = deque(maxlen=1000)
+        self._metrics = {
+            "admitted": 0,
+            "queued": 0,
+            "rate_limited": 0,
+            "shed_queue_full": 0,
+            "shed_latency": 0
+        }
+
+    def retry_after(self) -> int:
+        """Segundos estimados hasta vaciar la cola actual"""
+        service = self.service_seconds or self.queue_target_seconds
+        return max(1, math.ceil((len(self.waiters) + 1) * service / max(1, self.max_concurrency)))
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            **self._metrics,
+            "priority": self.priority,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "depth": len(self.waiters),
+            "max_depth": self.max_depth,
+            "max_queue": self.max_queue,
+            "queue_target_ms": self.queue_target_seconds * 1000,
+            "avg_service_ms": round(self.service_seconds * 1000, 3),
+            "queue_wait_ms": summarize_samples(self._wait_ms)
+        }
+
+
+class AdmissionController:
+    """Admision de solicitudes por carriles de prioridad.
+
+    - Cada cliente tiene un token bucket por carril; sin tokens se responde
+      429 con el tiempo hasta el siguiente token en Retry-After.
+    - Un carril admite hasta max_concurrency solicitudes y todos juntos
+      hasta max_concurrency global; el resto espera en la cola del carril.
+    - Al liberarse un lugar entra el primero de la cola del carril con mayor
+      prioridad (las inscripciones antes que la generacion de planes).
+    - Si la cola esta llena o su solicitud mas antigua ya supera la espera
+      objetivo del carril, la nueva se rechaza al instante con 503; una
+      solicitud que agota la espera objetivo en la cola tambien recibe 503.
+    """
+
+    def __init__(self, lanes: Dict[str, Dict[str, Any]], max_concurrency: int = 32,
+                 client_header: str = "", max_clients: int = 10000, enabled: bool = True):
+        self.enabled = enabled
+        self.max_concurrency = max_concurrency
+        self.client_header = client_header.encode("latin-1")
+        self.max_clients = max_clients
+        self.lanes = {name: Lane(name, **config) for name, config in lanes.items()}
+        self.in_flight = 0
+        self._buckets: "OrderedDict[Tuple[str, str], List[float]]" = OrderedDict()
+
+    def lane_for(self, method: str, path: str) -> Optional[str]:
+        if method == "OPTIONS" or not path.startswith("/api/") or path.startswith(EXEMPT_PREFIXES):
+            return None
+        for route_method, pattern, lane in ROUTE_LANES:
+            if method == route_method and pattern.match(path):
+                return lane
+        return "default"
+
+    def client_key(self, scope: Dict[str, Any]) -> str:
+        if self.client_header:
+            for name, value in scope.get("headers", []):
+                if name == self.client_header:
+                    # x-forwarded-for: el primer valor es el cliente original
+                    return value.decode("latin-1").split(",")[0].strip()
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    def _take_token(self, client: str, lane: Lane) -> float:
+        """0 si el cliente tenia un token; si no, segundos hasta el siguiente"""
+        if lane.rate_per_second <= 0:
+            return 0.0
+        now = time.monotonic()
+        key = (client, lane.name)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = [lane.burst, now]
+            self._buckets[key] = bucket
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(lane.burst, bucket[0] + (now - bucket[1]) * lane.rate_per_second)
+            bucket[1] = now
+
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0.0
+        return (1 - bucket[0]) / lane.rate_per_second
+
+    def _has_capacity(self, lane: Lane) -> bool:
+        return self.in_flight < self.max_concurrency and lane.in_flight < lane.max_concurrency
+
+    def _start(self, lane: Lane):
+        self.in_flight += 1
+        lane.in_flight += 1
+        lane._metrics["admitted"] += 1
+
+    async def acquire(self, lane_name: str, client: str) -> Optional[Tuple[int, int, str]]:
+        """None si la solicitud puede continuar; si no (status, retry_after, motivo)"""
+        lane = self.lanes[lane_name]
+
+        wait_for_token = self._take_token(client, lane)
+        if wait_for_token:
+            lane._metrics["rate_limited"] += 1
+            return 429, max(1, math.ceil(wait_for_token)), "Demasiadas solicitudes de este cliente"
+
+        if not lane.waiters and self._has_capacity(lane):
+            self._start(lane)
+            lane._wait_ms.append(0.0)
+            return None
+
+        now = time.monotonic()
+        if len(lane.waiters) >= lane.max_queue:
+            lane._metrics["shed_queue_full"] += 1
+            return 503, lane.retry_after(), "Servicio saturado, intenta de nuevo"
+        if lane.waiters and now - lane.waiters[0][1] >= lane.queue_target_seconds:
+            # La cola no se vacia a tiempo: rechazar ya en lugar de hacer esperar en vano
+            lane._metrics["shed_latency"] += 1
+            return 503, lane.retry_after(), "Servicio saturado, intenta de nuevo"
+
+        future = asyncio.get_running_loop().create_future()
+        waiter = (future, now)
+        lane.waiters.append(waiter)
+        lane.max_depth = max(lane.max_depth, len(lane.waiters))
+        lane._metrics["queued"] += 1
+
+        try:
+            await asyncio.wait({future}, timeout=lane.queue_target_seconds)
+        except asyncio.CancelledError:
+            # El cliente se desconecto mientras esperaba
+            if future.done():
+                self.release(lane_name)
+            else:
+                lane.waiters.remove(waiter)
+            raise
+
+        if future.done():
+            lane._wait_ms.append((time.monotonic() - now) * 1000)
+            return None
+
+        lane.waiters.remove(waiter)
+        future.cancel()
+        lane._metrics["shed_latency"] += 1
+        return 503, lane.retry_after(), "Servicio saturado, intenta de nuevo"
+
+    def release(self, lane_name: str, service_seconds: Optional[float] = None):
+        lane = self.lanes[lane_name]
+        self.in_flight -= 1
+        lane.in_flight -= 1
+        if service_seconds is not None:
+            lane.service_seconds = service_seconds if not lane.service_seconds else \
+                0.8 * lane.service_seconds + 0.2 * service_seconds
+        self._dispatch()
+
+    def _dispatch(self):
+        """Pasar los lugares libres a las colas, de mayor a menor prioridad"""
+        for lane in sorted(self.lanes.values(), key=lambda item: -item.priority):
+            while lane.waiters and self._has_capacity(lane):
+                future, _ = lane.waiters.popleft()
+                self._start(lane)
+                future.set_result(True)
+            if self.in_flight >= self.max_concurrency:
+                return
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "tracked_clients": len(self._buckets),
+            "lanes": {name: lane.get_metrics() for name, lane in self.lanes.items()}
+        }
+
+
+class AdmissionMiddleware:
+    """Middleware ASGI: decide antes de ocupar un hilo del threadpool"""
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.controller.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        lane = self.controller.lane_for(scope["method"], scope["path"])
+        if lane is None:
+            await self.app(scope, receive, send)
+            return
+
+        rejection = await self.controller.acquire(lane, self.controller.client_key(scope))
+        if rejection is not None:
+            status_code, retry_after, detail = rejection
+            response = JSONResponse(
+                {"detail": detail, "lane": lane},
+                status_code=status_code,
+                headers={"Retry-After": str(retry_after)}
+            )
+            await response(scope, receive, send)
+            return
+
+        start_time = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            # En streaming el lugar se ocupa hasta enviar el ultimo fragmento
+            self.controller.release(lane, time.monotonic() - start_time)
@@ -0,0 +1,193 @@
+from typing import Dict, Any
+from collections import deque
+from datetime import datetime
+import threading
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import (
+    LLM_BREAKER_WINDOW_SIZE,
+    LLM_BREAKER_MIN_CALLS,
+    LLM_BREAKER_FAILURE_RATE,
+    LLM_BREAKER_SLOW_CALL_SECONDS,
+    LLM_BREAKER_SLOW_CALL_RATE,
+    LLM_BREAKER_OPEN_SECONDS,
+    LLM_BREAKER_HALF_OPEN_CALLS
+)
+
+
+class CircuitBreaker:
+    """Circuit breaker por tasa de errores y latencia.
+
+    Estados:
+    - closed: las llamadas pasan y se registran en una ventana deslizante
+    - open: las llamadas se rechazan de inmediato hasta que pasa open_seconds
+    - half_open: se permiten algunas llamadas de prueba para decidir si cerrar
+    """
+
+    def __init__(self, name: str, window_size: int = 20, min_calls: int = 5,
+                 failure_rate: float = 0.5, slow_call_seconds: float = 15.0,
+                 slow_call_rate: float = 0.8, open_seconds: float = 30.0,
+                 half_open_calls: int = 2):
+        self.name = name
+        self.window_size = window_size
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+
+        self._lock = threading.Lock()
+        self._calls = deque(maxlen=window_size)
+        self._state = "closed"
+        self._opened_at = 0.0
+        self._trials_in_flight = 0
+        self._trial_successes = 0
+        self._last_transition = datetime.now().isoformat()
+        self._counters = {
+            "allowed": 0,
+            "rejected": 0,
+            "successes": 0,
+            "failures": 0,
+            "slow_calls": 0,
+            "times_opened": 0
+        }
+
+    def allow_request(self) -> bool:
+        """Indica si se puede intentar una llamada al proveedor"""
+        with self._lock:
+            if self._state == "open":
+                if time.monotonic() - self._opened_at < self.open_seconds:
+                    self._counters["rejected"] += 1
+                    return False
+                self._transition("half_open")
+
+            if self._state == "half_open":
+                if self._trials_in_flight >= self.half_open_calls:
+                    self._counters["rejected"] += 1
+                    return False
+                self._trials_in_flight += 1
+
+            self._counters["allowed"] += 1
+            return True
+
+    def record_success(self, latency: float):
+        with self._lock:
+            slow = latency >= self.slow_call_seconds
+            self._counters["successes"] += 1
+            if slow:
+                self._counters["slow_calls"] += 1
+
+            if self._state == "half_open":
+                self._trials_in_flight = max(0, self._trials_in_flight - 1)
+                if slow:
+                    self._open()
+                    return
+                self._trial_successes += 1
+                if self._trial_successes >= self.half_open_calls:
+                    self._transition("closed")
+                return
+
+            self._calls.append((True, slow))
+            self._evaluate()
+
+    def record_failure(self, latency: float):
+        with self._lock:
+            self._counters["failures"] += 1
+            if latency >= self.slow_call_seconds:
+                self._counters["slow_calls"] += 1
+
+            if self._state == "half_open":
+                self._trials_in_flight = max(0, self._trials_in_flight - 1)
+                self._open()
+                return
+
+            self._calls.append((False, latency >= self.slow_call_seconds))
+            self._evaluate()
+
+    def release(self):
+        """Liberar una llamada permitida sin veredicto (p. ej. cancelada por deadline)"""
+        with self._lock:
+            if self._state == "half_open":
+                self._trials_in_flight = max(0, self._trials_in_flight - 1)
+
+    def reset(self):
+        with self._lock:
+            self._transition("closed")
+
+    def _evaluate(self):
+        if self._state != "closed" or len(self._calls) < self.min_calls:
+            return
+
+        total = len(self._calls)
+        failures = sum(1 for ok, _ in self._calls if not ok)
+        slow = sum(1 for _, is_slow in self._calls if is_slow)
+
+        if failures / total >= self.failure_rate or slow / total >= self.slow_call_rate:
+            self._open()
+
+    def _open(self):
+        self._opened_at = time.monotonic()
+        self._counters["times_opened"] += 1
+        self._transition("open")
+
+    def _transition(self, state: str):
+        self._state = state
+        self._trials_in_flight = 0
+        self._trial_successes = 0
+        self._last_transition = datetime.now().isoformat()
+        if state == "closed":
+            self._calls.clear()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def get_status(self) -> Dict[str, Any]:
+        with self._lock:
+            total = len(self._calls)
+            failures = sum(1 for ok, _ in self._calls if not ok)
+            slow = sum(1 for _, is_slow in self._calls if is_slow)
+            retry_in = 0.0
+            if self._state == "open":
+                retry_in = max(0.0, self.open_seconds - (time.monotonic() - self._opened_at))
+
+            return {
+                "name": self.name,
+                "state": self._state,
+                "last_transition": self._last_transition,
+                "retry_in_seconds": round(retry_in, 2),
+                "window": {
+                    "calls": total,
+                    "failure_rate": round(failures / total, 3) if total else 0.0,
+                    "slow_call_rate": round(slow / total, 3) if total else 0.0
+                },
+                "config": {
+                    "window_size": self.window_size,
+                    "min_calls": self.min_calls,
+                    "failure_rate": self.failure_rate,
+                    "slow_call_seconds": self.slow_call_seconds,
+                    "slow_call_rate": self.slow_call_rate,
+                    "open_seconds": self.open_seconds,
+                    "half_open_calls": self.half_open_calls
+                },
+                "counters": dict(self._counters)
+            }
+
+
+# Instancia compartida por el Planificador y el Ejecutor
+gemini_breaker = CircuitBreaker(
+    name="gemini",
+    window_size=LLM_BREAKER_WINDOW_SIZE,
+    min_calls=LLM_BREAKER_MIN_CALLS,
+    failure_rate=LLM_BREAKER_FAILURE_RATE,
+    slow_call_seconds=LLM_BREAKER_SLOW_CALL_SECONDS,
+    slow_call_rate=LLM_BREAKER_SLOW_CALL_RATE,
+    open_seconds=LLM_BREAKER_OPEN_SECONDS,
+    half_open_calls=LLM_BREAKER_HALF_OPEN_CALLS
+)
@@ -0,0 +1,168 @@
+from typing import Dict, Any, List, Optional, Tuple
+from collections import defaultdict
+import gzip
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Tipos de contenido que vale la pena comprimir (JSON y MessagePack repiten claves en cada elemento)
+COMPRESSIBLE_TYPES = (b"application/json", b"application/msgpack", b"text/")
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """Codificaciones aceptadas con su q (q=0 la excluye)"""
+    encodings = {}
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        encodings[name.strip().lower()] = quality
+    return encodings
+
+
+class ResponseCompressor:
+    """Compresion de respuestas completas con br o gzip.
+
+    - Solo respuestas de un bloque (no streaming: el NDJSON de /api/plan/stream
+      debe llegar fragmento a fragmento) de al menos minimum_size bytes y de un
+      tipo comprimible, sin Content-Encoding previo.
+    - Prefiere br cuando el cliente lo acepta y el paquete brotli esta
+      instalado; si no, gzip.
+    - Agrega Vary: Accept-Encoding; los ETag de la API ya son debiles, asi
+      que valen para cualquier codificacion.
+    """
+
+    def __init__(self, minimum_size: int = 1024, gzip_level: int = 5,
+                 brotli_quality: int = 4, enabled: bool = True):
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.enabled = enabled
+        self._metrics = defaultdict(lambda: {"responses": 0, "bytes_in": 0, "bytes_out": 0})
+
+    def select_encoding(self, scope: Dict[str, Any]) -> Optional[str]:
+        for name, value in scope.get("headers", []):
+            if name == b"accept-encoding":
+                accepted = parse_accept_encoding(value.decode("latin-1"))
+                break
+        else:
+            return None
+
+        candidates = (["br"] if brotli is not None else []) + ["gzip"]
+        for encoding in candidates:
+            quality = accepted.get(encoding, accepted.get("*", 0.0))
+            if quality > 0:
+                return encoding
+        return None
+
+    def should_compress(self, headers: List[Tuple[bytes, bytes]], body: bytes) -> bool:
+        if len(body) < self.minimum_size:
+            return False
+        content_type = b""
+        for name, value in headers:
+            name = name.lower()
+            if name == b"content-encoding":
+                return False
+            if name == b"content-type":
+                content_type = value.lower()
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            compressed = brotli.compress(body, quality=self.brotli_quality)
+        else:
+            compressed = gzip.compress(body, compresslevel=self.gzip_level)
+        metrics = self._metrics[encoding]
+        metrics["responses"] += 1
+        metrics["bytes_in"] += len(body)
+        metrics["bytes_out"] += len(compressed)
+        return compressed
+
+    def get_metrics(self) -> Dict[str, Any]:
+        encodings = {}
+        for encoding, metrics in self._metrics.items():
+            ratio = metrics["bytes_out"] / metrics["bytes_in"] if metrics["bytes_in"] else None
+            encodings[encoding] = {**metrics, "ratio": round(ratio, 3) if ratio is not None else None}
+        return {
+            "enabled": self.enabled,
+            "minimum_size": self.minimum_size,
+            "brotli_available": brotli is not None,
+            "encodings": encodings
+        }
+
+
+class CompressionMiddleware:
+    """Middleware ASGI: retiene el inicio de la respuesta hasta ver si el cuerpo se comprime"""
+
+    def __init__(self, app, compressor: ResponseCompressor):
+        self.app = app
+        self.compressor = compressor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.compressor.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        encoding = self.compressor.select_encoding(scope)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        streaming = False
+
+        async def send_compressed(message):
+            nonlocal start_message, streaming
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if streaming or start_message is None:
+                await send(message)
+                return
+
+            if message.get("more_body", False):
+                streaming = True
+                await send(start_message)
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            headers = start_message["headers"]
+            if self.compressor.should_compress(headers, body):
+                body = self.compressor.compress(body, encoding)
+                headers = _replace_headers(headers, {
+                    b"content-encoding": encoding.encode("latin-1"),
+                    b"content-length": str(len(body)).encode("latin-1")
+                })
+                start_message = {**start_message, "headers": _add_vary(headers, b"Accept-Encoding")}
+                message = {**message, "body": body}
+            await send(start_message)
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
+
+
+def _replace_headers(headers: List[Tuple[bytes, bytes]], values: Dict[bytes, bytes]) -> List[Tuple[bytes, bytes]]:
+    kept = [(name, value) for name, value in headers if name.lower() not in values]
+    return kept + list(values.items())
+
+
+def _add_vary(headers: List[Tuple[bytes, bytes]], field: bytes) -> List[Tuple[bytes, bytes]]:
+    for index, (name, value) in enumerate(headers):
+        if name.lower() == b"vary":
+            if field.lower() not in [item.strip().lower() for item in value.split(b",")]:
+                headers = list(headers)
+                headers[index] = (name, value + b", " + field)
+            return headers
+    return list(headers) + [(b"vary", field)]
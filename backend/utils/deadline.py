@@ -0,0 +1,136 @@
+from typing import Optional, Callable, Any, Dict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import threading
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import (
+    REQUEST_DEADLINES,
+    REQUEST_DEADLINE_MAX_SECONDS,
+    DEADLINE_MIN_DB_SECONDS,
+    LLM_CALL_WORKERS,
+    LLM_MAX_ABANDONED_CALLS
+)
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+class BoundedCallPool:
+    """Hilos para llamadas bloqueantes (LLM) acotadas al tiempo restante.
+
+    Python no puede interrumpir una llamada en curso: la que vence sigue
+    ocupando su hilo hasta terminar y se cuenta como abandonada. El cupo se
+    toma antes de encolar, asi una llamada nueva nunca espera detras de
+    llamadas abandonadas mas alla de su propio deadline; con max_abandoned
+    llamadas abandonadas en curso (proveedor colgado) las nuevas fallan de
+    inmediato.
+    """
+
+    def __init__(self, max_workers: int, max_abandoned: int):
+        self.max_workers = max_workers
+        self.max_abandoned = max_abandoned
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="deadline-call")
+        self._slots = threading.BoundedSemaphore(max_workers)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._abandoned = 0
+        self._metrics = {"calls": 0, "timeouts": 0, "abandoned_total": 0, "rejected_saturated": 0, "rejected_abandoned": 0}
+
+    def run(self, deadline: "Deadline", func: Callable[..., Any], *args, **kwargs) -> Any:
+        with self._lock:
+            if self._abandoned >= self.max_abandoned:
+                self._metrics["rejected_abandoned"] += 1
+                raise DeadlineExceeded("Demasiadas llamadas abandonadas en curso")
+        if not self._slots.acquire(timeout=deadline.remaining()):
+            with self._lock:
+                self._metrics["rejected_saturated"] += 1
+            raise DeadlineExceeded("Request deadline exceeded")
+
+        state = {"finished": False, "abandoned": False}
+
+        def call():
+            try:
+                return func(*args, **kwargs)
+            finally:
+                with self._lock:
+                    state["finished"] = True
+                    self._in_flight -= 1
+                    if state["abandoned"]:
+                        self._abandoned -= 1
+                self._slots.release()
+
+        with self._lock:
+            self._in_flight += 1
+            self._metrics["calls"] += 1
+        future = self._executor.submit(call)
+        try:
+            return future.result(timeout=deadline.remaining())
+        except FutureTimeoutError:
+            with self._lock:
+                self._metrics["timeouts"] += 1
+                finished = state["finished"]
+                if not finished:
+                    # El hilo sigue corriendo, pero la solicitud ya no lo espera
+                    state["abandoned"] = True
+                    self._abandoned += 1
+                    self._metrics["abandoned_total"] += 1
+            if finished:
+                return future.result()
+            raise DeadlineExceeded("Request deadline exceeded")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._metrics,
+                "max_workers": self.max_workers,
+                "in_flight": self._in_flight,
+                "abandoned_in_flight": self._abandoned,
+                "max_abandoned": self.max_abandoned
+            }
+
+
+# Pool compartido por todas las llamadas al LLM del proceso
+llm_call_pool = BoundedCallPool(LLM_CALL_WORKERS, LLM_MAX_ABANDONED_CALLS)
+
+
+class Deadline:
+    """Presupuesto de tiempo de una solicitud, propagado a los agentes"""
+
+    def __init__(self, timeout_seconds: float):
+        self.timeout_seconds = timeout_seconds
+        self.expires_at = time.monotonic() + timeout_seconds
+
+    @classmethod
+    def for_endpoint(cls, endpoint: str, header_value: Optional[str] = None) -> "Deadline":
+        """Crear el deadline desde el header X-Request-Timeout-Ms o el default del endpoint"""
+        timeout = REQUEST_DEADLINES.get(endpoint, REQUEST_DEADLINES["default"])
+        if header_value:
+            try:
+                timeout = float(header_value) / 1000.0
+            except ValueError:
+                pass
+        return cls(max(0.0, min(timeout, REQUEST_DEADLINE_MAX_SECONDS)))
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def remaining_ms(self) -> int:
+        return int(self.remaining() * 1000)
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def db_timeout(self) -> float:
+        """Tiempo para una operacion de base de datos, con un minimo garantizado"""
+        return max(self.remaining(), DEADLINE_MIN_DB_SECONDS)
+
+    def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Ejecutar una llamada bloqueante acotada al tiempo restante"""
+        if self.expired():
+            raise DeadlineExceeded("Request deadline exceeded")
+        return llm_call_pool.run(self, func, *args, **kwargs)
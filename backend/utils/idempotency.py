@@ -0,0 +1,243 @@
+from typing import Dict, Any, Optional, Callable, Tuple
+from datetime import datetime, timedelta
+from fastapi import HTTPException, Response
+import hashlib
+import json
+import threading
+import time
+import uuid
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import (
+    IDEMPOTENCY_TTL_SECONDS,
+    IDEMPOTENCY_WAIT_SECONDS,
+    IDEMPOTENCY_LOCK_SECONDS,
+    IDEMPOTENCY_POLL_INTERVAL_MS
+)
+
+
+MAX_KEY_LENGTH = 255
+# Sugerencia de reintento cuando la solicitud original sigue en curso
+RETRY_AFTER_SECONDS = 5
+
+
+def request_fingerprint(payload: Any) -> str:
+    """Hash del cuerpo de la solicitud, para detectar una clave reutilizada con otros datos"""
+    encoded = json.dumps(payload, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class IdempotencyStore:
+    """Respuestas de POST indexadas por Idempotency-Key en la coleccion idempotency_keys.
+
+    - La primera solicitud con una clave inserta el registro "in_progress"
+      (indice unico sobre key) y ejecuta el endpoint.
+    - Si la respuesta AG-UI es exitosa se guarda y los reintentos la reciben
+      tal cual con el header Idempotent-Replayed; un error borra el registro
+      para que el reintento vuelva a ejecutarse.
+    - Un duplicado concurrente espera el resultado de la primera (evento
+      local en el mismo proceso, sondeo de Mongo entre procesos) hasta
+      IDEMPOTENCY_WAIT_SECONDS; despues responde 409 con Retry-After.
+    - Un registro "in_progress" cuyo lock vencio (proceso caido) se retoma.
+    - El indice TTL sobre expires_at elimina los registros vencidos.
+    """
+
+    def __init__(self, database_agent: Any):
+        self.database_agent = database_agent
+        self.owner = uuid.uuid4().hex
+        self._waiters: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._metrics = {
+            "executed": 0,
+            "replayed": 0,
+            "waited": 0,
+            "conflicts": 0,
+            "takeovers": 0,
+            "unavailable": 0
+        }
+
+    def _acp(self, operation: str, **fields) -> Any:
+        acp_protocol = self.database_agent.acp_protocol
+        message_id = str(uuid.uuid4())
+        if operation == "read":
+            message = acp_protocol.create_read_request(message_id, "Idempotencia", "idempotency_keys", **fields)
+        elif operation == "write":
+            message = acp_protocol.create_write_request(message_id, "Idempotencia", "idempotency_keys", **fields)
+        elif operation == "update":
+            message = acp_protocol.create_update_request(message_id, "Idempotencia", "idempotency_keys", **fields)
+        else:
+            message = acp_protocol.create_delete_request(message_id, "Idempotencia", "idempotency_keys", **fields)
+        return self.database_agent.process_acp_message(message.model_dump())
+
+    def _find(self, key: str) -> Optional[Dict[str, Any]]:
+        response = self._acp("read", query_filter={"key": key}, projection={"_id": 0})
+        if response.status != "success":
+            raise RuntimeError(response.error_message)
+        return response.data
+
+    def _try_begin(self, key: str, fingerprint: str) -> bool:
+        """Insertar el registro en curso; False si la clave ya existe"""
+        now = datetime.utcnow()
+        response = self._acp("write", data={
+            "key": key,
+            "fingerprint": fingerprint,
+            "status": "in_progress",
+            "owner": self.owner,
+            "locked_until": now + timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS),
+            "expires_at": now + timedelta(seconds=IDEMPOTENCY_TTL_SECONDS)
+        })
+        return response.status == "success"
+
+    def _try_takeover(self, key: str) -> bool:
+        """Tomar un registro en curso cuyo duenio no termino a tiempo"""
+        now = datetime.utcnow()
+        response = self._acp(
+            "update",
+            query_filter={"key": key, "status": "in_progress", "locked_until": {"$lt": now}},
+            update_data={"owner": self.owner, "locked_until": now + timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS)}
+        )
+        return response.status == "success" and response.data["matched_count"] > 0
+
+    def _complete(self, key: str, response: Response):
+        self._acp(
+            "update",
+            query_filter={"key": key, "owner": self.owner},
+            update_data={
+                "status": "completed",
+                "status_code": response.status_code,
+                "media_type": response.media_type,
+                "body": response.body.decode("utf-8"),
+                "expires_at": datetime.utcnow() + timedelta(seconds=IDEMPOTENCY_TTL_SECONDS)
+            }
+        )
+
+    def _abandon(self, key: str):
+        self._acp("delete", query_filter={"key": key, "owner": self.owner})
+
+    def _replay(self, record: Dict[str, Any]) -> Response:
+        self._metrics["replayed"] += 1
+        return Response(
+            content=record["body"],
+            status_code=record.get("status_code", 200),
+            media_type=record.get("media_type") or "application/json",
+            headers={"Idempotent-Replayed": "true"}
+        )
+
+    def _wait_for(self, key: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Esperar a la solicitud original: completed, gone (fallo), owned (lock vencido) o timeout"""
+        self._metrics["waited"] += 1
+        deadline = time.monotonic() + IDEMPOTENCY_WAIT_SECONDS
+        while True:
+            with self._lock:
+                local_event = self._waiters.get(key)
+            if local_event is not None:
+                # La original corre en este proceso: despertar en cuanto termine
+                local_event.wait(max(0.0, deadline - time.monotonic()))
+            else:
+                time.sleep(IDEMPOTENCY_POLL_INTERVAL_MS / 1000.0)
+
+            record = self._find(key)
+            if record is None:
+                return "gone", None
+            if record["status"] == "completed":
+                return "completed", record
+            if record["locked_until"] < datetime.utcnow() and self._try_takeover(key):
+                return "owned", None
+            if time.monotonic() >= deadline:
+                return "timeout", record
+
+    def run(self, endpoint: str, idempotency_key: Optional[str], payload: Any,
+            handler: Callable[[], Response]) -> Response:
+        """Ejecutar handler una sola vez por clave; sin clave se ejecuta siempre"""
+        if not idempotency_key:
+            return handler()
+        if len(idempotency_key) > MAX_KEY_LENGTH:
+            raise HTTPException(status_code=400, detail="Idempotency-Key demasiado larga")
+
+        key = f"{endpoint}:{idempotency_key}"
+        fingerprint = request_fingerprint(payload)
+
+        try:
+            owned = self._claim(key, fingerprint)
+        except HTTPException:
+            raise
+        except Exception as e:
+            # Sin base de datos no hay deduplicacion, pero la solicitud se atiende
+            print(f"Advertencia: Idempotency-Key no disponible: {e}")
+            self._metrics["unavailable"] += 1
+            return handler()
+
+        if isinstance(owned, Response):
+            return owned
+        return self._execute(key, handler)
+
+    def _claim(self, key: str, fingerprint: str):
+        """True si esta solicitud debe ejecutar el endpoint, o la respuesta guardada"""
+        for _ in range(3):
+            if self._try_begin(key, fingerprint):
+                return True
+
+            record = self._find(key)
+            if record is None:
+                # La original fallo y borro el registro: intentar de nuevo
+                continue
+            if record.get("fingerprint") != fingerprint:
+                raise HTTPException(status_code=422, detail="Idempotency-Key ya usada con otros datos")
+            if record["status"] == "completed":
+                return self._replay(record)
+            if record["locked_until"] < datetime.utcnow() and self._try_takeover(key):
+                self._metrics["takeovers"] += 1
+                return True
+
+            outcome, record = self._wait_for(key)
+            if outcome == "completed":
+                return self._replay(record)
+            if outcome == "owned":
+                self._metrics["takeovers"] += 1
+                return True
+            if outcome == "timeout":
+                break
+
+        self._metrics["conflicts"] += 1
+        raise HTTPException(
+            status_code=409,
+            detail="Solicitud con la misma Idempotency-Key en curso",
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)}
+        )
+
+    def _execute(self, key: str, handler: Callable[[], Response]) -> Response:
+        event = threading.Event()
+        with self._lock:
+            self._waiters[key] = event
+        self._metrics["executed"] += 1
+
+        stored = False
+        try:
+            response = handler()
+            if _is_success(response):
+                self._complete(key, response)
+                stored = True
+            return response
+        finally:
+            if not stored:
+                self._abandon(key)
+            with self._lock:
+                self._waiters.pop(key, None)
+            event.set()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return dict(self._metrics)
+
+
+def _is_success(response: Response) -> bool:
+    """Solo se guardan respuestas 2xx con status AG-UI "success" o "pending" (ticket encolado);
+    los errores pueden ser transitorios"""
+    if not 200 <= response.status_code < 300 or not hasattr(response, "body"):
+        return False
+    try:
+        return json.loads(response.body).get("status") in ("success", "pending")
+    except (ValueError, AttributeError):
+        return False
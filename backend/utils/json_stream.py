@@ -0,0 +1,121 @@
+from typing import Dict, Any, List, Optional
+import json
+
+
+class IncrementalTaskParser:
+    """Parser incremental para la respuesta JSON del plan.
+
+    Recibe el texto del LLM por fragmentos y devuelve cada objeto del arreglo
+    "tasks" en cuanto se cierra, sin esperar al resto de la respuesta. Ignora
+    el texto fuera del objeto raiz (por ejemplo los marcadores ```json).
+    """
+
+    def __init__(self, array_key: str = "tasks"):
+        self.array_key = array_key
+        self.buffer = ""
+        self._pos = 0
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string = None
+        self._current_key = None
+        self._root_started = False
+        self._root_closed = False
+        self._tasks_depth = None
+        self._object_start = None
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Agregar un fragmento y devolver las tareas completadas en el"""
+        self.buffer += chunk
+        completed = []
+
+        while self._pos < len(self.buffer):
+            char = self.buffer[self._pos]
+            index = self._pos
+            self._pos += 1
+
+            if self._root_closed:
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._last_string = self.buffer[self._string_start:index]
+                continue
+
+            if not self._root_started:
+                if char == "{":
+                    self._root_started = True
+                    self._stack.append(("object", None))
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = index + 1
+            elif char == ":":
+                self._current_key = self._last_string
+            elif char == ",":
+                self._current_key = None
+            elif char in "{[":
+                container = "object" if char == "{" else "array"
+                self._stack.append((container, self._current_key))
+                self._current_key = None
+
+                depth = len(self._stack)
+                if (container == "array" and self._tasks_depth is None and depth == 2
+                        and self._stack[-1][1] == self.array_key):
+                    self._tasks_depth = depth
+                elif container == "object" and self._tasks_depth is not None and depth == self._tasks_depth + 1:
+                    self._object_start = index
+            elif char in "}]":
+                depth = len(self._stack)
+                if not self._stack:
+                    continue
+                self._stack.pop()
+
+                if char == "}" and self._object_start is not None and depth == (self._tasks_depth or 0) + 1:
+                    task = self._parse_object(self.buffer[self._object_start:index + 1])
+                    self._object_start = None
+                    if task is not None:
+                        completed.append(task)
+                elif char == "]" and depth == self._tasks_depth:
+                    self._tasks_depth = -1
+                elif not self._stack:
+                    self._root_closed = True
+
+        return completed
+
+    @property
+    def tasks_complete(self) -> bool:
+        """True si el arreglo de tareas ya se cerro (la respuesta no se corto a la mitad)"""
+        return self._tasks_depth == -1
+
+    def _parse_object(self, text: str) -> Optional[Dict[str, Any]]:
+        try:
+            value = json.loads(text)
+        except json.JSONDecodeError:
+            return None
+        return value if isinstance(value, dict) else None
+
+    def finish(self) -> Optional[Dict[str, Any]]:
+        """Parsear la respuesta completa una vez terminado el stream"""
+        response_text = self.buffer.strip()
+
+        if response_text.startswith("```json"):
+            response_text = response_text[7:]
+        if response_text.startswith("```"):
+            response_text = response_text[3:]
+        if response_text.endswith("```"):
+            response_text = response_text[:-3]
+        response_text = response_text.strip()
+
+        try:
+            value = json.loads(response_text)
+        except json.JSONDecodeError:
+            return None
+        return value if isinstance(value, dict) else None
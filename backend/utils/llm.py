@@ -0,0 +1,88 @@
+from typing import Any, Optional
+import threading
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import (
+    LLM_PROVIDER,
+    LOCAL_LLM_LATENCY_MS,
+    LOCAL_LLM_LATENCY_DISTRIBUTION,
+    LOCAL_LLM_LATENCY_JITTER_MS,
+    LOCAL_LLM_LATENCY_SIGMA,
+    LOCAL_LLM_ERROR_RATE,
+    LOCAL_LLM_MALFORMED_RATE,
+    LOCAL_LLM_FENCED_RATE,
+    LOCAL_LLM_SEED
+)
+
+
+def create_chat_model(api_key: Optional[str], model_name: str, temperature: float) -> Any:
+    """Crear el modelo de chat segun LLM_PROVIDER; langchain se importa aqui y no al cargar el modulo"""
+    if LLM_PROVIDER == "local":
+        from utils.local_llm import LocalChatModel
+        return LocalChatModel(
+            latency_ms=LOCAL_LLM_LATENCY_MS,
+            latency_distribution=LOCAL_LLM_LATENCY_DISTRIBUTION,
+            latency_jitter_ms=LOCAL_LLM_LATENCY_JITTER_MS,
+            latency_sigma=LOCAL_LLM_LATENCY_SIGMA,
+            error_rate=LOCAL_LLM_ERROR_RATE,
+            malformed_rate=LOCAL_LLM_MALFORMED_RATE,
+            fenced_rate=LOCAL_LLM_FENCED_RATE,
+            seed=LOCAL_LLM_SEED
+        )
+
+    # Sin API key no hay Gemini: los agentes usan su modo automatico
+    if not api_key:
+        return None
+
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    return ChatGoogleGenerativeAI(
+        model=model_name,
+        google_api_key=api_key,
+        temperature=temperature
+    )
+
+
+class LazyLLM:
+    """Inicializa el modelo de chat en el primer uso.
+
+    Importar langchain_google_genai cuesta varios segundos; diferirlo saca ese
+    costo del arranque. La inicializacion se intenta una sola vez: si falla,
+    get() devuelve None y los agentes usan su modo automatico.
+    """
+
+    def __init__(self, api_key: Optional[str], model_name: str, temperature: float, fallback_message: str):
+        self.api_key = api_key
+        self.model_name = model_name
+        self.temperature = temperature
+        self.fallback_message = fallback_message
+        self.load_seconds = None
+        self._model = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def get(self) -> Any:
+        if self._loaded:
+            return self._model
+
+        with self._lock:
+            if not self._loaded:
+                self._model = self._load()
+                self._loaded = True
+        return self._model
+
+    def _load(self) -> Any:
+        start_time = time.perf_counter()
+        try:
+            return create_chat_model(self.api_key, self.model_name, self.temperature)
+        except Exception as e:
+            # Intentar inicializar Gemini, pero no fallar si no se puede
+            print(f"Advertencia: No se pudo inicializar Gemini: {e}")
+            print(self.fallback_message)
+            return None
+        finally:
+            self.load_seconds = time.perf_counter() - start_time
@@ -0,0 +1,180 @@
+from typing import Dict, Any, List, Iterator, Optional
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+
+
+PLAN_ACTIONS = [
+    ("reserve_space", "Reservar espacio", "Reservar un espacio adecuado para {attendees} asistentes"),
+    ("hire_catering", "Contratar catering", "Contratar el servicio de alimentos y bebidas para el evento"),
+    ("manage_budget", "Gestionar presupuesto", "Distribuir y controlar el presupuesto de {budget}"),
+    ("coordinate_logistics", "Coordinar logistica", "Coordinar montaje, equipo audiovisual y personal de apoyo"),
+    ("prepare_communications", "Preparar comunicaciones", "Preparar invitaciones y notificaciones para los asistentes")
+]
+
+
+class LocalLLMError(RuntimeError):
+    pass
+
+
+class LocalMessage:
+    """Respuesta con la misma forma que los mensajes de langchain (.content)"""
+
+    def __init__(self, content: str):
+        self.content = content
+
+
+class LocalChatModel:
+    """Sustituto local de ChatGoogleGenerativeAI para benchmarks sin red.
+
+    Devuelve JSON valido segun el esquema de cada prompt (plan, tareas
+    replanificadas o resultado de tarea), derivado de forma determinista del
+    prompt. Permite inyectar latencia, errores del proveedor, JSON malformado
+    y salida envuelta en bloques ```json para ejercitar la limpieza de
+    markdown y los fallbacks.
+    """
+
+    def __init__(self, latency_ms: float = 800.0, latency_distribution: str = "lognormal",
+                 latency_jitter_ms: float = 200.0, latency_sigma: float = 0.5,
+                 error_rate: float = 0.0, malformed_rate: float = 0.0, fenced_rate: float = 0.0,
+                 seed: Optional[int] = None):
+        self.latency_ms = latency_ms
+        self.latency_distribution = latency_distribution
+        self.latency_jitter_ms = latency_jitter_ms
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self.fenced_rate = fenced_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _sample_latency(self) -> float:
+        with self._lock:
+            if self.latency_distribution == "fixed":
+                latency = self.latency_ms
+            elif self.latency_distribution == "uniform":
+                latency = self._random.uniform(self.latency_ms - self.latency_jitter_ms, self.latency_ms + self.latency_jitter_ms)
+            elif self.latency_distribution == "normal":
+                latency = self._random.gauss(self.latency_ms, self.latency_jitter_ms)
+            elif self.latency_distribution == "lognormal":
+                # latency_ms es la mediana; sigma controla la cola larga
+                latency = self.latency_ms * self._random.lognormvariate(0.0, self.latency_sigma)
+            else:
+                raise ValueError(f"Unknown latency distribution: {self.latency_distribution}")
+        return max(0.0, latency) / 1000.0
+
+    def _roll(self, rate: float) -> bool:
+        if rate <= 0:
+            return False
+        with self._lock:
+            return self._random.random() < rate
+
+    def _render(self, prompt: str) -> str:
+        """Texto de respuesta: JSON del esquema, opcionalmente envuelto o truncado"""
+        if "agente planificador" in prompt:
+            content = json.dumps(self._plan_response(prompt), ensure_ascii=False, indent=2)
+        elif "agente replanificador" in prompt:
+            content = json.dumps(self._replan_response(prompt), ensure_ascii=False, indent=2)
+        else:
+            content = json.dumps(self._task_response(prompt), ensure_ascii=False, indent=2)
+
+        if self._roll(self.fenced_rate):
+            content = f"```json\n{content}\n```"
+        if self._roll(self.malformed_rate):
+            # Cortar la respuesta a la mitad deja JSON invalido
+            content = content[:len(content) // 2]
+        return content
+
+    def _plan_response(self, prompt: str) -> Dict[str, Any]:
+        digest = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest(), 16)
+        attendees = _prompt_field(prompt, "Numero de asistentes esperados") or "los"
+        budget = _prompt_field(prompt, "Presupuesto") or "el evento"
+
+        total_tasks = 2 + digest % 4
+        tasks = []
+        for index, (action, name, description) in enumerate(PLAN_ACTIONS[:total_tasks]):
+            tasks.append({
+                "task_name": name,
+                "description": description.format(attendees=attendees, budget=budget),
+                "priority": 5 - index,
+                "dependencies": [],
+                "parameters": {"action": action, "details": f"Generado localmente ({digest % 1000})"}
+            })
+
+        return {
+            "plan_summary": f"Plan de {total_tasks} tareas para {_prompt_field(prompt, 'Nombre') or 'el evento'}",
+            "total_tasks": total_tasks,
+            "estimated_duration": f"{1 + digest % 3} semanas",
+            "tasks": tasks
+        }
+
+    def _replan_response(self, prompt: str) -> Dict[str, Any]:
+        attendees = _prompt_field(prompt, "Numero de asistentes esperados") or "los"
+        budget = _prompt_field(prompt, "Presupuesto") or "el evento"
+        try:
+            tasks = json.loads(_prompt_field(prompt, "Tareas a actualizar") or "[]")
+        except json.JSONDecodeError:
+            tasks = []
+
+        descriptions = {action: description for action, _, description in PLAN_ACTIONS}
+        updated = []
+        for task in tasks:
+            action = (task.get("parameters") or {}).get("action")
+            description = descriptions.get(action, task.get("description", ""))
+            updated.append({
+                **task,
+                "description": description.format(attendees=attendees, budget=budget) + " (actualizado)"
+            })
+        return {"tasks": updated}
+
+    def _task_response(self, prompt: str) -> Dict[str, Any]:
+        task_name = _prompt_field(prompt, "Tarea") or "Tarea"
+        parameters = {}
+        raw_parameters = _prompt_field(prompt, "Parametros")
+        if raw_parameters:
+            try:
+                parameters = json.loads(raw_parameters)
+            except json.JSONDecodeError:
+                parameters = {}
+
+        return {
+            "status": "success",
+            "action_taken": f"Se completo '{task_name}'",
+            "details": {"action": parameters.get("action", "generic"), "confirmed": True},
+            "observations": "Ejecucion simulada por el modelo local",
+            "next_steps": "Continuar con las tareas dependientes"
+        }
+
+    def invoke(self, prompt: str) -> LocalMessage:
+        time.sleep(self._sample_latency())
+        if self._roll(self.error_rate):
+            raise LocalLLMError("Simulated provider error (503)")
+        return LocalMessage(self._render(prompt))
+
+    def stream(self, prompt: str) -> Iterator[LocalMessage]:
+        content = self._render(prompt)
+        chunks = _split_chunks(content, 12)
+        fail_at = None
+        if self._roll(self.error_rate):
+            with self._lock:
+                fail_at = self._random.randrange(len(chunks))
+        chunk_latency = self._sample_latency() / len(chunks)
+
+        for index, chunk in enumerate(chunks):
+            time.sleep(chunk_latency)
+            if index == fail_at:
+                raise LocalLLMError("Simulated provider error during stream (503)")
+            yield LocalMessage(chunk)
+
+
+def _prompt_field(prompt: str, label: str) -> Optional[str]:
+    match = re.search(rf"^\s*-?\s*{re.escape(label)}:\s*(.+)$", prompt, re.MULTILINE)
+    return match.group(1).strip() if match else None
+
+
+def _split_chunks(content: str, count: int) -> List[str]:
+    size = max(1, len(content) // count)
+    return [content[start:start + size] for start in range(0, len(content), size)]
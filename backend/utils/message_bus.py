@@ -0,0 +1,196 @@
+from typing import Dict, Any, List, Callable, Optional
+from collections import deque
+import asyncio
+import concurrent.futures
+import itertools
+import threading
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.stats import summarize_samples
+
+
+class Mailbox:
+    """Buzon acotado de un agente: cola por prioridad y metricas de entrega"""
+
+    def __init__(self, agent_name: str, handler: Callable[[Dict[str, Any]], Any], max_size: int):
+        self.agent_name = agent_name
+        self.handler = handler
+        self.max_size = max_size
+        self.queue: Optional[asyncio.PriorityQueue] = None
+        self.worker: Optional[asyncio.Task] = None
+        self.max_depth = 0
+        self._wait_ms = deque(maxlen=1000)
+        self._handler_ms = deque(maxlen=1000)
+        self._metrics = {
+            "published": 0,
+            "delivered": 0,
+            "failed": 0,
+            "inline": 0,
+            "backpressure_waits": 0
+        }
+
+    def get_metrics(self) -> Dict[str, Any]:
+        depth = self.queue.qsize() if self.queue is not None else 0
+        return {
+            **self._metrics,
+            "depth": depth,
+            "max_depth": self.max_depth,
+            "capacity": self.max_size,
+            "queue_wait_ms": summarize_samples(self._wait_ms),
+            "handler_ms": summarize_samples(self._handler_ms)
+        }
+
+
+class MessageBus:
+    """Bus de mensajes A2A/ANP en proceso sobre asyncio.
+
+    - Cada agente registra un buzon acotado; los mensajes se entregan por
+      orden de prioridad (5 primero) y, a igual prioridad, por llegada.
+    - publish() es seguro desde los hilos de los endpoints: encola en el loop
+      y vuelve sin esperar al agente receptor.
+    - Si el buzon esta lleno el emisor espera hasta publish_timeout_ms
+      (backpressure); si sigue lleno, el mensaje se entrega en el hilo del
+      emisor para no perderlo.
+    - Sin loop activo (scripts, bus detenido) la entrega es directa.
+    """
+
+    def __init__(self, mailbox_size: int = 1000, publish_timeout_ms: float = 100.0, enabled: bool = True):
+        self.mailbox_size = mailbox_size
+        self.publish_timeout_seconds = publish_timeout_ms / 1000.0
+        self.enabled = enabled
+        self._mailboxes: Dict[str, Mailbox] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._metrics = {"unroutable": 0}
+
+    def register(self, agent_name: str, handler: Callable[[Dict[str, Any]], Any]):
+        """Registrar el handler de un agente; los handlers sincronos corren en el threadpool"""
+        mailbox = Mailbox(agent_name, handler, self.mailbox_size)
+        with self._lock:
+            self._mailboxes[agent_name] = mailbox
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._start_mailbox, mailbox)
+
+    async def start(self):
+        if not self.enabled:
+            return
+        self._loop = asyncio.get_running_loop()
+        for mailbox in list(self._mailboxes.values()):
+            self._start_mailbox(mailbox)
+
+    def _start_mailbox(self, mailbox: Mailbox):
+        mailbox.queue = asyncio.PriorityQueue(maxsize=mailbox.max_size)
+        mailbox.worker = asyncio.create_task(self._consume(mailbox))
+
+    async def stop(self, drain_timeout: float = 5.0):
+        """Vaciar los buzones (hasta drain_timeout) y detener los consumidores"""
+        if self._loop is None:
+            return
+        mailboxes = [mailbox for mailbox in self._mailboxes.values() if mailbox.queue is not None]
+        try:
+            await asyncio.wait_for(asyncio.gather(*(mailbox.queue.join() for mailbox in mailboxes)), drain_timeout)
+        except asyncio.TimeoutError:
+            pending = sum(mailbox.queue.qsize() for mailbox in mailboxes)
+            print(f"Advertencia: {pending} mensajes sin entregar al detener el bus")
+
+        for mailbox in mailboxes:
+            mailbox.worker.cancel()
+        await asyncio.gather(*(mailbox.worker for mailbox in mailboxes), return_exceptions=True)
+        self._loop = None
+
+    def publish(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """Encolar un mensaje para su receptor; devuelve el estado de la publicacion"""
+        mailbox = self._mailboxes.get(message.get("receiver"))
+        if mailbox is None:
+            self._metrics["unroutable"] += 1
+            return {"status": "unroutable", "message_id": message.get("message_id")}
+
+        mailbox._metrics["published"] += 1
+        loop = self._loop
+        if loop is None or mailbox.queue is None:
+            return self._deliver_inline(mailbox, message)
+
+        # Mayor prioridad primero; el contador conserva el orden de llegada
+        item = (-message.get("priority", 1), next(self._sequence), time.perf_counter(), message)
+
+        if _running_loop() is loop:
+            try:
+                self._put_nowait(mailbox, item)
+            except asyncio.QueueFull:
+                return self._deliver_inline(mailbox, message)
+            return {"status": "queued", "message_id": message.get("message_id")}
+
+        future = asyncio.run_coroutine_threadsafe(self._put(mailbox, item), loop)
+        try:
+            future.result(timeout=self.publish_timeout_seconds)
+        except (concurrent.futures.TimeoutError, asyncio.TimeoutError):
+            # Si el put termino justo al vencer el plazo, el mensaje ya esta encolado
+            if future.cancel() or future.cancelled():
+                return self._deliver_inline(mailbox, message)
+        return {"status": "queued", "message_id": message.get("message_id")}
+
+    async def _put(self, mailbox: Mailbox, item: tuple):
+        try:
+            self._put_nowait(mailbox, item)
+        except asyncio.QueueFull:
+            mailbox._metrics["backpressure_waits"] += 1
+            await mailbox.queue.put(item)
+            mailbox.max_depth = max(mailbox.max_depth, mailbox.queue.qsize())
+
+    def _put_nowait(self, mailbox: Mailbox, item: tuple):
+        mailbox.queue.put_nowait(item)
+        mailbox.max_depth = max(mailbox.max_depth, mailbox.queue.qsize())
+
+    def _deliver_inline(self, mailbox: Mailbox, message: Dict[str, Any]) -> Dict[str, Any]:
+        mailbox._metrics["inline"] += 1
+        start_time = time.perf_counter()
+        try:
+            result = mailbox.handler(message)
+            mailbox._metrics["delivered"] += 1
+            return result
+        except Exception as e:
+            mailbox._metrics["failed"] += 1
+            print(f"Error entregando mensaje a {mailbox.agent_name}: {e}")
+            return {"error": str(e)}
+        finally:
+            mailbox._handler_ms.append((time.perf_counter() - start_time) * 1000)
+
+    async def _consume(self, mailbox: Mailbox):
+        loop = asyncio.get_running_loop()
+        while True:
+            _, _, queued_at, message = await mailbox.queue.get()
+            start_time = time.perf_counter()
+            mailbox._wait_ms.append((start_time - queued_at) * 1000)
+            try:
+                if asyncio.iscoroutinefunction(mailbox.handler):
+                    await mailbox.handler(message)
+                else:
+                    await loop.run_in_executor(None, mailbox.handler, message)
+                mailbox._metrics["delivered"] += 1
+            except Exception as e:
+                mailbox._metrics["failed"] += 1
+                print(f"Error entregando mensaje a {mailbox.agent_name}: {e}")
+            finally:
+                mailbox._handler_ms.append((time.perf_counter() - start_time) * 1000)
+                mailbox.queue.task_done()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "running": self._loop is not None,
+            "mailbox_size": self.mailbox_size,
+            "publish_timeout_ms": self.publish_timeout_seconds * 1000,
+            **self._metrics,
+            "mailboxes": {name: mailbox.get_metrics() for name, mailbox in self._mailboxes.items()}
+        }
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
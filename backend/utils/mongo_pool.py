@@ -0,0 +1,109 @@
+from typing import Dict, Any
+from collections import defaultdict
+from pymongo import monitoring
+import threading
+import time
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """Listener CMAP de pymongo que acumula estadisticas del pool por servidor.
+
+    Los eventos de checkout se emiten en el hilo que pide la conexion, asi que
+    el tiempo de espera se mide con un inicio guardado por hilo.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._servers: Dict[str, Dict[str, Any]] = defaultdict(self._empty_stats)
+
+    @staticmethod
+    def _empty_stats() -> Dict[str, Any]:
+        return {
+            "connections_open": 0,
+            "connections_created": 0,
+            "connections_closed": 0,
+            "checked_out": 0,
+            "checkouts": 0,
+            "checkout_failures": defaultdict(int),
+            "wait_ms_total": 0.0,
+            "wait_ms_max": 0.0,
+            "pool_cleared": 0
+        }
+
+    def _server(self, event) -> Dict[str, Any]:
+        host, port = event.address
+        return self._servers[f"{host}:{port}"]
+
+    def pool_created(self, event):
+        with self._lock:
+            self._server(event)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self._server(event)["pool_cleared"] += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            stats = self._server(event)
+            stats["connections_created"] += 1
+            stats["connections_open"] += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            stats = self._server(event)
+            stats["connections_closed"] += 1
+            stats["connections_open"] = max(0, stats["connections_open"] - 1)
+
+    def connection_check_out_started(self, event):
+        self._local.started_at = time.perf_counter()
+
+    def connection_check_out_failed(self, event):
+        self._local.started_at = None
+        with self._lock:
+            self._server(event)["checkout_failures"][str(event.reason)] += 1
+
+    def connection_checked_out(self, event):
+        started_at = getattr(self._local, "started_at", None)
+        self._local.started_at = None
+        wait_ms = (time.perf_counter() - started_at) * 1000 if started_at else 0.0
+
+        with self._lock:
+            stats = self._server(event)
+            stats["checked_out"] += 1
+            stats["checkouts"] += 1
+            stats["wait_ms_total"] += wait_ms
+            stats["wait_ms_max"] = max(stats["wait_ms_max"], wait_ms)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            stats = self._server(event)
+            stats["checked_out"] = max(0, stats["checked_out"] - 1)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            servers = {}
+            for address, stats in self._servers.items():
+                checkouts = stats["checkouts"]
+                servers[address] = {
+                    "connections_open": stats["connections_open"],
+                    "connections_created": stats["connections_created"],
+                    "connections_closed": stats["connections_closed"],
+                    "checked_out": stats["checked_out"],
+                    "checkouts": checkouts,
+                    "checkout_failures": dict(stats["checkout_failures"]),
+                    "wait_ms_avg": round(stats["wait_ms_total"] / checkouts, 3) if checkouts else 0.0,
+                    "wait_ms_max": round(stats["wait_ms_max"], 3),
+                    "pool_cleared": stats["pool_cleared"]
+                }
+            return servers
+
@@ -0,0 +1,321 @@
+from typing import Dict, Any, List, Optional, Callable, Tuple
+from collections import Counter, OrderedDict
+from contextvars import ContextVar
+from datetime import datetime
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+import asyncio
+import cProfile
+import functools
+import heapq
+import hmac
+import itertools
+import marshal
+import pstats
+import threading
+import time
+import uuid
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import (
+    ADMIN_TOKEN,
+    PROFILING_SAMPLER_ENABLED,
+    PROFILING_SAMPLE_INTERVAL_MS,
+    PROFILING_SLOWEST_N,
+    PROFILING_MAX_ON_DEMAND
+)
+
+
+# (archivo, linea de inicio, funcion) de cada frame de una pila muestreada
+FrameKey = Tuple[str, int, str]
+
+# Sesion de profiling de la solicitud en curso; anyio copia el contexto al hilo del endpoint
+_current_session: ContextVar[Optional["ProfileSession"]] = ContextVar("profile_session", default=None)
+
+
+class ProfileSession:
+    """Perfil de una solicitud: pilas muestreadas y, si se pidio, cProfile"""
+
+    def __init__(self, method: str, path: str, use_cprofile: bool, on_demand: bool):
+        self.profile_id = uuid.uuid4().hex[:12]
+        self.method = method
+        self.path = path
+        self.use_cprofile = use_cprofile
+        self.on_demand = on_demand
+        self.started_at = datetime.now().isoformat()
+        self.duration_ms = 0.0
+        self.thread_id = None
+        self.samples: Counter = Counter()
+        self.profile: Optional[cProfile.Profile] = None
+        self._start_time = time.perf_counter()
+
+    def finish(self):
+        self.duration_ms = (time.perf_counter() - self._start_time) * 1000
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "profile_id": self.profile_id,
+            "kind": "on_demand" if self.on_demand else "slowest",
+            "method": self.method,
+            "path": self.path,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration_ms, 2),
+            "cprofile": self.profile is not None,
+            "samples": sum(self.samples.values())
+        }
+
+
+class StackSampler:
+    """Hilo que muestrea periodicamente las pilas de los hilos con solicitudes activas"""
+
+    def __init__(self, interval_ms: float):
+        self.interval_seconds = interval_ms / 1000.0
+        self._active: Dict[int, ProfileSession] = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def register(self, session: ProfileSession):
+        with self._lock:
+            self._active[session.thread_id] = session
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+                self._thread.start()
+
+    def unregister(self, session: ProfileSession):
+        with self._lock:
+            self._active.pop(session.thread_id, None)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval_seconds)
+            with self._lock:
+                active = list(self._active.items())
+            if not active:
+                continue
+
+            frames = sys._current_frames()
+            for thread_id, session in active:
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    session.samples[_stack_of(frame)] += 1
+
+
+def _stack_of(frame) -> Tuple[FrameKey, ...]:
+    """Pila desde el endpoint hasta el frame actual (raiz primero)"""
+    stack = []
+    while frame is not None and len(stack) < 256:
+        code = frame.f_code
+        if code is _profiled_call_code:
+            break
+        stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+        frame = frame.f_back
+    stack.reverse()
+    return tuple(stack)
+
+
+class ProfileStore:
+    """Perfiles bajo demanda (los ultimos N) y las N solicitudes mas lentas"""
+
+    def __init__(self, slowest_n: int, max_on_demand: int):
+        self.slowest_n = slowest_n
+        self.max_on_demand = max_on_demand
+        self._on_demand: "OrderedDict[str, ProfileSession]" = OrderedDict()
+        self._slowest: List[Tuple[float, int, ProfileSession]] = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def record(self, session: ProfileSession):
+        with self._lock:
+            if session.on_demand:
+                self._on_demand[session.profile_id] = session
+                while len(self._on_demand) > self.max_on_demand:
+                    self._on_demand.popitem(last=False)
+                return
+
+            # Min-heap por duracion: se reemplaza la mas rapida de las N guardadas
+            entry = (session.duration_ms, next(self._counter), session)
+            if len(self._slowest) < self.slowest_n:
+                heapq.heappush(self._slowest, entry)
+            elif session.duration_ms > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, entry)
+
+    def get(self, profile_id: str) -> Optional[ProfileSession]:
+        with self._lock:
+            if profile_id in self._on_demand:
+                return self._on_demand[profile_id]
+            for _, _, session in self._slowest:
+                if session.profile_id == profile_id:
+                    return session
+        return None
+
+    def list(self) -> Dict[str, List[Dict[str, Any]]]:
+        with self._lock:
+            slowest = sorted((entry[2] for entry in self._slowest), key=lambda session: -session.duration_ms)
+            return {
+                "on_demand": [session.summary() for session in reversed(self._on_demand.values())],
+                "slowest": [session.summary() for session in slowest]
+            }
+
+    def clear(self):
+        with self._lock:
+            self._on_demand.clear()
+            self._slowest = []
+
+
+class RequestProfiler:
+    def __init__(self):
+        self.sampler_enabled = PROFILING_SAMPLER_ENABLED
+        self.sampler = StackSampler(PROFILING_SAMPLE_INTERVAL_MS)
+        self.store = ProfileStore(PROFILING_SLOWEST_N, PROFILING_MAX_ON_DEMAND)
+
+    def session_for(self, request: Request) -> Optional[ProfileSession]:
+        """Sesion para la solicitud: X-Profile (solo con ADMIN_TOKEN configurado y valido) o muestreo continuo"""
+        mode = request.headers.get("x-profile")
+        admin_token = request.headers.get("x-admin-token")
+        if mode and ADMIN_TOKEN and admin_token and hmac.compare_digest(admin_token, ADMIN_TOKEN):
+            return ProfileSession(request.method, request.url.path, use_cprofile=mode != "sample", on_demand=True)
+        if self.sampler_enabled:
+            return ProfileSession(request.method, request.url.path, use_cprofile=False, on_demand=False)
+        return None
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "sampler_enabled": self.sampler_enabled,
+            "sample_interval_ms": self.sampler.interval_seconds * 1000,
+            "slowest_n": self.store.slowest_n,
+            "max_on_demand": self.store.max_on_demand
+        }
+
+
+request_profiler = RequestProfiler()
+
+
+def _profiled_call(func: Callable, *args, **kwargs):
+    """Ejecutar el endpoint en su hilo con el profiler de la sesion activa"""
+    session = _current_session.get()
+    if session is None:
+        return func(*args, **kwargs)
+
+    session.thread_id = threading.get_ident()
+    request_profiler.sampler.register(session)
+    if session.use_cprofile:
+        session.profile = cProfile.Profile()
+        session.profile.enable()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        if session.profile is not None:
+            session.profile.disable()
+        request_profiler.sampler.unregister(session)
+
+
+_profiled_call_code = _profiled_call.__code__
+
+
+class ProfiledRoute(APIRoute):
+    """Ruta que perfila el endpoint cuando la solicitud lo pide o el sampler esta activo"""
+
+    def get_route_handler(self) -> Callable:
+        call = self.dependant.call
+        if not getattr(call, "_profiled", False):
+            if asyncio.iscoroutinefunction(call):
+                @functools.wraps(call)
+                async def profiled_endpoint(*args, **kwargs):
+                    return await call(*args, **kwargs)
+            else:
+                @functools.wraps(call)
+                def profiled_endpoint(*args, **kwargs):
+                    return _profiled_call(call, *args, **kwargs)
+            profiled_endpoint._profiled = True
+            self.dependant.call = profiled_endpoint
+
+        handler = super().get_route_handler()
+
+        async def profiled_handler(request: Request) -> Response:
+            session = request_profiler.session_for(request)
+            if session is None:
+                return await handler(request)
+
+            token = _current_session.set(session)
+            try:
+                response = await handler(request)
+            finally:
+                _current_session.reset(token)
+                session.finish()
+                request_profiler.store.record(session)
+
+            if session.on_demand:
+                response.headers["X-Profile-Id"] = session.profile_id
+            return response
+
+        return profiled_handler
+
+
+def to_pstats(session: ProfileSession) -> bytes:
+    """Perfil en formato pstats (marshal); si no hubo cProfile se estima con las muestras"""
+    if session.profile is not None:
+        return marshal.dumps(pstats.Stats(session.profile).stats)
+
+    interval = request_profiler.sampler.interval_seconds
+    stats: Dict[FrameKey, List[Any]] = {}
+    for stack, count in session.samples.items():
+        seen = set()
+        for depth, frame in enumerate(stack):
+            entry = stats.setdefault(frame, [0, 0, 0.0, 0.0, {}])
+            if frame not in seen:
+                # Tiempo acumulado una vez por pila aunque haya recursion
+                entry[3] += count * interval
+                entry[0] += count
+                entry[1] += count
+                seen.add(frame)
+            if depth > 0:
+                caller = stack[depth - 1]
+                entry[4][caller] = entry[4].get(caller, 0) + count
+        if stack:
+            stats[stack[-1]][2] += count * interval
+
+    return marshal.dumps({
+        frame: (cc, nc, tt, ct, {caller: (calls, calls, 0.0, 0.0) for caller, calls in callers.items()})
+        for frame, (cc, nc, tt, ct, callers) in stats.items()
+    })
+
+
+def to_speedscope(session: ProfileSession) -> Dict[str, Any]:
+    """Perfil muestreado en el formato de archivo de speedscope"""
+    interval_ms = request_profiler.sampler.interval_seconds * 1000
+    frame_index: Dict[FrameKey, int] = {}
+    frames = []
+    samples = []
+    weights = []
+
+    for stack, count in session.samples.most_common():
+        indexes = []
+        for frame in stack:
+            if frame not in frame_index:
+                frame_index[frame] = len(frames)
+                filename, line, name = frame
+                frames.append({"name": name, "file": filename, "line": line})
+            indexes.append(frame_index[frame])
+        samples.append(indexes)
+        weights.append(count * interval_ms)
+
+    name = f"{session.method} {session.path} ({session.duration_ms:.0f} ms)"
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "shared": {"frames": frames},
+        "profiles": [{
+            "type": "sampled",
+            "name": name,
+            "unit": "milliseconds",
+            "startValue": 0,
+            "endValue": sum(weights),
+            "samples": samples,
+            "weights": weights
+        }],
+        "name": name,
+        "activeProfileIndex": 0,
+        "exporter": "eventos-escolares-backend"
+    }
@@ -0,0 +1,396 @@
+from typing import Dict, Any, List, Optional, Callable
+from collections import defaultdict, deque
+from datetime import datetime, timedelta
+import threading
+import time
+import uuid
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import (
+    REGISTRATION_INTAKE_BATCH_SIZE,
+    REGISTRATION_INTAKE_LINGER_MS,
+    REGISTRATION_INTAKE_POLL_INTERVAL_MS,
+    REGISTRATION_INTAKE_CLAIM_TIMEOUT_SECONDS,
+    REGISTRATION_TICKET_TTL_SECONDS
+)
+from utils.stats import summarize_samples
+
+
+EVENT_NOT_FOUND = "Evento no encontrado"
+EVENT_FULL = "El evento está lleno. No hay cupos disponibles."
+ALREADY_REGISTERED = "Ya estás registrado en este evento"
+
+# (evento, registros confirmados, tickets rechazados) de cada lote confirmado
+CommitCallback = Callable[[Dict[str, Any], List[Dict[str, Any]], List[Dict[str, Any]]], None]
+
+
+class RegistrationIntake:
+    """Inscripciones encoladas en registration_queue y confirmadas por lotes.
+
+    - enqueue() inserta el ticket "pending" (una escritura) y despierta al worker.
+    - El worker toma hasta REGISTRATION_INTAKE_BATCH_SIZE tickets, los agrupa
+      por evento y por cada evento hace una lectura del evento, una consulta
+      de duplicados, la reserva de cupos y un insert_many.
+    - Los cupos se reservan con un $inc condicional sobre events.seats_left
+      (seats_left >= n): dos lotes del mismo evento en procesos distintos no
+      pueden sobrepasar la capacidad.
+    - Cada ticket termina "confirmed" o "rejected" con el motivo y se puede
+      consultar con get_ticket(); on_commit publica notificaciones y contadores.
+    - Un lote tomado por un proceso que no termino en
+      REGISTRATION_INTAKE_CLAIM_TIMEOUT_SECONDS vuelve a la cola (revision
+      periodica, tambien con la cola ocupada).
+    """
+
+    def __init__(self, database_agent: Any, on_commit: Optional[CommitCallback] = None):
+        self.database_agent = database_agent
+        self.on_commit = on_commit
+        self.batch_size = REGISTRATION_INTAKE_BATCH_SIZE
+        self.worker_id = uuid.uuid4().hex
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._batch_sizes = deque(maxlen=1000)
+        self._commit_ms = deque(maxlen=1000)
+        self._metrics = {
+            "enqueued": 0,
+            "batches": 0,
+            "confirmed": 0,
+            "rejected": 0,
+            "released": 0
+        }
+
+    def _acp(self, operation: str, collection: str = "registration_queue", **fields) -> Any:
+        acp_protocol = self.database_agent.acp_protocol
+        message_id = str(uuid.uuid4())
+        if operation == "read":
+            message = acp_protocol.create_read_request(message_id, "Inscripciones", collection, **fields)
+        elif operation == "query":
+            message = acp_protocol.create_query_request(message_id, "Inscripciones", collection, **fields)
+        elif operation == "write":
+            message = acp_protocol.create_write_request(message_id, "Inscripciones", collection, **fields)
+        elif operation == "bulk_write":
+            message = acp_protocol.create_bulk_write_request(message_id, "Inscripciones", collection, **fields)
+        else:
+            message = acp_protocol.create_update_request(message_id, "Inscripciones", collection, **fields)
+        response = self.database_agent.process_acp_message(message.model_dump())
+        if response.status != "success":
+            raise RuntimeError(response.error_message)
+        return response
+
+    def enqueue(self, registration: Dict[str, Any]) -> Dict[str, Any]:
+        """Encolar una inscripcion y devolver su ticket pendiente"""
+        ticket = {
+            "ticket_id": str(uuid.uuid4()),
+            "event_id": registration["event_id"],
+            "student_name": registration["student_name"],
+            "student_email": registration["student_email"],
+            "student_id": registration["student_id"],
+            "status": "pending",
+            "enqueued_at": time.time(),
+            "claimed_by": None
+        }
+        self._acp("write", data=dict(ticket))
+        self._metrics["enqueued"] += 1
+        self._wakeup.set()
+        return ticket
+
+    def get_ticket(self, ticket_id: str) -> Optional[Dict[str, Any]]:
+        response = self._acp("read", query_filter={"ticket_id": ticket_id}, projection={"_id": 0, "claimed_by": 0})
+        return response.data
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="registration-intake", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Detener el worker despues de confirmar el lote en curso"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._wakeup.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        requeue_interval = max(REGISTRATION_INTAKE_POLL_INTERVAL_MS / 1000.0, REGISTRATION_INTAKE_CLAIM_TIMEOUT_SECONDS / 2)
+        next_requeue_at = time.monotonic()
+        while not self._stop.is_set():
+            woken = self._wakeup.wait(REGISTRATION_INTAKE_POLL_INTERVAL_MS / 1000.0)
+            self._wakeup.clear()
+            if woken and REGISTRATION_INTAKE_LINGER_MS > 0:
+                # Dejar que lleguen mas inscripciones para armar un lote mayor
+                self._stop.wait(REGISTRATION_INTAKE_LINGER_MS / 1000.0)
+            try:
+                # Por tiempo y no solo en los ciclos ociosos: con la cola siempre
+                # ocupada un lote abandonado no volveria nunca
+                if time.monotonic() >= next_requeue_at:
+                    next_requeue_at = time.monotonic() + requeue_interval
+                    self._requeue_stale()
+                # Lotes llenos indican que quedan mas tickets en la cola
+                while self.process_batch() >= self.batch_size and not self._stop.is_set():
+                    pass
+            except Exception as e:
+                print(f"Error procesando la cola de inscripciones: {e}")
+
+    def _requeue_stale(self):
+        """Devolver a la cola los lotes de procesos que no terminaron a tiempo"""
+        response = self._acp(
+            "update",
+            query_filter={"status": "processing",
+                          "claimed_at": {"$lt": time.time() - REGISTRATION_INTAKE_CLAIM_TIMEOUT_SECONDS}},
+            update_data={"status": "pending", "claimed_by": None}
+        )
+        if response.data["matched_count"]:
+            self._metrics["released"] += response.data["matched_count"]
+
+    def _claim(self) -> List[Dict[str, Any]]:
+        """Tomar un lote de tickets; el claim_token distingue este lote de los de otros procesos"""
+        candidates = self._acp(
+            "query",
+            query_filter={"status": "pending"},
+            sort={"enqueued_at": 1},
+            limit=self.batch_size,
+            projection={"_id": 0, "ticket_id": 1}
+        ).data
+        if not candidates:
+            return []
+
+        claim_token = f"{self.worker_id}:{uuid.uuid4().hex}"
+        self._acp(
+            "update",
+            query_filter={"status": "pending",
+                          "ticket_id": {"$in": [ticket["ticket_id"] for ticket in candidates]}},
+            update_data={"status": "processing", "claimed_by": claim_token, "claimed_at": time.time()}
+        )
+        return self._acp(
+            "query",
+            query_filter={"claimed_by": claim_token},
+            sort={"enqueued_at": 1},
+            projection={"_id": 0}
+        ).data
+
+    def process_batch(self) -> int:
+        """Confirmar un lote de la cola; devuelve cuantos tickets se tomaron"""
+        tickets = self._claim()
+        if not tickets:
+            return 0
+
+        start_time = time.perf_counter()
+        by_event: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for ticket in tickets:
+            by_event[ticket["event_id"]].append(ticket)
+
+        for event_id, event_tickets in by_event.items():
+            try:
+                self._commit_event(event_id, event_tickets)
+            except Exception as e:
+                # Devolver los tickets a la cola para el siguiente lote
+                print(f"Error confirmando inscripciones del evento {event_id}: {e}")
+                self._release(event_tickets)
+
+        self._metrics["batches"] += 1
+        self._batch_sizes.append(len(tickets))
+        self._commit_ms.append((time.perf_counter() - start_time) * 1000)
+        return len(tickets)
+
+    def _commit_event(self, event_id: str, tickets: List[Dict[str, Any]]):
+        event = self._acp("read", collection="events", query_filter={"event_id": event_id}).data
+        if not event:
+            self._finish(tickets, "rejected", EVENT_NOT_FOUND)
+            self._notify({"event_id": event_id}, [], tickets)
+            return
+
+        existing = self._acp(
+            "query",
+            collection="student_registrations",
+            query_filter={"event_id": event_id,
+                          "student_email": {"$in": [ticket["student_email"] for ticket in tickets]}},
+            projection={"_id": 0, "student_email": 1}
+        ).data
+        registered = {registration.get("student_email") for registration in existing}
+
+        candidates, rejected = [], defaultdict(list)
+        for ticket in tickets:
+            if ticket["student_email"] in registered:
+                rejected[ALREADY_REGISTERED].append(ticket)
+            else:
+                candidates.append(ticket)
+                registered.add(ticket["student_email"])
+
+        # Cupo reservado una sola vez para el lote, por orden de llegada
+        reserved = self._reserve_seats(event, len(candidates))
+        accepted = candidates[:reserved]
+        rejected[EVENT_FULL].extend(candidates[reserved:])
+
+        registrations = [self._registration_for(ticket) for ticket in accepted]
+        if registrations:
+            try:
+                confirmed_ids = self._insert_registrations(registrations)
+            except Exception:
+                self._release_seats(event_id, len(registrations))
+                raise
+            for ticket in accepted:
+                if ticket["ticket_id"] not in confirmed_ids:
+                    # Otra solicitud inscribio al estudiante entre la consulta y el insert
+                    rejected[ALREADY_REGISTERED].append(ticket)
+            if len(confirmed_ids) < len(registrations):
+                self._release_seats(event_id, len(registrations) - len(confirmed_ids))
+            registrations = [registration for registration in registrations
+                             if registration["registration_id"] in confirmed_ids]
+            self._finish([ticket for ticket in accepted if ticket["ticket_id"] in confirmed_ids], "confirmed")
+
+        for reason, reason_tickets in rejected.items():
+            self._finish(reason_tickets, "rejected", reason)
+
+        self._notify(event, registrations, [ticket for group in rejected.values() for ticket in group])
+
+    def _reserve_seats(self, event: Dict[str, Any], requested: int) -> int:
+        """Reservar hasta requested cupos del evento; devuelve cuantos se obtuvieron.
+
+        El $inc solo se aplica si quedan al menos n cupos, asi la comprobacion
+        y el descuento son una sola operacion en la base. Si no alcanzan para
+        todo el lote se reintenta con los que quedan.
+        """
+        event_id = event["event_id"]
+        if requested <= 0:
+            return 0
+        if "seats_left" not in event:
+            self._init_seats_left(event)
+
+        while True:
+            response = self._acp(
+                "update",
+                collection="events",
+                query_filter={"event_id": event_id, "seats_left": {"$gte": requested}},
+                increment_data={"seats_left": -requested}
+            )
+            if response.data["matched_count"]:
+                return requested
+            current = self._acp(
+                "read",
+                collection="events",
+                query_filter={"event_id": event_id},
+                projection={"_id": 0, "seats_left": 1}
+            ).data or {}
+            requested = min(requested, current.get("seats_left", 0))
+            if requested <= 0:
+                return 0
+
+    def _init_seats_left(self, event: Dict[str, Any]):
+        """Contador de cupos de un evento anterior a la cola: capacidad menos inscripciones actuales"""
+        existing = self._acp(
+            "query",
+            collection="student_registrations",
+            query_filter={"event_id": event["event_id"]},
+            projection={"_id": 1}
+        ).data
+        # Solo lo fija el primero: si otro proceso ya lo creo, se respeta el suyo
+        self._acp(
+            "update",
+            collection="events",
+            query_filter={"event_id": event["event_id"], "seats_left": {"$exists": False}},
+            update_data={"seats_left": max(0, event.get("expected_attendees", 0) - len(existing))}
+        )
+
+    def _release_seats(self, event_id: str, count: int):
+        try:
+            self._acp("update", collection="events", query_filter={"event_id": event_id},
+                      increment_data={"seats_left": count})
+        except Exception as e:
+            print(f"Advertencia: No se pudieron devolver {count} cupos del evento {event_id}: {e}")
+
+    def _registration_for(self, ticket: Dict[str, Any]) -> Dict[str, Any]:
+        # El ticket es el ID de la inscripcion: un reintento del lote no la duplica
+        return {
+            "registration_id": ticket["ticket_id"],
+            "event_id": ticket["event_id"],
+            "student_name": ticket["student_name"],
+            "student_email": ticket["student_email"],
+            "student_id": ticket["student_id"],
+            "registered_at": datetime.now().isoformat(),
+            "status": "confirmed"
+        }
+
+    def _insert_registrations(self, registrations: List[Dict[str, Any]]) -> set:
+        """insert_many del lote; si falla (indice unico), se confirma uno por uno lo que falte"""
+        try:
+            self._acp("bulk_write", collection="student_registrations", documents=[dict(item) for item in registrations])
+            return {registration["registration_id"] for registration in registrations}
+        except RuntimeError as e:
+            print(f"Advertencia: insert_many de inscripciones fallo, reintentando una por una: {e}")
+
+        ids = [registration["registration_id"] for registration in registrations]
+        inserted = {
+            registration["registration_id"] for registration in self._acp(
+                "query",
+                collection="student_registrations",
+                query_filter={"registration_id": {"$in": ids}},
+                projection={"_id": 0, "registration_id": 1}
+            ).data
+        }
+        for registration in registrations:
+            if registration["registration_id"] in inserted:
+                continue
+            try:
+                self._acp("write", collection="student_registrations", data=dict(registration))
+                inserted.add(registration["registration_id"])
+            except RuntimeError:
+                pass
+        return inserted
+
+    def _finish(self, tickets: List[Dict[str, Any]], status: str, reason: Optional[str] = None):
+        if not tickets:
+            return
+        update_data = {
+            "status": status,
+            "processed_at": datetime.now().isoformat(),
+            "expires_at": datetime.utcnow() + timedelta(seconds=REGISTRATION_TICKET_TTL_SECONDS)
+        }
+        if reason:
+            update_data["reason"] = reason
+        # claimed_by acota la actualizacion al lote (y a su indice)
+        self._acp(
+            "update",
+            query_filter={"claimed_by": tickets[0]["claimed_by"],
+                          "ticket_id": {"$in": [ticket["ticket_id"] for ticket in tickets]}},
+            update_data=update_data
+        )
+        for ticket in tickets:
+            ticket.update(update_data)
+        self._metrics["confirmed" if status == "confirmed" else "rejected"] += len(tickets)
+
+    def _release(self, tickets: List[Dict[str, Any]]):
+        try:
+            self._acp(
+                "update",
+                query_filter={"claimed_by": tickets[0]["claimed_by"],
+                              "ticket_id": {"$in": [ticket["ticket_id"] for ticket in tickets]}},
+                update_data={"status": "pending", "claimed_by": None}
+            )
+            self._metrics["released"] += len(tickets)
+        except Exception as e:
+            # Sin liberar, el lote vuelve a la cola al vencer el claim
+            print(f"Advertencia: No se pudieron liberar los tickets: {e}")
+
+    def _notify(self, event: Dict[str, Any], registrations: List[Dict[str, Any]], rejected: List[Dict[str, Any]]):
+        if self.on_commit is None:
+            return
+        try:
+            self.on_commit(event, registrations, rejected)
+        except Exception as e:
+            print(f"Error notificando el lote de inscripciones: {e}")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            **self._metrics,
+            "running": self._thread is not None,
+            "batch_size": self.batch_size,
+            "batch_sizes": summarize_samples(self._batch_sizes),
+            "commit_ms": summarize_samples(self._commit_ms)
+        }
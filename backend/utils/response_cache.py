@@ -0,0 +1,154 @@
+from typing import Dict, Any, List, Callable, Optional
+from collections import defaultdict
+import threading
+import time
+
+
+class CacheEntry:
+    def __init__(self, value: Any, tags: List[str]):
+        self.value = value
+        self.tags = tags
+        self.stored_at = time.monotonic()
+        self.invalidated = False
+
+    def age(self) -> float:
+        return time.monotonic() - self.stored_at
+
+
+class ResponseCache:
+    """Cache read-through para payloads de endpoints de lectura.
+
+    - Las entradas se indexan por endpoint y parametros, y se etiquetan con las
+      colecciones de las que dependen.
+    - Una escritura en una coleccion invalida sus etiquetas (via DatabaseAgent).
+    - Pasado ttl_seconds la entrada se sirve "stale" mientras se recalcula en
+      segundo plano (stale-while-revalidate).
+    - Si el recalculo falla (p. ej. Mongo no responde) se sigue sirviendo la
+      ultima version durante stale_seconds, aunque haya sido invalidada.
+    """
+
+    def __init__(self, ttl_seconds: float = 5.0, stale_seconds: float = 30.0, max_entries: int = 256):
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._entries: Dict[tuple, CacheEntry] = {}
+        self._tag_index: Dict[str, set] = defaultdict(set)
+        self._tag_generation: Dict[str, int] = defaultdict(int)
+        self._refreshing = set()
+        self._metrics = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "stale_on_error": 0,
+            "load_errors": 0,
+            "invalidations": 0,
+            "background_refreshes": 0
+        }
+
+    def _make_key(self, endpoint: str, params: Optional[Dict[str, Any]]) -> tuple:
+        return (endpoint, tuple(sorted((params or {}).items())))
+
+    def get_or_load(self, endpoint: str, params: Optional[Dict[str, Any]], tags: List[str],
+                    loader: Callable[[], Any]) -> Any:
+        key = self._make_key(endpoint, params)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and not entry.invalidated:
+                age = entry.age()
+                if age < self.ttl_seconds:
+                    self._metrics["hits"] += 1
+                    return entry.value
+                if age < self.ttl_seconds + self.stale_seconds:
+                    self._metrics["stale_hits"] += 1
+                    self._schedule_refresh(key, tags, loader)
+                    return entry.value
+            self._metrics["misses"] += 1
+            generation = self._generation(tags)
+
+        try:
+            value = loader()
+        except Exception:
+            with self._lock:
+                self._metrics["load_errors"] += 1
+                if entry and entry.age() < self.ttl_seconds + self.stale_seconds:
+                    self._metrics["stale_on_error"] += 1
+                    return entry.value
+            raise
+
+        self._store(key, value, tags, generation)
+        return value
+
+    def _generation(self, tags: List[str]) -> int:
+        return sum(self._tag_generation[tag] for tag in tags)
+
+    def _schedule_refresh(self, key: tuple, tags: List[str], loader: Callable[[], Any]):
+        # Se llama con el lock tomado; un solo refresco en curso por clave
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+        self._metrics["background_refreshes"] += 1
+        generation = self._generation(tags)
+        threading.Thread(target=self._refresh, args=(key, tags, loader, generation), daemon=True).start()
+
+    def _refresh(self, key: tuple, tags: List[str], loader: Callable[[], Any], generation: int):
+        try:
+            value = loader()
+            self._store(key, value, tags, generation)
+        except Exception:
+            with self._lock:
+                self._metrics["load_errors"] += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _store(self, key: tuple, value: Any, tags: List[str], generation: int):
+        with self._lock:
+            if key not in self._entries and len(self._entries) >= self.max_entries:
+                oldest_key = min(self._entries, key=lambda k: self._entries[k].stored_at)
+                self._remove(oldest_key)
+
+            entry = CacheEntry(value, list(tags))
+            # Si hubo una escritura mientras se cargaba, el valor nace invalidado
+            entry.invalidated = generation != self._generation(tags)
+            self._entries[key] = entry
+            for tag in tags:
+                self._tag_index[tag].add(key)
+
+    def _remove(self, key: tuple):
+        entry = self._entries.pop(key, None)
+        if entry:
+            for tag in entry.tags:
+                self._tag_index[tag].discard(key)
+
+    def invalidate_tags(self, *tags: str):
+        """Marcar como invalidas las entradas que dependen de las etiquetas dadas"""
+        with self._lock:
+            for tag in tags:
+                self._tag_generation[tag] += 1
+                for key in self._tag_index.get(tag, ()):
+                    entry = self._entries.get(key)
+                    if entry and not entry.invalidated:
+                        entry.invalidated = True
+                        self._metrics["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tag_index.clear()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            metrics = dict(self._metrics)
+            lookups = metrics["hits"] + metrics["stale_hits"] + metrics["misses"]
+            served_from_cache = metrics["hits"] + metrics["stale_hits"] + metrics["stale_on_error"]
+            metrics["entries"] = len(self._entries)
+            metrics["hit_ratio"] = round(served_from_cache / lookups, 4) if lookups else 0.0
+            metrics["config"] = {
+                "ttl_seconds": self.ttl_seconds,
+                "stale_seconds": self.stale_seconds,
+                "max_entries": self.max_entries
+            }
+            return metrics
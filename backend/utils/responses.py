@@ -0,0 +1,91 @@
+from typing import Any
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from pydantic_core import PydanticSerializationError
+import json
+import sys
+import os
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import RESPONSE_MSGPACK_ENABLED
+
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+
+def dumps_bytes(content: Any) -> bytes:
+    """Serializar a JSON en bytes por la ruta mas rapida disponible"""
+    if isinstance(content, BaseModel):
+        # pydantic-core serializa el modelo directamente, sin dict intermedio
+        try:
+            return content.model_dump_json().encode("utf-8")
+        except PydanticSerializationError:
+            # Tipos no JSON en el payload (p. ej. ObjectId anidados): se convierten con str
+            content = content.model_dump()
+
+    if orjson is not None:
+        return orjson.dumps(content, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+        default=str
+    ).encode("utf-8")
+
+
+def dumps_msgpack(content: Any) -> bytes:
+    """Serializar a MessagePack; los tipos sin equivalente (fechas, ObjectId) van como str"""
+    if isinstance(content, BaseModel):
+        content = content.model_dump()
+    return msgpack.packb(content, default=str)
+
+
+def accepts_msgpack(scope: Any) -> bool:
+    if msgpack is None or not RESPONSE_MSGPACK_ENABLED:
+        return False
+    for name, value in scope.get("headers", []):
+        if name == b"accept":
+            return MSGPACK_MEDIA_TYPE.encode("latin-1") in value.lower()
+    return False
+
+
+class AGUIJSONResponse(JSONResponse):
+    """Respuesta JSON para mensajes AG-UI y modelos de protocolo.
+
+    Acepta el modelo Pydantic tal cual; los endpoints deben devolver la
+    instancia de esta clase para que FastAPI no pase el contenido por
+    jsonable_encoder.
+
+    Si la solicitud trae Accept: application/msgpack el cuerpo se envia en
+    MessagePack. El cuerpo JSON se sigue generando al crear la respuesta
+    porque Idempotency-Key guarda y repite esa version.
+    """
+
+    def __init__(self, content: Any, *args, **kwargs):
+        self.content = content
+        super().__init__(content, *args, **kwargs)
+
+    def render(self, content: Any) -> bytes:
+        return dumps_bytes(content)
+
+    async def __call__(self, scope, receive, send):
+        if msgpack is not None and RESPONSE_MSGPACK_ENABLED:
+            self.headers.add_vary_header("Accept")
+            if self.body and accepts_msgpack(scope):
+                self.body = dumps_msgpack(self.content)
+                self.headers["content-type"] = MSGPACK_MEDIA_TYPE
+                self.headers["content-length"] = str(len(self.body))
+        await super().__call__(scope, receive, send)
@@ -0,0 +1,127 @@
+from typing import Dict, Any, List, Callable, Optional
+import threading
+import time
+
+
+class TaskDurationEstimator:
+    """Duracion esperada de una tarea segun su parameters.action.
+
+    Las medias salen de los execution_time guardados en la coleccion
+    executions (agregados por el DatabaseAgent) y se refrescan cada
+    ttl_seconds. Una accion sin historial usa la media global o, si aun no
+    hay datos, default_seconds.
+    """
+
+    def __init__(self, ttl_seconds: float = 60.0, default_seconds: float = 1.0):
+        self.ttl_seconds = ttl_seconds
+        self.default_seconds = default_seconds
+        self._averages: Dict[str, Dict[str, float]] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def refresh(self, loader: Callable[[], Dict[str, Dict[str, float]]], force: bool = False):
+        with self._lock:
+            if not force and self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl_seconds:
+                return
+            # Marcar antes de consultar: si falla, se reintenta pasado el TTL
+            self._loaded_at = time.monotonic()
+
+        try:
+            averages = loader()
+        except Exception as e:
+            print(f"Advertencia: No se pudieron cargar las duraciones historicas: {e}")
+            return
+
+        with self._lock:
+            self._averages = {key: value for key, value in averages.items() if key is not None}
+
+    def _fallback_seconds(self) -> float:
+        total = sum(stats["count"] for stats in self._averages.values())
+        if not total:
+            return self.default_seconds
+        return sum(stats["avg"] * stats["count"] for stats in self._averages.values()) / total
+
+    def estimate(self, action: Optional[str]) -> float:
+        with self._lock:
+            stats = self._averages.get(action)
+            return stats["avg"] if stats else self._fallback_seconds()
+
+    def get_estimates(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "actions": {key: dict(value) for key, value in self._averages.items()},
+                "fallback_seconds": self._fallback_seconds(),
+                "ttl_seconds": self.ttl_seconds
+            }
+
+
+class CriticalPathScheduler:
+    """Orden de ejecucion de un plan por camino critico y prioridad.
+
+    El rango de una tarea es su duracion estimada mas el mayor rango de las
+    tareas que dependen de ella: la longitud de la cadena mas larga que
+    arranca en esa tarea. Entre las tareas listas (dependencias cumplidas)
+    se elige primero la de mayor rango, luego la de mayor ANPTask.priority
+    y por ultimo la que aparece antes en el plan.
+    """
+
+    def __init__(self, tasks: List[Dict[str, Any]], durations: Dict[str, float]):
+        self.tasks = {task["task_id"]: task for task in tasks}
+        self.durations = durations
+        self.position = {task["task_id"]: index for index, task in enumerate(tasks)}
+
+        # Dependencias desconocidas (p. ej. nombres en vez de IDs del LLM) se ignoran
+        self.dependencies = {
+            task_id: {dep for dep in task.get("dependencies", []) if dep in self.tasks and dep != task_id}
+            for task_id, task in self.tasks.items()
+        }
+        self.dependents: Dict[str, List[str]] = {task_id: [] for task_id in self.tasks}
+        for task_id, deps in self.dependencies.items():
+            for dep in deps:
+                self.dependents[dep].append(task_id)
+
+        self.ranks: Dict[str, float] = {}
+        for task_id in self.tasks:
+            self._rank(task_id, set())
+
+        self._pending = set(self.tasks)
+        self._running = set()
+        self._done = set()
+
+    def _rank(self, task_id: str, visiting: set) -> float:
+        if task_id in self.ranks:
+            return self.ranks[task_id]
+        visiting.add(task_id)
+        # Un ciclo en las dependencias corta la cadena en lugar de recursar sin fin
+        longest = max(
+            (self._rank(dependent, visiting) for dependent in self.dependents[task_id] if dependent not in visiting),
+            default=0.0
+        )
+        visiting.discard(task_id)
+        self.ranks[task_id] = self.durations[task_id] + longest
+        return self.ranks[task_id]
+
+    def _sort_key(self, task_id: str):
+        return (-self.ranks[task_id], -self.tasks[task_id].get("priority", 1), self.position[task_id])
+
+    def has_pending(self) -> bool:
+        return bool(self._pending)
+
+    def ready(self) -> List[Dict[str, Any]]:
+        """Tareas listas para ejecutarse, de mayor a menor urgencia"""
+        ready = [task_id for task_id in self._pending if self.dependencies[task_id] <= self._done]
+        if not ready and not self._running and self._pending:
+            # Dependencias ciclicas: liberar la tarea mas urgente para no bloquear el plan
+            ready = [min(self._pending, key=self._sort_key)]
+        return [self.tasks[task_id] for task_id in sorted(ready, key=self._sort_key)]
+
+    def start(self, task_id: str):
+        self._pending.discard(task_id)
+        self._running.add(task_id)
+
+    def finish(self, task_id: str):
+        self._running.discard(task_id)
+        self._done.add(task_id)
+
+    def critical_path_seconds(self) -> float:
+        return max(self.ranks.values(), default=0.0)
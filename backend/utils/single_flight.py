@@ -0,0 +1,103 @@
+from typing import Dict, Any, Callable, Hashable, Optional, Tuple
+from collections import OrderedDict
+import threading
+import time
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.followers = 0
+
+
+class SingleFlight:
+    """Coalescer llamadas identicas concurrentes en una sola.
+
+    El primer hilo con una clave ejecuta la funcion; los que llegan mientras
+    esta en curso esperan y reciben el mismo resultado (o excepcion). Como el
+    resultado se comparte, cuando hubo seguidores cada hilo recibe una copia
+    hecha con copy_result para que nadie modifique los datos de otro.
+    """
+
+    def __init__(self, copy_result: Callable[[Any], Any] = lambda value: value):
+        self.copy_result = copy_result
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self._metrics = {"calls": 0, "coalesced": 0}
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Devuelve (resultado, compartido)"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.followers += 1
+                self._metrics["coalesced"] += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self._metrics["calls"] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return self.copy_result(call.result), True
+
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            # Quitar la llamada antes de despertar: los que lleguen despues inician una nueva
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+        if call.followers:
+            return self.copy_result(call.result), True
+        return call.result, False
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._metrics, "in_flight": len(self._calls)}
+
+
+class NegativeCache:
+    """Claves de lecturas sin resultado, recordadas durante ttl_seconds"""
+
+    def __init__(self, ttl_seconds: float = 2.0, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._metrics = {"hits": 0, "stored": 0}
+
+    def contains(self, key: Hashable) -> bool:
+        with self._lock:
+            expires_at = self._entries.get(key)
+            if expires_at is None:
+                return False
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return False
+            self._metrics["hits"] += 1
+            return True
+
+    def add(self, key: Hashable):
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[key] = time.monotonic() + self.ttl_seconds
+            self._entries.move_to_end(key)
+            self._metrics["stored"] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._metrics, "entries": len(self._entries), "ttl_seconds": self.ttl_seconds}
@@ -0,0 +1,69 @@
+from typing import Dict, Any, Optional
+from contextlib import contextmanager
+import threading
+import time
+
+
+class StartupTimer:
+    """Reporte de tiempos de arranque.
+
+    Las fases del camino critico (import, connect, agents) se miden en serie
+    antes de aceptar trafico; las de segundo plano (indices, warmup del LLM)
+    se registran cuando terminan.
+    """
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        self.background: Dict[str, Dict[str, Any]] = {}
+        self.serving_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def record(self, phase: str, seconds: float):
+        self.phases[phase] = seconds
+
+    @contextmanager
+    def phase(self, phase: str):
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(phase, time.perf_counter() - start_time)
+
+    def run_background(self, phase: str, func, *args) -> threading.Thread:
+        """Ejecutar una tarea de warmup en un hilo y registrar su duracion"""
+        def run():
+            start_time = time.perf_counter()
+            status = "ok"
+            try:
+                func(*args)
+            except Exception as e:
+                status = f"error: {e}"
+                print(f"Error en tarea de arranque {phase}: {e}")
+            with self._lock:
+                self.background[phase] = {
+                    "ms": round((time.perf_counter() - start_time) * 1000, 1),
+                    "status": status
+                }
+
+        with self._lock:
+            self.background[phase] = {"ms": None, "status": "running"}
+        thread = threading.Thread(target=run, name=f"startup-{phase}", daemon=True)
+        thread.start()
+        return thread
+
+    def mark_serving(self):
+        self.serving_at = sum(self.phases.values())
+        summary = ", ".join(f"{phase}={seconds * 1000:.0f}ms" for phase, seconds in self.phases.items())
+        print(f"INFO:     Arranque listo en {self.serving_at * 1000:.0f}ms ({summary})")
+
+    def get_report(self) -> Dict[str, Any]:
+        with self._lock:
+            background = {phase: dict(info) for phase, info in self.background.items()}
+        return {
+            "phases_ms": {phase: round(seconds * 1000, 1) for phase, seconds in self.phases.items()},
+            "critical_path_ms": round(self.serving_at * 1000, 1) if self.serving_at is not None else None,
+            "background": background
+        }
+
+
+startup_timer = StartupTimer()
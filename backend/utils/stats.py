@@ -0,0 +1,14 @@
+from typing import Dict, Iterable
+
+
+def summarize_samples(values: Iterable[float]) -> Dict[str, float]:
+    """Resumen de una ventana de muestras (latencias, tamanos de lote...): cantidad, promedio, p95 y maximo"""
+    ordered = sorted(values)
+    if not ordered:
+        return {"count": 0, "avg": 0.0, "p95": 0.0, "max": 0.0}
+    return {
+        "count": len(ordered),
+        "avg": round(sum(ordered) / len(ordered), 3),
+        "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        "max": round(ordered[-1], 3)
+    }
@@ -0,0 +1,355 @@
+from typing import Dict, Any, List, Optional, Callable, Tuple
+from collections import deque
+import socketserver
+import threading
+import socket
+import struct
+import queue
+import json
+import time
+import sys
+import os
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.deadline import Deadline
+from utils.stats import summarize_samples
+
+
+# Trama: longitud del cuerpo (4 bytes, big-endian) + codec (1 byte) + cuerpo
+FRAME_HEADER = struct.Struct(">IB")
+CODEC_JSON = 0
+CODEC_MSGPACK = 1
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+
+# Handler de un protocolo: (mensaje, deadline) -> respuesta serializable
+MessageHandler = Callable[[Dict[str, Any], Optional[Deadline]], Dict[str, Any]]
+
+
+class TransportError(ConnectionError):
+    """No se pudo entregar el mensaje o leer la respuesta (el agente remoto no responde)"""
+    pass
+
+
+class TransportTimeout(TransportError):
+    pass
+
+
+class RemoteAgentError(Exception):
+    """El agente remoto recibio el mensaje pero su handler fallo"""
+    pass
+
+
+def parse_address(address: str) -> Tuple[int, Any]:
+    """"unix:/ruta.sock" o "tcp:host:puerto" -> (familia, direccion de socket)"""
+    scheme, _, target = address.partition(":")
+    if scheme == "unix" and target:
+        return socket.AF_UNIX, target
+    if scheme == "tcp" and target:
+        host, _, port = target.rpartition(":")
+        return socket.AF_INET, (host or "127.0.0.1", int(port))
+    raise ValueError(f"Direccion de transporte invalida: {address}")
+
+
+def encode_frame(payload: Dict[str, Any]) -> bytes:
+    if msgpack is not None:
+        body, codec = msgpack.packb(payload, default=str), CODEC_MSGPACK
+    else:
+        body, codec = json.dumps(payload, default=str, separators=(",", ":")).encode("utf-8"), CODEC_JSON
+    return FRAME_HEADER.pack(len(body), codec) + body
+
+
+def _read_exactly(stream, size: int) -> bytes:
+    data = stream.read(size)
+    if len(data) < size:
+        raise EOFError("Conexion cerrada")
+    return data
+
+
+def read_frame(stream) -> Dict[str, Any]:
+    """Leer una trama de un archivo de socket (makefile("rb"))"""
+    length, codec = FRAME_HEADER.unpack(_read_exactly(stream, FRAME_HEADER.size))
+    if length > MAX_FRAME_BYTES:
+        raise ValueError(f"Trama de {length} bytes supera el maximo")
+    body = _read_exactly(stream, length)
+    if codec == CODEC_MSGPACK:
+        if msgpack is None:
+            raise ValueError("Trama MessagePack sin el paquete msgpack instalado")
+        return msgpack.unpackb(body)
+    return json.loads(body)
+
+
+class Transport:
+    """Entrega de un mensaje ANP/A2A/ACP a un agente y espera de su respuesta"""
+
+    def request(self, message: Dict[str, Any], timeout_seconds: Optional[float] = None) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {}
+
+    def close(self):
+        pass
+
+
+class InProcessTransport(Transport):
+    """Llamada directa al handler del agente en el mismo proceso"""
+
+    def __init__(self, handler: MessageHandler):
+        self.handler = handler
+
+    def request(self, message: Dict[str, Any], timeout_seconds: Optional[float] = None) -> Dict[str, Any]:
+        deadline = Deadline(timeout_seconds) if timeout_seconds is not None else None
+        return self.handler(message, deadline)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {"type": "inprocess"}
+
+
+class SocketTransport(Transport):
+    """Cliente de un AgentServer por socket Unix o TCP.
+
+    Mantiene hasta pool_size conexiones persistentes; cada conexion lleva una
+    solicitud a la vez. Una conexion reutilizada que el servidor ya cerro se
+    reintenta una vez con una conexion nueva.
+    """
+
+    def __init__(self, address: str, pool_size: int = 8, timeout_seconds: float = 60.0):
+        self.address = address
+        self.family, self.target = parse_address(address)
+        self.timeout_seconds = timeout_seconds
+        self._idle: "queue.LifoQueue" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._latency_ms = deque(maxlen=1000)
+        self._metrics = {"requests": 0, "errors": 0, "timeouts": 0, "connections": 0}
+
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(self.family, socket.SOCK_STREAM)
+        if self.family == socket.AF_INET:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        try:
+            sock.settimeout(self.timeout_seconds)
+            sock.connect(self.target)
+        except OSError:
+            sock.close()
+            raise
+        self._metrics["connections"] += 1
+        return sock
+
+    def _roundtrip(self, sock: socket.socket, frame: bytes, timeout_seconds: float) -> Dict[str, Any]:
+        sock.settimeout(timeout_seconds)
+        sock.sendall(frame)
+        with sock.makefile("rb") as stream:
+            return read_frame(stream)
+
+    def request(self, message: Dict[str, Any], timeout_seconds: Optional[float] = None) -> Dict[str, Any]:
+        timeout_seconds = self.timeout_seconds if timeout_seconds is None else max(timeout_seconds, 0.001)
+        frame = encode_frame({"message": message, "timeout_ms": int(timeout_seconds * 1000)})
+        start_time = time.perf_counter()
+        self._metrics["requests"] += 1
+
+        with self._slots:
+            try:
+                sock, reused = self._idle.get_nowait(), True
+            except queue.Empty:
+                sock, reused = None, False
+            try:
+                if sock is None:
+                    sock = self._connect()
+                try:
+                    reply = self._roundtrip(sock, frame, timeout_seconds)
+                except (EOFError, ConnectionError):
+                    if not reused:
+                        raise
+                    sock.close()
+                    sock = self._connect()
+                    reply = self._roundtrip(sock, frame, timeout_seconds)
+            except socket.timeout as e:
+                # La respuesta puede llegar tarde: la conexion ya no sirve
+                if sock is not None:
+                    sock.close()
+                self._metrics["timeouts"] += 1
+                raise TransportTimeout(f"{self.address}: sin respuesta en {timeout_seconds:.3f}s") from e
+            except (OSError, EOFError, ValueError) as e:
+                if sock is not None:
+                    sock.close()
+                self._metrics["errors"] += 1
+                raise TransportError(f"{self.address}: {e}") from e
+            self._idle.put(sock)
+
+        self._latency_ms.append((time.perf_counter() - start_time) * 1000)
+        if not reply.get("ok"):
+            raise RemoteAgentError(reply.get("error", "Error desconocido del agente remoto"))
+        return reply.get("data")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "type": "socket",
+            "address": self.address,
+            **self._metrics,
+            "idle_connections": self._idle.qsize(),
+            "latency_ms": summarize_samples(self._latency_ms)
+        }
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class _Replica:
+    def __init__(self, transport: Transport):
+        self.transport = transport
+        self.in_flight = 0
+        self.down_until = 0.0
+        self.failures = 0
+
+
+class LoadBalancedTransport(Transport):
+    """Reparte los mensajes entre replicas de un agente.
+
+    Elige la replica sana con menos solicitudes en curso (a igualdad, por
+    turno). Si una replica no acepta la conexion queda fuera durante
+    retry_seconds y el mensaje pasa a la siguiente; un timeout no se
+    reintenta porque el presupuesto de la solicitud ya se consumio.
+    """
+
+    def __init__(self, transports: List[Transport], retry_seconds: float = 5.0):
+        if not transports:
+            raise ValueError("LoadBalancedTransport necesita al menos una replica")
+        self.replicas = [_Replica(transport) for transport in transports]
+        self.retry_seconds = retry_seconds
+        self._next = 0
+        self._lock = threading.Lock()
+        self._metrics = {"failovers": 0, "unavailable": 0}
+
+    def _pick(self, tried: set) -> Optional[_Replica]:
+        with self._lock:
+            now = time.monotonic()
+            candidates = [replica for replica in self.replicas if id(replica) not in tried]
+            # Si todas estan marcadas caidas se prueba igual: alguna pudo volver
+            healthy = [replica for replica in candidates if replica.down_until <= now] or candidates
+            if not healthy:
+                return None
+            offset = self._next
+            self._next = (self._next + 1) % len(self.replicas)
+            replica = min(
+                healthy,
+                key=lambda item: (item.in_flight, (self.replicas.index(item) - offset) % len(self.replicas))
+            )
+            replica.in_flight += 1
+            return replica
+
+    def request(self, message: Dict[str, Any], timeout_seconds: Optional[float] = None) -> Dict[str, Any]:
+        tried = set()
+        while True:
+            replica = self._pick(tried)
+            if replica is None:
+                self._metrics["unavailable"] += 1
+                raise TransportError("Ninguna replica disponible")
+            tried.add(id(replica))
+            try:
+                return replica.transport.request(message, timeout_seconds)
+            except TransportTimeout:
+                raise
+            except TransportError as e:
+                replica.failures += 1
+                replica.down_until = time.monotonic() + self.retry_seconds
+                self._metrics["failovers"] += 1
+                print(f"Replica fuera de servicio por {self.retry_seconds}s: {e}")
+            finally:
+                with self._lock:
+                    replica.in_flight -= 1
+
+    def get_metrics(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "type": "load_balanced",
+            **self._metrics,
+            "replicas": [
+                {
+                    **replica.transport.get_metrics(),
+                    "in_flight": replica.in_flight,
+                    "failures": replica.failures,
+                    "down": replica.down_until > now
+                }
+                for replica in self.replicas
+            ]
+        }
+
+    def close(self):
+        for replica in self.replicas:
+            replica.transport.close()
+
+
+class _FrameHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        server: "AgentServer" = self.server.agent_server
+        while True:
+            try:
+                envelope = read_frame(self.rfile)
+            except (EOFError, ConnectionError):
+                return
+            reply = server.dispatch(envelope)
+            self.wfile.write(encode_frame(reply))
+            self.wfile.flush()
+
+
+class _ThreadingUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class _ThreadingTCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class AgentServer:
+    """Servidor de tramas para los agentes de un proceso worker.
+
+    Cada mensaje se entrega al handler de su protocolo ("ANP", "A2A", "ACP");
+    cada conexion se atiende en su propio hilo.
+    """
+
+    def __init__(self, address: str, handlers: Dict[str, MessageHandler]):
+        self.address = address
+        self.handlers = handlers
+        family, target = parse_address(address)
+        if family == socket.AF_UNIX:
+            # Un socket que quedo de una ejecucion anterior impide el bind
+            if os.path.exists(target):
+                os.unlink(target)
+            os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+            self._server = _ThreadingUnixServer(target, _FrameHandler)
+        else:
+            self._server = _ThreadingTCPServer(target, _FrameHandler)
+        self._server.agent_server = self
+
+    def dispatch(self, envelope: Dict[str, Any]) -> Dict[str, Any]:
+        message = envelope.get("message") or {}
+        handler = self.handlers.get(message.get("protocol"))
+        if handler is None:
+            return {"ok": False, "error": f"Protocolo no soportado: {message.get('protocol')}"}
+        timeout_ms = envelope.get("timeout_ms")
+        deadline = Deadline(timeout_ms / 1000.0) if timeout_ms is not None else None
+        try:
+            return {"ok": True, "data": handler(message, deadline)}
+        except Exception as e:
+            return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def shutdown(self):
+        self._server.shutdown()
+        self._server.server_close()
+        family, target = parse_address(self.address)
+        if family == socket.AF_UNIX and os.path.exists(target):
+            os.unlink(target)
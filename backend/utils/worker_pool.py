@@ -0,0 +1,100 @@
+from typing import Dict, Any, List, Optional
+import subprocess
+import threading
+import socket
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.transport import parse_address
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class WorkerPool:
+    """Procesos worker locales de un agente (scripts/agent_worker.py).
+
+    start() lanza un proceso por direccion y espera a que acepten conexiones;
+    un hilo monitor relanza los que terminan hasta stop().
+    """
+
+    def __init__(self, agent: str, addresses: List[str], startup_timeout_seconds: float = 30.0):
+        self.agent = agent
+        self.addresses = addresses
+        self.startup_timeout_seconds = startup_timeout_seconds
+        self._processes: Dict[str, subprocess.Popen] = {}
+        self._restarts = {address: 0 for address in addresses}
+        self._stop = threading.Event()
+        self._monitor: Optional[threading.Thread] = None
+
+    def _spawn(self, address: str):
+        self._processes[address] = subprocess.Popen(
+            [sys.executable, "-m", "scripts.agent_worker", self.agent, "--listen", address],
+            cwd=BACKEND_DIR
+        )
+
+    def _accepts(self, address: str) -> bool:
+        family, target = parse_address(address)
+        with socket.socket(family, socket.SOCK_STREAM) as sock:
+            sock.settimeout(0.5)
+            try:
+                sock.connect(target)
+                return True
+            except OSError:
+                return False
+
+    def start(self) -> List[str]:
+        """Lanzar los workers; devuelve las direcciones que quedaron listas"""
+        for address in self.addresses:
+            self._spawn(address)
+
+        pending = set(self.addresses)
+        expires_at = time.monotonic() + self.startup_timeout_seconds
+        while pending and time.monotonic() < expires_at:
+            for address in list(pending):
+                if self._accepts(address):
+                    pending.discard(address)
+            if pending:
+                time.sleep(0.1)
+        for address in pending:
+            print(f"Advertencia: el worker {self.agent} en {address} no respondio en {self.startup_timeout_seconds}s")
+
+        self._monitor = threading.Thread(target=self._watch, name=f"{self.agent}-workers", daemon=True)
+        self._monitor.start()
+        return [address for address in self.addresses if address not in pending]
+
+    def _watch(self):
+        while not self._stop.wait(1.0):
+            for address, process in list(self._processes.items()):
+                if process.poll() is not None and not self._stop.is_set():
+                    print(f"Worker {self.agent} en {address} termino (codigo {process.returncode}), relanzando")
+                    self._restarts[address] += 1
+                    self._spawn(address)
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        for process in self._processes.values():
+            if process.poll() is None:
+                process.terminate()
+        for process in self._processes.values():
+            try:
+                process.wait(timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "agent": self.agent,
+            "workers": [
+                {
+                    "address": address,
+                    "pid": process.pid,
+                    "running": process.poll() is None,
+                    "restarts": self._restarts[address]
+                }
+                for address, process in self._processes.items()
+            ]
+        }